@@ -1,54 +1,94 @@
 # agents/analysis/data_processing_agent.py
-import json
-import time
+import asyncio
 import logging
-from datetime import datetime
-from agents.base.agent import BaseAgent
+from agents.base.agent import AsyncBaseAgent
+from core.config import settings
+from core.sorted_buffer import SortedBuffer
+from core.transaction import NS_PER_SECOND
 
 logger = logging.getLogger("DataProcessingAgent")
 
 
-class DataProcessingAgent(BaseAgent):
+class DataProcessingAgent(AsyncBaseAgent):
     """
-    This agent subscribes to the "RawDataChannel" on the message bus.
-    It accumulates raw transaction data, sorts them by timestamp, and
-    publishes the sorted list to the "ProcessedDataChannel" on the message bus.
-    This organized list can then be used by other agents (e.g., pattern analysis).
+    This agent subscribes to the "RangeValidationChannel" on the message bus.
+    It keeps validated transactions in a bounded buffer sorted by timestamp, and
+    publishes what changed as a SortedDelta to the "ProcessedDataChannel".
+    Consumers (e.g., pattern analysis) apply the deltas to a SortedView and
+    send their name to the "ProcessedSnapshotChannel" when they need the full
+    buffer, for instance on start-up or after missing a delta.
+
+    Reading validated swaps matters for retention, which is measured back
+    from the newest timestamp: validation rejects timestamps far in the
+    future, so one bad swap cannot push every other swap out of the buffer.
+    The buffer is analytics rather than the alert path, so the agent reads as a
+    non-critical subscriber: if it falls behind, it skips swaps instead of
+    stalling validation or shedding swaps for the pattern agents.
     """
 
+    input_channel = "RangeValidationChannel"
+    latency_critical = False
+    snapshot_channel = "ProcessedSnapshotChannel"
+
     def __init__(self, name, message_bus):
         super().__init__(name, message_bus)
-        self.raw_transactions = []  # Internal storage for raw transactions
+        # Internal storage for validated transactions, bounded by settings
+        self.buffer = SortedBuffer(
+            settings.PROCESSED_BUFFER_SIZE,
+            retention_ns=int(settings.PROCESSED_RETENTION_SECONDS * NS_PER_SECOND),
+        )
+        self.message_bus.subscribe(self.snapshot_channel, self.name)
 
-    def start(self):
+    async def run(self):
         logger.info(f"[{self.name}] DataProcessingAgent starting.")
+        publisher = asyncio.create_task(self._publish_loop())
+        try:
+            while True:
+                # Drain the channel as swaps arrive so the buffer never lags the
+                # feed; deltas go out on their own timer
+                messages = await self.message_bus.get_messages_async(self.input_channel, subscriber=self.name)
+                await self.handle_batch(messages)
+                await asyncio.sleep(0)
+        finally:
+            publisher.cancel()
+            await asyncio.gather(publisher, return_exceptions=True)
+
+    async def _publish_loop(self):
+        # Batch changes for an interval so consumers get one delta per interval
         while True:
-            # Retrieve raw messages from the RawDataChannel
-            messages = self.message_bus.get_messages("RawDataChannel")
-            if messages:
-                for msg in messages:
-                    try:
-                        # Convert the JSON string to a Python dictionary
-                        transaction = json.loads(msg)
-                        self.raw_transactions.append(transaction)
-                    except Exception as e:
-                        logger.error(f"Error parsing raw message: {e}", exc_info=True)
-
-                # Sort the internal list by the "timestamp" field
-                try:
-                    # Assumes each transaction dict has a "timestamp" field (as a numeric epoch)
-                    self.raw_transactions.sort(key=lambda tx: tx.get("timestamp", 0))
-                    logger.info(f"Accumulated and sorted {len(self.raw_transactions)} transactions by timestamp.")
-                except Exception as e:
-                    logger.error(f"Error sorting transactions: {e}", exc_info=True)
-
-                # Publish the sorted list to the ProcessedDataChannel
-                try:
-                    sorted_data = json.dumps(self.raw_transactions)
-                    self.message_bus.send_message("ProcessedDataChannel", sorted_data)
-                    logger.info("Published sorted transaction data to ProcessedDataChannel.")
-                except Exception as e:
-                    logger.error(f"Error publishing processed data: {e}", exc_info=True)
-
-            # Sleep for a few seconds before checking for more data
-            time.sleep(5)
+            await asyncio.sleep(settings.PROCESSED_PUBLISH_INTERVAL)
+            try:
+                await self._publish()
+            except Exception as e:
+                logger.error(f"Error building delta: {e}", exc_info=True)
+
+    async def handle_batch(self, messages):
+        # Messages are Transaction objects parsed once by CieloAgent
+        try:
+            self.buffer.insert_many(messages)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error sorting transactions: {e}", exc_info=True)
+        self.handled += len(messages)
+
+    async def handle(self, msg):
+        await self.handle_batch([msg])
+
+    async def _publish(self):
+        requests = self.message_bus.get_messages(self.snapshot_channel, timeout=0, subscriber=self.name)
+        if requests:
+            # One snapshot serves every consumer that asked since the last tick
+            delta = self.buffer.snapshot()
+            logger.info(f"Snapshot of {len(self.buffer)} transactions requested by {', '.join(sorted(set(requests)))}.")
+        else:
+            delta = self.buffer.delta()
+        if delta is None:
+            return
+
+        # Publish the changed range of the sorted buffer to the ProcessedDataChannel
+        try:
+            await self.send("ProcessedDataChannel", delta)
+            logger.info(f"Published {len(delta.transactions)} of {len(self.buffer)} sorted transactions "
+                        f"to ProcessedDataChannel.")
+        except Exception as e:
+            logger.error(f"Error publishing processed data: {e}", exc_info=True)
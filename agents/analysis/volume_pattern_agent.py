@@ -1,32 +1,34 @@
 # agents/analysis/volume_pattern_agent.py
-import json
-import time
 import logging
-from agents.base.agent import BaseAgent
+from agents.base.agent import AsyncBaseAgent
+from core.columnar_store import ColumnarStore
 
 logger = logging.getLogger("VolumePatternAgent")
 
-class VolumePatternAgent(BaseAgent):
+class VolumePatternAgent(AsyncBaseAgent):
     """
-    This agent listens on the 'ProcessedDataChannel', extracts volume data
-    from the transaction list, and performs a basic volume analysis.
+    This agent listens on the 'ProcessedDataChannel', keeps a columnar copy of
+    the sorted transactions from the published deltas, and performs a basic
+    volume analysis as a vectorized sum over the value column.
     """
-    def start(self):
-        logger.info(f"[{self.name}] VolumePatternAgent starting.")
-        while True:
-            # Retrieve processed data from the ProcessedDataChannel
-            messages = self.message_bus.get_messages("ProcessedDataChannel")
-            if messages:
-                for msg in messages:
-                    try:
-                        # Assume the message is a JSON array of transaction dictionaries
-                        transactions = json.loads(msg)
-                        volumes = [tx.get("volume", 0) for tx in transactions]
-                        total_volume = sum(volumes)
-                        logger.info(f"[{self.name}] Total volume from {len(volumes)} transactions: {total_volume}.")
-                        # Flag a pattern if the total volume exceeds an arbitrary threshold (adjust as needed)
-                        if total_volume > 5000:
-                            logger.info(f"[{self.name}] Potential high-volume pattern detected!")
-                    except Exception as e:
-                        logger.error(f"[{self.name}] Error processing volume data: {e}", exc_info=True)
-            time.sleep(3)
+    input_channel = "ProcessedDataChannel"
+
+    def __init__(self, name, message_bus):
+        super().__init__(name, message_bus)
+        self.store = ColumnarStore()
+
+    async def handle(self, msg):
+        try:
+            # The message is a SortedDelta of Transaction objects
+            if not self.store.apply(msg):
+                # Missed a delta (or just started): ask DataProcessingAgent for everything
+                await self.send("ProcessedSnapshotChannel", self.name)
+                return
+            volumes = self.store.view().value
+            total_volume = float(volumes.sum())
+            logger.info(f"[{self.name}] Total volume from {len(volumes)} transactions: {total_volume}.")
+            # Flag a pattern if the total volume exceeds an arbitrary threshold (adjust as needed)
+            if total_volume > 5000:
+                logger.info(f"[{self.name}] Potential high-volume pattern detected!")
+        except Exception as e:
+            logger.error(f"[{self.name}] Error processing volume data: {e}", exc_info=True)
@@ -1,20 +1,105 @@
 # agents/base/agent.py
-import time
+import asyncio
+import logging
+from collections import Counter
+from core.latency import tracer
+from core.metrics import registry
+
 
 class BaseAgent:
     def __init__(self, name, message_bus):
         self.name = name
         self.message_bus = message_bus
+        registry.register_agent(self)
+
+    def stats(self):
+        """Counters for the metrics registry (core.metrics); subclasses add their components'."""
+        return {}
 
     def start(self):
         print(f"[{self.name}] Agent starting.")
         # This is where the agent’s main loop would go.
         while True:
             self.process_messages()
-            time.sleep(1)  # Pause for 1 second between cycles
 
     def process_messages(self):
-        # Check for messages on the bus intended for this agent.
-        messages = self.message_bus.get_messages(self.name)
+        # Block until messages on the bus intended for this agent arrive.
+        messages = self.message_bus.get_messages(self.name, timeout=None)
         for msg in messages:
             print(f"[{self.name}] Received message: {msg}")
+
+
+class AsyncBaseAgent(BaseAgent):
+    """
+    Event-loop variant of BaseAgent. Subclasses set `input_channel` and
+    implement `async def handle(msg)`; `run()` awaits messages from the channel
+    and is meant to be scheduled alongside other agents by core.runtime.AgentRuntime.
+    `start()` still runs the agent on its own loop for threaded use.
+    Agents that only read their input periodically set `latency_critical` to
+    False so that falling behind never blocks or sheds for the other readers.
+    """
+
+    input_channel = None
+    latency_critical = True
+
+    def __init__(self, name, message_bus):
+        super().__init__(name, message_bus)
+        self.logger = logging.getLogger(self.name)
+        # Counters read by the metrics registry (core.metrics)
+        self.handled = 0
+        self.errors = 0
+        self.sent = Counter()               # channel -> messages sent
+        self.patterns_emitted = Counter()   # (channel, pattern type) -> patterns emitted
+        if self.input_channel:
+            self.message_bus.subscribe(self.input_channel, self.name, critical=self.latency_critical)
+
+    def stats(self):
+        return {**super().stats(), 'handled': self.handled, 'errors': self.errors,
+                'sent': dict(self.sent), 'patterns_emitted': dict(self.patterns_emitted)}
+
+    def start(self):
+        asyncio.run(self.run())
+
+    async def run(self):
+        self.logger.info(f"[{self.name}] {type(self).__name__} starting.")
+        while True:
+            messages = await self.message_bus.get_messages_async(self.input_channel, subscriber=self.name)
+            await self.handle_batch(messages)
+            # Let the other agents on the loop run between batches
+            await asyncio.sleep(0)
+
+    async def handle_batch(self, messages):
+        """Everything that arrived since the last read; override to process it as a whole."""
+        for msg in messages:
+            # Sampled swaps record their wait on the input channel and the time spent here
+            trace = getattr(msg, 'trace', None)
+            if trace is not None:
+                entered = tracer.enter(trace, self.input_channel)
+            try:
+                await self.handle(msg)
+            except Exception as e:
+                self.errors += 1
+                self.logger.error(f"[{self.name}] Error handling message: {e}", exc_info=True)
+            self.handled += 1
+            if trace is not None:
+                tracer.exit(self.name, entered)
+
+    async def handle(self, msg):
+        raise NotImplementedError
+
+    async def send(self, channel, message, value=None):
+        trace = getattr(message, 'trace', None)
+        if trace is not None:
+            tracer.sent(trace, channel)
+        self.sent[channel] += 1
+        return await self.message_bus.send_message_async(channel, message, value=value)
+
+    def count_patterns(self, channel, patterns):
+        for pattern in patterns:
+            self.patterns_emitted[(channel, pattern.get('type', 'unknown'))] += 1
+
+    async def emit_patterns(self, channel, msg, **fields):
+        """Send a copy of `msg` carrying these pattern results, counting each pattern by type."""
+        for patterns in fields.values():
+            self.count_patterns(channel, patterns)
+        return await self.send(channel, msg.with_patterns(**fields))
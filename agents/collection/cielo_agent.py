@@ -2,131 +2,349 @@
 import asyncio
 import json
 import logging
+import random
+import time
+from collections import Counter, deque
 from datetime import datetime
 import websockets
 from websockets.exceptions import ConnectionClosed
 
 from agents.base.agent import BaseAgent
+from core.codec import get_codec
 from core.config import settings
+from core.dedup import build_dedup
+from core.frame_log import FrameLogWriter
+from core.latency import tracer
+from core.transaction import Transaction
+from agents.validation.FusedValidationAgent import build_validator
 
 logger = logging.getLogger('CieloAgent')
 
+# FeedConnection states
+DISCONNECTED = "disconnected"
+CONNECTING = "connecting"
+CONNECTED = "connected"         # Open and subscribed
+BACKOFF = "backoff"             # Waiting before the next connection attempt
+CLOSED = "closed"               # Shut down
+
+
+class FeedConnection:
+    """
+    One websocket to the feed, subscribed to one shard of the filters, and its
+    reconnect state. Each outage (gap) is recorded with its downtime and an
+    estimate of the swaps missed, taken from the swap rate of the session
+    before it.
+    """
+
+    def __init__(self, index, filters):
+        self.name = f"feed-{index}"
+        self.filters = filters
+        self.websocket = None
+        self.active_subscriptions = set()
+        self.state = DISCONNECTED
+        # Connection counters, read by the metrics registry
+        self.connect_attempts = 0
+        self.reconnects = 0             # Successful connections after the first
+        self._connected_once = False
+        self.swaps = 0                  # Swaps received on this connection
+        self.swap_rate = 0.0            # Swaps/s of the last session that lasted at least a second
+        self.connected_at = None        # time.monotonic() of the current session's start
+        self.disconnected_at = None     # time.monotonic() when the current gap began
+        self._session_swaps = 0
+        self.downtime_seconds = 0.0     # Total time without a connection after the first one
+        self.missed_estimate = 0.0      # Total swaps likely missed during gaps
+        self.gaps = deque(maxlen=100)   # Recent gaps, newest last
+
+    def opened(self, now):
+        """The connection is subscribed; closes the current gap, if any."""
+        self.state = CONNECTED
+        if self._connected_once:
+            self.reconnects += 1
+        if self.disconnected_at is not None:
+            downtime = now - self.disconnected_at
+            missed = downtime * self.swap_rate
+            self.downtime_seconds += downtime
+            self.missed_estimate += missed
+            self.gaps.append({'started': round(time.time() - downtime, 3),
+                              'downtime_seconds': round(downtime, 3), 'missed_estimate': round(missed, 1)})
+            logger.warning(f"[{self.name}] Reconnected after {downtime:.1f}s; "
+                           f"~{missed:.0f} swaps likely missed at {self.swap_rate:.1f} swaps/s.")
+        self._connected_once = True
+        self.connected_at = now
+        self.disconnected_at = None
+        self._session_swaps = 0
+
+    def lost(self, now):
+        """The session ended; starts a gap and returns how long the session lasted."""
+        session = now - self.connected_at
+        if session >= 1.0:
+            self.swap_rate = self._session_swaps / session
+        self.state = DISCONNECTED
+        self.connected_at = None
+        self.disconnected_at = now
+        return session
+
+    def received_swap(self):
+        self.swaps += 1
+        self._session_swaps += 1
+
+    def stats(self):
+        return {'state': self.state, 'connect_attempts': self.connect_attempts, 'reconnects': self.reconnects,
+                'downtime_seconds': self.downtime_seconds, 'missed_estimate': self.missed_estimate}
+
+
 class CieloAgent(BaseAgent):
     """
     Connects to the Cielo WebSocket feed using settings,
     subscribes to the feed, and forwards raw swap transaction data
     to the "RawDataChannel" on the message bus.
+
+    With settings.CIELO_CONNECTION_SHARDS the feed is split over several
+    connections, each subscribed to CIELO_FILTERS updated with one shard
+    (chains, tx types or a USD-value band). Shards may overlap, and a
+    reconnect can resend recent swaps, so the merged stream goes through a
+    seen-set of transaction hashes (core.dedup) before anything is forwarded.
     """
     def __init__(self, name, message_bus):
         super().__init__(name, message_bus)
         self.ws_url = settings.CIELO_WS_URL
         self.api_key = settings.CIELO_API_KEY
         self.filters = settings.CIELO_FILTERS
+        # Frame decoder (settings.FEED_CODEC); its pre-filter drops non-tx frames undecoded
+        self.codec = get_codec()
+        self.frames_skipped = 0
+        self.decode_errors = 0
+        # In inline mode swaps are validated here and skip the validation stage entirely
+        self.validate = build_validator() if settings.VALIDATION_MODE == "inline" else None
+        self.rejections = Counter()     # (stage, field, reason) of inline rejections
+        # Raw swap frames are persisted by a writer thread, off the receive path
+        self.frame_log = FrameLogWriter() if settings.FRAME_LOG_ENABLED else None
 
-        self.websocket = None
-        self.active_subscriptions = set()
+        # Repeated transaction hashes (overlapping shards, resends after a reconnect)
+        # are dropped here, by an exact or Bloom seen-set (settings.DEDUP_MODE)
+        self.seen = build_dedup()
+
+        shards = settings.CIELO_CONNECTION_SHARDS or [{}]
+        self.connections = [FeedConnection(index, {**self.filters, **shard})
+                            for index, shard in enumerate(shards)]
         self._shutdown_event = asyncio.Event()
         logger.info("CieloAgent initialized.")
 
-    async def _connect_with_retry(self, initial_delay: float = 1.0) -> None:
-        delay = initial_delay
-        attempt = 0
-        while not self._shutdown_event.is_set():
-            try:
-                attempt += 1
-                logger.info(f"Attempt {attempt} to connect to Cielo WebSocket...")
-                self.websocket = await websockets.connect(
-                    self.ws_url,
-                    extra_headers={'X-API-KEY': self.api_key},
-                    ping_interval=30,
-                    ping_timeout=10,
-                    close_timeout=5
-                )
-                await self._subscribe()
-                logger.info("Successfully connected to Cielo WebSocket feed.")
-                return
-            except Exception as e:
-                logger.warning(f"Connection attempt {attempt} failed: {e}")
-                logger.info(f"Retrying in {delay:.1f} seconds...")
-                await asyncio.sleep(delay)
-                delay *= 2  # Exponential backoff
+    def stats(self):
+        return {
+            **super().stats(),
+            'rejections': dict(self.rejections),
+            'frames_skipped': self.frames_skipped,
+            'decode_errors': self.decode_errors,
+            'connections': {connection.name: connection.stats() for connection in self.connections},
+            'dedup': self.seen.stats() if self.seen is not None else None,
+            'frame_log': self.frame_log.stats() if self.frame_log is not None else None,
+        }
+
+    def _backoff(self, retries: int) -> float:
+        """Delay before reconnect number `retries`: doubling up to the cap, jittered so shards spread out."""
+        delay = min(settings.CIELO_RECONNECT_MIN_DELAY * 2 ** min(retries, 16), settings.CIELO_RECONNECT_DELAY)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def _connect(self, connection: FeedConnection) -> None:
+        connection.state = CONNECTING
+        connection.connect_attempts += 1
+        logger.info(f"[{connection.name}] Connecting to Cielo WebSocket (attempt {connection.connect_attempts})...")
+        connection.websocket = await websockets.connect(
+            self.ws_url,
+            extra_headers={'X-API-KEY': self.api_key},
+            ping_interval=30,
+            ping_timeout=10,
+            close_timeout=5
+        )
+        await self._subscribe(connection)
+        connection.opened(time.monotonic())
+        logger.info(f"[{connection.name}] Successfully connected to Cielo WebSocket feed.")
 
-    async def _subscribe(self):
-        """Subscribe to the feed using the configured filters."""
+    async def _wait_shutdown(self, timeout: float) -> bool:
+        """Sleep up to `timeout` seconds; True if the agent is shutting down."""
+        try:
+            await asyncio.wait_for(self._shutdown_event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self._shutdown_event.is_set()
+
+    async def _subscribe(self, connection: FeedConnection):
+        """Subscribe to the feed using the connection's shard of the filters."""
         subscription = {
             "type": "subscribe_feed",
-            "filter": self.filters
+            "filter": connection.filters
         }
-        await self.websocket.send(json.dumps(subscription))
-        self.active_subscriptions.add('feed')
-        logger.info(f"Subscribed to feed with filters: {self.filters}")
+        await connection.websocket.send(json.dumps(subscription))
+        connection.active_subscriptions.add('feed')
+        logger.info(f"[{connection.name}] Subscribed to feed with filters: {connection.filters}")
 
-    def _process_transaction(self, data: dict):
+    def _process_transaction(self, data: dict) -> Transaction:
         """
-        Minimal processing: simply returns the raw data.
+        Minimal processing: parses the payload once into a Transaction.
         Further analysis will be handled by a separate Pattern Analysis Agent.
         """
         logger.debug("Received raw transaction data for forwarding.")
-        return data
+        return Transaction.from_dict(data)
 
-    async def _handle_websocket_message(self, message: str) -> None:
-        if not message.strip():
-            logger.debug("Received an empty message. Skipping.")
-            return
+    async def _handle_websocket_message(self, message: str) -> bool:
+        """Forward the swap in `message`, if any; True if it was a swap (even a duplicate)."""
+        received_ns = time.perf_counter_ns()
+        if not self.codec.is_tx_frame(message):
+            # Pings, acknowledgements and empty frames: nothing to decode
+            self.frames_skipped += 1
+            return False
         try:
-            data = json.loads(message)
-            if data.get('type') == 'tx':
-                transaction_data = data.get('data', {})
+            data = self.codec.loads(message)
+            # A frame that decodes to a list, number, string or null, or a tx frame
+            # whose data is not an object, is as unusable as one that does not decode
+            if isinstance(data, dict) and data.get('type') == 'tx':
+                data = data.get('data', {})
+                is_tx = True
+            else:
+                is_tx = False
+            if not isinstance(data, dict):
+                raise ValueError(f"not a JSON object: {type(data).__name__}")
+        except ValueError as e:
+            self.decode_errors += 1
+            logger.warning(f"Undecodable frame ({len(message)} bytes): {e}")
+            return False
+        try:
+            if is_tx:
+                transaction_data = data
                 if transaction_data.get('tx_type') == 'swap':
-                    # Forward raw transaction data to RawDataChannel
-                    raw_data = self._process_transaction(transaction_data)
-                    self.message_bus.send_message("RawDataChannel", json.dumps(raw_data))
-                    logger.debug("Forwarded raw transaction data to RawDataChannel.")
+                    tx_hash = transaction_data.get('transaction_hash')
+                    if self.seen is not None and tx_hash and not self.seen.add(tx_hash):
+                        logger.debug(f"Duplicate swap {tx_hash} dropped.")
+                        return True
+                    if self.frame_log is not None:
+                        self.frame_log.append(message)
+                    # Forward the parsed transaction to RawDataChannel. Passing the value lets
+                    # the channel shed the smallest swaps first, and a full channel suspends
+                    # this coroutine, slowing ingestion down to what the pipeline can absorb.
+                    transaction = self._process_transaction(transaction_data)
+                    # Sampled swaps carry a Trace that every stage stamps (core.latency)
+                    transaction.trace = tracer.begin(received_ns)
+                    if transaction.trace is not None:
+                        tracer.sent(transaction.trace, "RawDataChannel")
+                    if await self.message_bus.send_message_async(
+                            "RawDataChannel", transaction, value=transaction.value):
+                        logger.debug("Forwarded raw transaction data to RawDataChannel.")
+                    else:
+                        logger.debug("RawDataChannel under pressure, swap dropped.")
+                    if self.validate is not None:
+                        await self._forward_validated(transaction)
+                    return True
         except Exception as e:
             logger.error(f"Error handling websocket message: {e}", exc_info=True)
+        return False
+
+    async def _forward_validated(self, transaction: Transaction) -> None:
+        rejection = self.validate(transaction)
+        if rejection is None:
+            if transaction.trace is not None:
+                tracer.sent(transaction.trace, "RangeValidationChannel")
+            await self.message_bus.send_message_async("RangeValidationChannel", transaction)
+        else:
+            self.rejections[(rejection.stage, rejection.field, rejection.reason)] += 1
+            logger.debug(f"Rejected swap {transaction.transaction_hash}: {rejection}")
 
-    async def _close_websocket(self) -> None:
-        if not self.websocket:
+    async def _close_websocket(self, connection: FeedConnection) -> None:
+        # Detached first, so a concurrent stop() and read loop close it only once
+        websocket, connection.websocket = connection.websocket, None
+        if not websocket:
             return
+        subscriptions, connection.active_subscriptions = connection.active_subscriptions, set()
+        if websocket.closed:
+            # Dropped by the server: nothing to unsubscribe from
+            return
+        for subscription in subscriptions:
+            try:
+                await asyncio.wait_for(
+                    websocket.send(json.dumps({"type": f"unsubscribe_{subscription}"})),
+                    timeout=2.0
+                )
+            except Exception as e:
+                logger.error(f"Error unsubscribing from {subscription}: {e}")
+        await asyncio.sleep(0.1)
         try:
-            for subscription in list(self.active_subscriptions):
+            await asyncio.wait_for(websocket.close(), timeout=10.0)
+            logger.info(f"[{connection.name}] WebSocket closed successfully")
+        except Exception as e:
+            logger.error(f"[{connection.name}] Error closing WebSocket: {e}")
+
+    async def _run_connection(self, connection: FeedConnection):
+        """
+        Connection state machine: CONNECTING -> CONNECTED -> DISCONNECTED ->
+        BACKOFF -> CONNECTING ..., looped rather than recursive so a flapping
+        feed never grows the stack. Failed attempts back off exponentially up
+        to CIELO_RECONNECT_DELAY, with jitter; the backoff only resets after a
+        session outlived that cap, so a feed that accepts and then drops
+        connections is not hammered. Downstream agents keep draining their
+        channels meanwhile, since they run as their own tasks.
+        """
+        retries = 0                     # Reconnects since the last stable session
+        try:
+            while not self._shutdown_event.is_set():
                 try:
-                    await asyncio.wait_for(
-                        self.websocket.send(json.dumps({"type": f"unsubscribe_{subscription}"})),
-                        timeout=2.0
-                    )
-                    self.active_subscriptions.remove(subscription)
+                    await self._connect(connection)
                 except Exception as e:
-                    logger.error(f"Error unsubscribing from {subscription}: {e}")
-            await asyncio.sleep(0.1)
-            try:
-                await asyncio.wait_for(self.websocket.close(), timeout=10.0)
-                logger.info("WebSocket closed successfully")
-            except Exception as e:
-                logger.error(f"Error closing WebSocket: {e}")
+                    logger.warning(f"[{connection.name}] Connection attempt failed: {e}")
+                    await self._close_websocket(connection)
+                    if connection._connected_once and connection.disconnected_at is None:
+                        connection.disconnected_at = time.monotonic()
+                else:
+                    try:
+                        async for message in connection.websocket:
+                            if self._shutdown_event.is_set():
+                                break
+                            if await self._handle_websocket_message(message):
+                                connection.received_swap()
+                        if not self._shutdown_event.is_set():
+                            logger.warning(f"[{connection.name}] WebSocket stream ended.")
+                    except ConnectionClosed as e:
+                        logger.warning(f"[{connection.name}] WebSocket connection closed: {e}.")
+                    except Exception as e:
+                        logger.error(f"[{connection.name}] Error in CieloAgent run loop: {e}", exc_info=True)
+                    if connection.lost(time.monotonic()) >= settings.CIELO_RECONNECT_DELAY:
+                        retries = 0
+                    await self._close_websocket(connection)
+                if self._shutdown_event.is_set():
+                    break
+                delay = self._backoff(retries)
+                retries += 1
+                connection.state = BACKOFF
+                logger.info(f"[{connection.name}] Reconnecting in {delay:.1f} seconds...")
+                if await self._wait_shutdown(delay):
+                    break
         finally:
-            self.websocket = None
+            await self._close_websocket(connection)
+            connection.state = CLOSED
 
     async def run_async(self):
+        """Run every feed connection; their swaps merge in _handle_websocket_message."""
+        if len(self.connections) == 1:
+            await self._run_connection(self.connections[0])
+            return
+        logger.info(f"Opening {len(self.connections)} feed connections.")
+        await asyncio.gather(*(self._run_connection(connection) for connection in self.connections))
+
+    async def stop(self):
+        """Shut down: closing the sockets ends the read loops, which would otherwise wait for the next frame."""
+        self._shutdown_event.set()
+        await asyncio.gather(*(self._close_websocket(connection) for connection in self.connections))
+
+    async def run(self):
+        """Entry point for AgentRuntime, which runs the downstream agents on the same loop."""
+        logger.info(f"[{self.name}] CieloAgent starting.")
+        if self.frame_log is not None:
+            self.frame_log.start()
         try:
-            await self._connect_with_retry()
-            async for message in self.websocket:
-                if self._shutdown_event.is_set():
-                    break
-                await self._handle_websocket_message(message)
-        except ConnectionClosed as e:
-            logger.warning(f"WebSocket connection closed: {e}. Reconnecting...")
-            self.websocket = None
-            await asyncio.sleep(5)
-            await self.run_async()
-        except Exception as e:
-            logger.error(f"Error in CieloAgent run loop: {e}", exc_info=True)
-            await asyncio.sleep(5)
             await self.run_async()
         finally:
-            await self._close_websocket()
+            if self.frame_log is not None:
+                self.frame_log.close()
 
     def start(self):
-        """Run the asynchronous agent loop."""
-        logger.info(f"[{self.name}] CieloAgent starting.")
-        asyncio.run(self.run_async())
+        """Run the asynchronous agent loop on its own event loop."""
+        asyncio.run(self.run())
@@ -0,0 +1,212 @@
+# agents/communication/alert_agent.py
+import asyncio
+import time
+from collections import Counter, deque
+from agents.base.agent import AsyncBaseAgent
+from agents.communication.sinks import FileSink, build_sink
+from agents.patterns.pattern_pipeline import OUTPUT_CHANNELS, PATTERN_FIELDS
+from core.config import settings
+from core.latency import tracer
+from core.rate_limit import TokenBucket
+
+
+class Alert:
+    """Every pattern hit for one wallet and token since its last alert, merged."""
+
+    __slots__ = ('wallet_address', 'token_address', 'first_seen', 'due', 'hits', 'patterns',
+                 'channels', 'max_value', 'last_transaction')
+
+    def __init__(self, wallet_address, token_address, now, due):
+        self.wallet_address = wallet_address
+        self.token_address = token_address
+        self.first_seen = now
+        self.due = due                  # When it may be dispatched (its key's cooldown has passed)
+        self.hits = 0
+        self.patterns = {}              # Pattern type -> highest confidence seen
+        self.channels = set()
+        self.max_value = 0.0
+        self.last_transaction = None
+
+    def merge(self, channel, transaction, patterns):
+        self.hits += 1
+        self.channels.add(channel)
+        for pattern in patterns:
+            type_ = pattern.get('type', 'unknown')
+            confidence = pattern.get('confidence') or 0.0
+            self.patterns[type_] = max(self.patterns.get(type_, 0.0), confidence)
+        if transaction.value is not None and transaction.value > self.max_value:
+            self.max_value = transaction.value
+        self.last_transaction = transaction
+
+    def format(self):
+        patterns = ", ".join(f"{type_} ({confidence:.2f})" for type_, confidence in sorted(self.patterns.items()))
+        tx = self.last_transaction
+        lines = [
+            f"Wallet {self.wallet_address} / token {self.token_address}",
+            f"Patterns: {patterns}",
+            f"Hits: {self.hits}, largest swap ${self.max_value:,.2f}",
+        ]
+        if tx is not None:
+            lines.append(f"Last: {tx.transaction_type or 'swap'} ${tx.value or 0:,.2f} tx {tx.transaction_hash}")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            'wallet_address': self.wallet_address,
+            'token_address': self.token_address,
+            'hits': self.hits,
+            'patterns': dict(sorted(self.patterns.items())),
+            'channels': sorted(self.channels),
+            'max_value': self.max_value,
+            'last_transaction': self.last_transaction.to_dict() if self.last_transaction else None,
+        }
+
+
+class AlertAgent(AsyncBaseAgent):
+    """
+    Turns pattern detections into outbound alerts without letting a burst of
+    detections turn into a burst of outbound calls.
+
+    Reads PatternChannel, VolumePatternChannel and PositionPatternChannel.
+    Hits for the same wallet and token merge into one pending Alert, and a key
+    alerted on is held back until ALERT_COOLDOWN_SECONDS after its last
+    alert, with every hit in between merged into the next one. Every
+    ALERT_FLUSH_INTERVAL the due alerts are queued for each target, and one
+    sender per target sends them in batches of up to ALERT_BATCH_SIZE, under
+    a token bucket of ALERT_RATE_PER_MINUTE (bursts of ALERT_BURST). Pending
+    alerts and target queues are bounded; what does not fit is counted as
+    dropped. Reading a detection is a dict update, and sends happen in their
+    own tasks, so the pattern agents never wait on the sink.
+    """
+
+    def __init__(self, name, message_bus, sink=None, targets=None):
+        super().__init__(name, message_bus)
+        self.sink = sink or build_sink()
+        self.targets = list(targets or settings.ALERT_TARGETS or [settings.TARGET_CHANNEL])
+        self.cooldown = settings.ALERT_COOLDOWN_SECONDS
+        self.pending = {}               # (wallet, token) -> Alert
+        self.last_sent = {}             # (wallet, token) -> when its last alert was dispatched, oldest first
+        self.queues = {target: deque() for target in self.targets}
+        self._ready = {target: asyncio.Event() for target in self.targets}
+        self.buckets = {target: TokenBucket(settings.ALERT_RATE_PER_MINUTE / 60.0, settings.ALERT_BURST)
+                        for target in self.targets}
+        # Counters read by the metrics registry
+        self.alerts = Counter()         # created, coalesced, dispatched, sent, dropped_pending, dropped_queue
+        self.batches = Counter()        # target -> messages sent
+        self.send_errors = Counter()    # target -> failed sends
+        for channel in OUTPUT_CHANNELS:
+            self.message_bus.subscribe(channel, self.name)
+
+    def stats(self):
+        return {**super().stats(), 'alerts': dict(self.alerts), 'pending': len(self.pending),
+                'targets': {target: {'sent': self.batches[target], 'errors': self.send_errors[target],
+                                     'queued': len(self.queues[target])} for target in self.targets}}
+
+    async def run(self):
+        # Log in to the sink before reading, so a bad token shows at start-up rather than at the first alert
+        try:
+            await self.sink.start()
+        except Exception as e:
+            self.logger.warning(f"[{self.name}] Could not start the {self.sink.name} sink ({e}); "
+                                f"writing alerts to the file sink instead.")
+            self.sink = FileSink()
+        self.logger.info(f"[{self.name}] AlertAgent starting: {self.sink.name} sink, targets {self.targets}.")
+        tasks = [asyncio.create_task(self._read(channel)) for channel in OUTPUT_CHANNELS]
+        tasks.append(asyncio.create_task(self._flush_loop()))
+        tasks += [asyncio.create_task(self._send_loop(target)) for target in self.targets]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _read(self, channel):
+        field = PATTERN_FIELDS[channel]
+        while True:
+            messages = await self.message_bus.get_messages_async(channel, subscriber=self.name)
+            now = time.monotonic()
+            for msg in messages:
+                trace = msg.trace
+                if trace is not None:
+                    entered = tracer.enter(trace, channel)
+                try:
+                    self.hit(channel, msg, msg.patterns.get(field, ()), now)
+                except Exception as e:
+                    self.errors += 1
+                    self.logger.error(f"[{self.name}] Error handling message: {e}", exc_info=True)
+                self.handled += 1
+                if trace is not None:
+                    tracer.exit(self.name, entered)
+            await asyncio.sleep(0)
+
+    def hit(self, channel, transaction, patterns, now):
+        """Merge one detection into its wallet+token alert."""
+        key = (transaction.wallet_address, transaction.token_address)
+        alert = self.pending.get(key)
+        if alert is not None:
+            self.alerts['coalesced'] += 1
+        elif len(self.pending) >= settings.ALERT_MAX_PENDING:
+            self.alerts['dropped_pending'] += 1
+            return
+        else:
+            last = self.last_sent.get(key)
+            due = now if last is None else max(now, last + self.cooldown)
+            alert = self.pending[key] = Alert(key[0], key[1], now, due)
+            self.alerts['created'] += 1
+        alert.merge(channel, transaction, patterns)
+
+    def flush(self, now):
+        """Queue every due alert for each target; returns how many were due."""
+        due = [key for key, alert in self.pending.items() if alert.due <= now]
+        last_sent = self.last_sent
+        for key in due:
+            alert = self.pending.pop(key)
+            last_sent.pop(key, None)
+            last_sent[key] = now
+            for target in self.targets:
+                queue = self.queues[target]
+                if len(queue) >= settings.ALERT_QUEUE_LIMIT:
+                    queue.popleft()
+                    self.alerts['dropped_queue'] += 1
+                queue.append(alert)
+        if due:
+            self.alerts['dispatched'] += len(due)
+            for target in self.targets:
+                self._ready[target].set()
+        # Keys whose cooldown has passed no longer need remembering
+        horizon = now - self.cooldown
+        while last_sent:
+            key = next(iter(last_sent))
+            if last_sent[key] > horizon:
+                break
+            del last_sent[key]
+        return len(due)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(settings.ALERT_FLUSH_INTERVAL)
+            try:
+                self.flush(time.monotonic())
+            except Exception as e:
+                self.logger.error(f"[{self.name}] Error dispatching alerts: {e}", exc_info=True)
+
+    async def _send_loop(self, target):
+        queue, ready, bucket = self.queues[target], self._ready[target], self.buckets[target]
+        while True:
+            if not queue:
+                ready.clear()
+                await ready.wait()
+            # Alerts keep queueing while the bucket refills, so a backlog goes out in fuller batches
+            await bucket.acquire()
+            batch = [queue.popleft() for _ in range(min(len(queue), settings.ALERT_BATCH_SIZE))]
+            if not batch:
+                continue
+            text = "\n\n".join(alert.format() for alert in batch)
+            try:
+                await self.sink.send(target, text, batch)
+                self.batches[target] += 1
+                self.alerts['sent'] += len(batch)
+            except Exception as e:
+                self.send_errors[target] += 1
+                self.logger.error(f"[{self.name}] Failed to send {len(batch)} alerts to {target}: {e}")
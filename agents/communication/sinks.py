@@ -0,0 +1,93 @@
+# agents/communication/sinks.py
+import asyncio
+import json
+import logging
+import time
+from core.config import settings
+
+try:
+    from telethon import TelegramClient
+except ImportError:  # Optional; only needed for the telegram alert sink
+    TelegramClient = None
+
+logger = logging.getLogger("AlertSink")
+
+
+class LogSink:
+    """Writes alert messages to the log; for tests and dry runs."""
+
+    name = "log"
+
+    async def start(self):
+        pass
+
+    async def send(self, target, text, alerts):
+        logger.info(f"Alert to {target} ({len(alerts)} alerts):\n{text}")
+
+
+class FileSink:
+    """Appends one JSON line per outbound message (target, text and the alerts in it)."""
+
+    name = "file"
+
+    def __init__(self, path=None):
+        self.path = path or settings.DATA_DIR / "alerts.jsonl"
+
+    async def start(self):
+        pass
+
+    async def send(self, target, text, alerts):
+        record = {'sent_at': round(time.time(), 3), 'target': target, 'text': text,
+                  'alerts': [alert.to_dict() for alert in alerts]}
+        line = json.dumps(record, default=str) + '\n'
+        # Small appends; a thread keeps even a slow disk off the event loop
+        await asyncio.to_thread(self._append, line)
+
+    def _append(self, line):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+class TelegramSink:
+    """
+    Sends alert messages to Telegram chats with telethon, as the bot
+    TELEGRAM_BOT_TOKEN. A user session would prompt for a phone number and
+    code on the terminal, freezing the shared event loop, so only bots log in.
+    """
+
+    name = "telegram"
+
+    def __init__(self, session="alerts", bot_token=None, login_timeout=30.0):
+        self.client = TelegramClient(str(settings.DATA_DIR / session), int(settings.API_ID), settings.API_HASH)
+        self.bot_token = bot_token or settings.TELEGRAM_BOT_TOKEN
+        self.login_timeout = login_timeout
+
+    async def start(self):
+        """Log in before any alert is sent; raises if that fails or times out."""
+        await asyncio.wait_for(self.client.start(bot_token=self.bot_token), self.login_timeout)
+
+    async def send(self, target, text, alerts):
+        await self.client.send_message(target, text)
+
+
+def build_sink(name=None):
+    """
+    Alert sink for `name` (default settings.ALERT_SINK). Without telethon or a
+    TELEGRAM_BOT_TOKEN the telegram sink falls back to the file sink with a
+    warning, so the pipeline always starts.
+    """
+    name = name or settings.ALERT_SINK
+    if name == "log":
+        return LogSink()
+    if name == "file":
+        return FileSink()
+    if name == "telegram":
+        if TelegramClient is None:
+            logger.warning("telethon is not installed; writing alerts to the file sink instead")
+            return FileSink()
+        if not settings.TELEGRAM_BOT_TOKEN:
+            logger.warning("TELEGRAM_BOT_TOKEN is not set; writing alerts to the file sink instead")
+            return FileSink()
+        return TelegramSink()
+    raise ValueError(f"Unknown alert sink: {name!r}")
@@ -0,0 +1,37 @@
+# agents/patterns/PatternPipelineAgent.py
+from agents.base.agent import AsyncBaseAgent
+from agents.patterns.pattern_pipeline import OUTPUT_CHANNELS, PatternPipeline
+
+
+class PatternPipelineAgent(AsyncBaseAgent):
+    """
+    Runs WalletBehaviorAgent, TradingVolumeAgent and SmartPositionAgent in
+    process through one PatternPipeline.
+
+    Each transaction from RangeValidationChannel is ingested into the shared
+    WalletStore once and analysed by all three agents before the next one is
+    ingested, so no agent judges a transaction against history that arrived
+    after it, however large the batch. The output is the same as replay.py
+    and the ShardedPatternAgent workers, which drive the same pipeline.
+    Patterns are published to PatternChannel, VolumePatternChannel and
+    PositionPatternChannel in input order.
+    """
+
+    input_channel = "RangeValidationChannel"
+
+    def __init__(self, name, message_bus, wallet_store=None):
+        super().__init__(name, message_bus)
+        self.pipeline = PatternPipeline(wallet_store=wallet_store)
+        self.wallet_store = self.pipeline.store
+
+    def stats(self):
+        return {**super().stats(), 'wallet_stores': {self.wallet_store.name: self.wallet_store.stats()}}
+
+    async def handle(self, msg):
+        if msg.wallet_address is None:
+            return
+        emitted = await self.pipeline.process(msg)
+        for channel in OUTPUT_CHANNELS:
+            if channel in emitted:
+                # The pipeline's agents counted these patterns when they found them
+                await self.send(channel, msg.with_patterns(**emitted[channel]))
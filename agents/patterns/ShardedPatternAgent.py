@@ -0,0 +1,205 @@
+import asyncio
+import multiprocessing
+import queue
+import struct
+import zlib
+from collections import deque
+from agents.base.agent import AsyncBaseAgent
+from agents.patterns.pattern_pipeline import OUTPUT_CHANNELS, PATTERN_FIELDS
+from core.config import settings
+from core.shm_queue import SharedMemoryQueue
+from core.transaction import Transaction
+from core.wallet_store import WalletStore
+
+# seq, timestamp_ns (-1 if unknown), value, then the byte lengths of
+# wallet_address, token_address and transaction_type
+_HEADER = struct.Struct("<QqdHHH")
+
+
+def shard_for(wallet_address, shards):
+    """Stable shard index for a wallet (unlike hash(), identical across processes and runs)."""
+    return zlib.crc32(wallet_address.encode()) % shards
+
+
+def _encode(seq, transaction):
+    wallet = transaction.wallet_address.encode()
+    token = (transaction.token_address or '').encode()
+    tx_type = (transaction.transaction_type or '').encode()
+    timestamp_ns = -1 if transaction.timestamp_ns is None else transaction.timestamp_ns
+    header = _HEADER.pack(seq, timestamp_ns, transaction.value, len(wallet), len(token), len(tx_type))
+    return header + wallet + token + tx_type
+
+
+def _decode(record):
+    seq, timestamp_ns, value, wallet_len, token_len, type_len = _HEADER.unpack_from(record)
+    offset = _HEADER.size
+    wallet = record[offset:offset + wallet_len].decode()
+    offset += wallet_len
+    token = record[offset:offset + token_len].decode()
+    offset += token_len
+    tx_type = record[offset:offset + type_len].decode()
+    return seq, Transaction(
+        timestamp_ns=None if timestamp_ns < 0 else timestamp_ns,
+        value=value,
+        token_address=token or None,
+        wallet_address=wallet,
+        transaction_type=tx_type or None,
+    )
+
+
+async def _run_shard(shard_id, inbox, results, batch_size, max_bytes):
+    # Imported here so the parent only needs the pattern agents when sharding is in use
+    from agents.patterns.pattern_pipeline import PatternPipeline
+
+    # One wallet store per shard, fed by the pipeline rather than from a channel
+    store = WalletStore(f"WalletStore-{shard_id}", max_bytes=max_bytes)
+    pipeline = PatternPipeline(f"-{shard_id}", wallet_store=store)
+
+    while True:
+        record = inbox.get()
+        batch = []
+        while record:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                break
+            record = inbox.get(timeout=0)
+
+        output = []
+        for item in batch:
+            seq, transaction = _decode(item)
+            emitted = await pipeline.process(transaction)
+            if emitted:
+                output.append((seq, emitted))
+        if batch:
+            # One message per batch acknowledges every seq up to the last one,
+            # and carries the shard's wallet store stats for the metrics
+            results.put((shard_id, _decode(batch[-1])[0], output, store.stats()))
+        if record == b"":
+            return
+
+
+def _shard_worker(shard_id, inbox, results, batch_size, max_bytes):
+    asyncio.run(_run_shard(shard_id, inbox, results, batch_size, max_bytes))
+
+
+class ShardedPatternAgent(AsyncBaseAgent):
+    """
+    Runs WalletBehaviorAgent, TradingVolumeAgent and SmartPositionAgent in N
+    worker processes, each owning the state of the wallets hashed to it.
+
+    Transactions from RangeValidationChannel are numbered, packed into a
+    per-shard shared-memory queue and processed by the worker for their wallet.
+    Workers report the patterns found per batch; this agent re-attaches them to
+    the original messages and publishes to PatternChannel, VolumePatternChannel
+    and PositionPatternChannel strictly in input order, regardless of how shards
+    interleave. Each worker shares one WalletStore between its three agents and
+    analyses every transaction right after ingesting it, which is what the
+    single-process agents do as long as they keep up with the feed.
+    Records too large for a queue slot (e.g. an absurdly long wallet or token
+    string) are logged and counted in `oversize` instead of being sharded.
+    """
+
+    input_channel = "RangeValidationChannel"
+
+    def __init__(self, name, message_bus, shards=None, batch_size=256):
+        super().__init__(name, message_bus)
+        self.shards = shards or settings.PATTERN_SHARDS
+        ctx = multiprocessing.get_context("spawn")
+        self._inboxes = [SharedMemoryQueue(ctx=ctx) for _ in range(self.shards)]
+        self._results = ctx.Queue()
+        # The wallet state budget is split evenly: each shard holds 1/N of the wallets
+        max_bytes = settings.WALLET_STORE_MAX_BYTES // self.shards
+        self._workers = [
+            ctx.Process(
+                target=_shard_worker,
+                args=(shard_id, self._inboxes[shard_id], self._results, batch_size, max_bytes),
+                name=f"{name}-{shard_id}",
+                daemon=True,
+            )
+            for shard_id in range(self.shards)
+        ]
+        self._seq = 0
+        self._pending = deque()                 # (seq, shard, message) in input order
+        self._acked = [-1] * self.shards        # Highest seq each shard has finished
+        self._found = {}                        # seq -> {channel: pattern fields}
+        self._store_stats = {}                  # shard -> its wallet store's latest stats()
+        self.oversize = 0
+
+    async def run(self):
+        for worker in self._workers:
+            worker.start()
+        collector = asyncio.create_task(self._collect())
+        try:
+            await super().run()
+        finally:
+            collector.cancel()
+            self.close()
+
+    async def handle(self, msg):
+        if msg.wallet_address is None:
+            return
+        seq = self._seq
+        shard = shard_for(msg.wallet_address, self.shards)
+        record = _encode(seq, msg)
+        if len(record) > self._inboxes[shard].max_record_size:
+            # Never queued, so it must not hold up the ordered output either
+            self.oversize += 1
+            self.logger.warning(f"[{self.name}] Skipped {msg.transaction_hash}: {len(record)}-byte record "
+                                f"does not fit a shard queue slot.")
+            return
+        self._seq += 1
+        self._pending.append((seq, shard, msg))
+        if not self._inboxes[shard].put(record, timeout=0):
+            # Shard is backed up: wait for space off the event loop
+            loop = asyncio.get_running_loop()
+            while not await loop.run_in_executor(None, self._inboxes[shard].put, record, 0.5):
+                pass
+
+    def _next_result(self):
+        # Bounded wait so the executor thread never outlives the event loop
+        try:
+            return self._results.get(timeout=0.5)
+        except queue.Empty:
+            return None
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            result = await loop.run_in_executor(None, self._next_result)
+            if result is None:
+                continue
+            shard, last_seq, output, store_stats = result
+            self._acked[shard] = last_seq
+            self._store_stats[shard] = store_stats
+            self._found.update(output)
+            await self._publish_completed()
+
+    async def _publish_completed(self):
+        while self._pending:
+            seq, shard, msg = self._pending[0]
+            if self._acked[shard] < seq:
+                break
+            self._pending.popleft()
+            emitted = self._found.pop(seq, None)
+            if not emitted:
+                continue
+            for channel in OUTPUT_CHANNELS:
+                if channel in emitted:
+                    fields = emitted[channel]
+                    self.count_patterns(channel, fields.get(PATTERN_FIELDS[channel], ()))
+                    await self.send(channel, msg.with_patterns(**fields))
+
+    def stats(self):
+        # Workers own the wallet stores; report the stats each sent with its latest batch
+        return {**super().stats(), 'oversize': self.oversize,
+                'wallet_stores': {f"WalletStore-{shard}": stats for shard, stats in sorted(self._store_stats.items())}}
+
+    def close(self):
+        for inbox in self._inboxes:
+            inbox.put(b"", timeout=1.0)
+        for worker in self._workers:
+            worker.join(timeout=2.0)
+            if worker.is_alive():
+                worker.terminate()
+        for inbox in self._inboxes:
+            inbox.close()
@@ -1,61 +1,50 @@
-import logging
-import time
-from collections import defaultdict
-from datetime import datetime, timedelta
-from agents.base.agent import BaseAgent
+from agents.base.agent import AsyncBaseAgent
+from core.wallet_store import WalletStore
 
 
-class TradingVolumeAgent(BaseAgent):
+class TradingVolumeAgent(AsyncBaseAgent):
     """
     Focuses solely on analyzing trading volume patterns for individual wallets.
     This agent tracks volume-based behaviors like high-frequency trading and
     large position changes.
     """
 
-    def __init__(self, name, message_bus):
+    input_channel = "RangeValidationChannel"
+
+    def __init__(self, name, message_bus, wallet_store=None):
         super().__init__(name, message_bus)
-        self.logger = logging.getLogger(self.name)
-        self.wallet_history = defaultdict(list)
         self.analysis_window = 3600  # 1 hour
-
-    def start(self):
-        self.logger.info(f"[{self.name}] TradingVolumeAgent starting.")
-        while True:
-            messages = self.message_bus.get_messages("RangeValidationChannel")
-            if messages:
-                for msg in messages:
-                    self._update_history(msg)
-                    patterns = self._analyze_volume_patterns(msg['wallet_address'])
-                    if patterns:
-                        msg['volume_patterns'] = patterns
-                        self.message_bus.send_message("VolumePatternChannel", msg)
-            time.sleep(1)
-
-    def _update_history(self, transaction):
-        wallet = transaction['wallet_address']
-        current_time = datetime.now()
-        self.wallet_history[wallet].append({
-            'timestamp': current_time,
-            'value': transaction['value']
-        })
-
-        # Keep only recent transactions
-        cutoff_time = current_time - timedelta(seconds=self.analysis_window)
-        self.wallet_history[wallet] = [
-            tx for tx in self.wallet_history[wallet]
-            if tx['timestamp'] > cutoff_time
-        ]
+        # Wallet history, shared with the other pattern agents when main.py passes
+        # a store; otherwise a private one fed from this agent's input channel
+        if wallet_store is None:
+            wallet_store = WalletStore(f"{name}.wallets")
+            wallet_store.attach(message_bus, self.input_channel)
+        self.wallet_store = wallet_store
+        self.wallet_store.register_window(self.analysis_window)
+
+    def stats(self):
+        return {**super().stats(), 'wallet_stores': {self.wallet_store.name: self.wallet_store.stats()}}
+
+    async def handle(self, msg):
+        if msg.wallet_address is None:
+            return
+        with self.wallet_store.lock:
+            # Make sure the store has ingested this transaction before reading it
+            self.wallet_store.sync(until=msg)
+            patterns = self._analyze_volume_patterns(msg.wallet_address)
+        if patterns:
+            await self.emit_patterns("VolumePatternChannel", msg, volume_patterns=patterns)
 
     def _analyze_volume_patterns(self, wallet_address):
         patterns = []
-        history = self.wallet_history[wallet_address]
+        history = self.wallet_store.window(wallet_address, self.analysis_window)
 
         if len(history) < 3:  # Need minimum data points
             return patterns
 
-        # Calculate volume metrics
-        total_volume = sum(tx['value'] for tx in history)
-        avg_volume = total_volume / len(history)
+        # Volume metrics are maintained incrementally by the window
+        total_volume = history.total
+        avg_volume = history.mean_value
 
         # High frequency pattern detection
         if self._is_high_frequency(history):
@@ -76,7 +65,7 @@ class TradingVolumeAgent(BaseAgent):
                 'confidence': self._calculate_volume_confidence(history),
                 'metrics': {
                     'volume_increase': self._calculate_volume_increase(history),
-                    'peak_volume': max(tx['value'] for tx in history)
+                    'peak_volume': history.max_value
                 }
             })
 
@@ -86,19 +75,11 @@ class TradingVolumeAgent(BaseAgent):
         if len(history) < 5:
             return False
 
-        # Calculate average time between transactions
-        timestamps = [tx['timestamp'] for tx in history]
-        time_diffs = [
-            (timestamps[i] - timestamps[i - 1]).total_seconds()
-            for i in range(1, len(timestamps))
-        ]
-        avg_time_between = sum(time_diffs) / len(time_diffs)
-
-        return avg_time_between < 60  # Less than 1 minute between trades
+        # Average time between transactions
+        return history.mean_interval < 60  # Less than 1 minute between trades
 
     def _is_large_volume(self, history, avg_volume):
-        recent_transactions = history[-3:]  # Look at last 3 transactions
-        recent_volume = sum(tx['value'] for tx in recent_transactions)
+        recent_volume = history.recent_total(3)  # Look at last 3 transactions
 
         return recent_volume > (avg_volume * 3)  # 3x average volume
 
@@ -106,15 +87,12 @@ class TradingVolumeAgent(BaseAgent):
         if len(history) < 5:
             return 0.5
 
-        timestamps = [tx['timestamp'] for tx in history]
-        time_diffs = [
-            (timestamps[i] - timestamps[i - 1]).total_seconds()
-            for i in range(1, len(timestamps))
-        ]
-        avg_time = sum(time_diffs) / len(time_diffs)
-
         # Higher confidence for more consistent time intervals
-        consistency = 1 - (max(time_diffs) - min(time_diffs)) / max(time_diffs)
+        max_interval = history.max_interval
+        if max_interval <= 0:
+            consistency = 1.0  # All transactions at the same instant
+        else:
+            consistency = 1 - (max_interval - history.min_interval) / max_interval
         base_confidence = 0.7 + (consistency * 0.3)
 
         return min(base_confidence, 0.95)  # Cap at 0.95
@@ -123,11 +101,9 @@ class TradingVolumeAgent(BaseAgent):
         if len(history) < 3:
             return 0.5
 
-        volumes = [tx['value'] for tx in history]
-        avg_volume = sum(volumes) / len(volumes)
-
         # Higher confidence for consistent volume increases
-        volume_consistency = 1 - (max(volumes) - min(volumes)) / max(volumes)
+        max_volume = history.max_value
+        volume_consistency = 1 - (max_volume - history.min_value) / max_volume
         base_confidence = 0.7 + (volume_consistency * 0.3)
 
         return min(base_confidence, 0.95)  # Cap at 0.95
@@ -136,7 +112,7 @@ class TradingVolumeAgent(BaseAgent):
         if len(history) < 2:
             return 0
 
-        initial_volume = history[0]['value']
-        final_volume = history[-1]['value']
+        initial_volume = history.first[1]
+        final_volume = history.last[1]
 
-        return (final_volume - initial_volume) / initial_volume if initial_volume > 0 else 0
\ No newline at end of file
+        return (final_volume - initial_volume) / initial_volume if initial_volume > 0 else 0
@@ -1,61 +1,43 @@
-import logging
-import time
-from collections import defaultdict
-from datetime import datetime, timedelta
-from agents.base.agent import BaseAgent
+from agents.base.agent import AsyncBaseAgent
+from core.wallet_store import WalletStore
 
 
-class WalletBehaviorAgent(BaseAgent):
+class WalletBehaviorAgent(AsyncBaseAgent):
     """
     Specialized agent that analyzes wallet behavior patterns in token transactions.
     This agent tracks how wallets interact with tokens over time to identify
     significant patterns like accumulation, distribution, or wash trading.
     """
 
-    def __init__(self, name, message_bus):
+    input_channel = "RangeValidationChannel"
+
+    def __init__(self, name, message_bus, wallet_store=None):
         super().__init__(name, message_bus)
-        self.logger = logging.getLogger(self.name)
-        # Track wallet activities over time
-        self.wallet_history = defaultdict(list)
         # Time window for pattern analysis (in seconds)
         self.analysis_window = 3600  # 1 hour
-
-    def start(self):
-        self.logger.info(f"[{self.name}] WalletBehaviorAgent starting.")
-        while True:
-            # Get messages that passed range validation
-            messages = self.message_bus.get_messages("RangeValidationChannel")
-            if messages:
-                for msg in messages:
-                    self._update_wallet_history(msg)
-                    patterns = self._analyze_wallet_patterns(msg['wallet_address'])
-                    if patterns:
-                        # Add pattern information to the transaction
-                        msg['detected_patterns'] = patterns
-                        self.message_bus.send_message("PatternChannel", msg)
-            time.sleep(1)
-
-    def _update_wallet_history(self, transaction):
-        """
-        Updates the history of wallet activities, maintaining a time-windowed record
-        of transactions for each wallet.
-        """
-        wallet = transaction['wallet_address']
-        current_time = datetime.now()
-
-        # Add new transaction to wallet history
-        self.wallet_history[wallet].append({
-            'timestamp': current_time,
-            'value': transaction['value'],
-            'type': transaction.get('transaction_type', 'unknown')
-        })
-
-        # Remove old transactions outside our analysis window
-        cutoff_time = current_time - timedelta(seconds=self.analysis_window)
-        self.wallet_history[wallet] = [
-            tx for tx in self.wallet_history[wallet]
-            if tx['timestamp'] > cutoff_time
-        ]
+        # Wallet history, shared with the other pattern agents when main.py passes
+        # a store; otherwise a private one fed from this agent's input channel
+        if wallet_store is None:
+            wallet_store = WalletStore(f"{name}.wallets")
+            wallet_store.attach(message_bus, self.input_channel)
+        self.wallet_store = wallet_store
+        self.wallet_store.register_window(self.analysis_window)
+
+    def stats(self):
+        return {**super().stats(), 'wallet_stores': {self.wallet_store.name: self.wallet_store.stats()}}
+
+    async def handle(self, msg):
+        # Receives transactions that passed range validation
+        if msg.wallet_address is None:
+            return
+        with self.wallet_store.lock:
+            # Make sure the store has ingested this transaction before reading it
+            self.wallet_store.sync(until=msg)
+            patterns = self._analyze_wallet_patterns(msg.wallet_address)
+        if patterns:
+            # Add pattern information to a copy of the transaction; the
+            # original is shared with every other subscriber of the channel
+            await self.emit_patterns("PatternChannel", msg, detected_patterns=patterns)
 
     def _analyze_wallet_patterns(self, wallet_address):
         """
@@ -63,15 +45,15 @@ class WalletBehaviorAgent(BaseAgent):
         Returns a list of detected patterns with their confidence levels.
         """
         patterns = []
-        history = self.wallet_history[wallet_address]
+        history = self.wallet_store.window(wallet_address, self.analysis_window)
 
         if not history:
             return patterns
 
-        # Calculate key metrics
+        # Key metrics are maintained incrementally by the window
         transaction_count = len(history)
-        total_value = sum(tx['value'] for tx in history)
-        avg_value = total_value / transaction_count if transaction_count > 0 else 0
+        total_value = history.total
+        avg_value = history.mean_value
 
         # Pattern: High Frequency Trading
         if self._detect_high_frequency(history):
@@ -112,15 +94,8 @@ class WalletBehaviorAgent(BaseAgent):
         if len(history) < 5:
             return False
 
-        # Calculate average time between transactions
-        timestamps = [tx['timestamp'] for tx in history]
-        time_diffs = []
-        for i in range(1, len(timestamps)):
-            diff = (timestamps[i] - timestamps[i - 1]).total_seconds()
-            time_diffs.append(diff)
-
-        avg_time_between = sum(time_diffs) / len(time_diffs)
-        return avg_time_between < 60  # Less than 1 minute between trades
+        # Average time between transactions
+        return history.mean_interval < 60  # Less than 1 minute between trades
 
     def _detect_accumulation(self, history):
         """Detects if wallet is accumulating a position."""
@@ -128,10 +103,7 @@ class WalletBehaviorAgent(BaseAgent):
             return False
 
         # Look for increasing position size
-        buy_count = sum(1 for tx in history if tx.get('type') == 'buy')
-        total_transactions = len(history)
-
-        return buy_count / total_transactions > 0.8  # 80% of transactions are buys
+        return history.buys / len(history) > 0.8  # 80% of transactions are buys
 
     def _detect_distribution(self, history):
         """Detects if wallet is distributing tokens."""
@@ -139,7 +111,4 @@ class WalletBehaviorAgent(BaseAgent):
             return False
 
         # Look for multiple small sell transactions
-        sell_count = sum(1 for tx in history if tx.get('type') == 'sell')
-        total_transactions = len(history)
-
-        return sell_count / total_transactions > 0.8  # 80% of transactions are sells
\ No newline at end of file
+        return history.sells / len(history) > 0.8  # 80% of transactions are sells
@@ -0,0 +1,67 @@
+# agents/patterns/pattern_pipeline.py
+from agents.patterns.WalletBehaviorAgent import WalletBehaviorAgent
+from agents.patterns.TradingVolumeAgent import TradingVolumeAgent
+from agents.patterns.SmartPositionAgent import SmartPositionAgent
+from core.wallet_store import WalletStore
+
+# Channels the pattern agents publish detections to
+OUTPUT_CHANNELS = ("PatternChannel", "VolumePatternChannel", "PositionPatternChannel")
+# The pattern field each output channel adds; copies also carry the fields added upstream
+PATTERN_FIELDS = {
+    "PatternChannel": "detected_patterns",
+    "VolumePatternChannel": "volume_patterns",
+    "PositionPatternChannel": "position_patterns",
+}
+
+
+class _RecordingBus:
+    """
+    Stand-in MessageBus for a PatternPipeline. Records the pattern fields each
+    agent emits for the current transaction and forwards VolumePatternChannel
+    output to the SmartPositionAgent, mirroring the channel wiring in main.py.
+    """
+
+    def __init__(self):
+        self.emitted = {}
+        self.routes = {}
+
+    def subscribe(self, agent_name, subscriber, critical=True):
+        pass
+
+    async def send_message_async(self, recipient, message, value=None):
+        self.emitted[recipient] = message.patterns
+        route = self.routes.get(recipient)
+        if route is not None:
+            await route(message)
+        return True
+
+
+class PatternPipeline:
+    """
+    WalletBehaviorAgent, TradingVolumeAgent and SmartPositionAgent driven one
+    transaction at a time instead of through channels: each transaction is
+    ingested into the shared WalletStore and then analysed by every agent
+    before the next one, so the output depends only on the input sequence.
+    Used by the ShardedPatternAgent workers and by replay.py.
+    """
+
+    def __init__(self, suffix="", wallet_store=None):
+        self.bus = _RecordingBus()
+        self.store = wallet_store if wallet_store is not None else WalletStore(f"WalletStore{suffix}")
+        self.agents = (
+            WalletBehaviorAgent(f"WalletBehaviorAgent{suffix}", self.bus, wallet_store=self.store),
+            TradingVolumeAgent(f"TradingVolumeAgent{suffix}", self.bus, wallet_store=self.store),
+        )
+        self.position_agent = SmartPositionAgent(f"SmartPositionAgent{suffix}", self.bus, wallet_store=self.store)
+        self.bus.routes["VolumePatternChannel"] = self.position_agent.handle
+
+    async def process(self, transaction):
+        """Ingest and analyse one transaction; returns {channel: pattern fields} it produced."""
+        self.store.ingest(transaction)
+        self.bus.emitted = {}
+        for agent in self.agents:
+            try:
+                await agent.handle(transaction)
+            except Exception as e:
+                agent.logger.error(f"[{agent.name}] Error handling message: {e}", exc_info=True)
+        return self.bus.emitted
@@ -1,31 +1,20 @@
-import logging
-import time
 from decimal import Decimal
-from datetime import datetime
-from agents.base.agent import BaseAgent
+from agents.base.agent import AsyncBaseAgent
 
 
-class TypeValidationAgent(BaseAgent):
+class TypeValidationAgent(AsyncBaseAgent):
     """
     Specialized agent focused on deep type validation of transaction data.
     This agent ensures all data fields not only exist but contain valid,
     properly formatted values appropriate for their intended use.
     """
 
-    def __init__(self, name, message_bus):
-        super().__init__(name, message_bus)
-        self.logger = logging.getLogger(self.name)
-
-    def start(self):
-        self.logger.info(f"[{self.name}] TypeValidationAgent starting.")
-        while True:
-            # Receive messages that passed integrity validation
-            messages = self.message_bus.get_messages("IntegrityChannel")
-            if messages:
-                for msg in messages:
-                    if self._validate_types(msg):
-                        self.message_bus.send_message("TypeValidationChannel", msg)
-            time.sleep(1)
+    input_channel = "IntegrityChannel"
+
+    async def handle(self, msg):
+        # Receives messages that passed integrity validation
+        if self._validate_types(msg):
+            await self.send("TypeValidationChannel", msg)
 
     def _validate_types(self, transaction):
         """
@@ -33,29 +22,17 @@ class TypeValidationAgent(BaseAgent):
         Each field is checked against its expected format and value range.
         """
         try:
-            # Validate timestamp
-            timestamp = transaction['timestamp']
-            if isinstance(timestamp, str):
-                try:
-                    # Convert string timestamp to datetime
-                    datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                except ValueError:
-                    self.logger.warning(f"Invalid timestamp format: {timestamp}")
-                    return False
-            elif isinstance(timestamp, (int, float)):
-                try:
-                    # Check if timestamp is a valid epoch
-                    datetime.fromtimestamp(timestamp)
-                except ValueError:
-                    self.logger.warning(f"Invalid timestamp value: {timestamp}")
-                    return False
+            # Validate timestamp; it was parsed to epoch-ns once at ingestion
+            if transaction.timestamp_ns is None:
+                self.logger.warning("Invalid timestamp: not a valid ISO-8601 string or epoch")
+                return False
 
             # Validate token address
-            if not self._is_valid_address(transaction['token_address']):
+            if not self._is_valid_address(transaction.token_address):
                 return False
 
             # Validate transaction value
-            if not self._is_valid_numeric(transaction['value']):
+            if not self._is_valid_numeric(transaction.value):
                 return False
 
             return True
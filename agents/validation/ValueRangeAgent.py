@@ -1,38 +1,36 @@
-import logging
 import time
 from decimal import Decimal
-from datetime import datetime, timedelta
-from agents.base.agent import BaseAgent
+from datetime import datetime
+from agents.base.agent import AsyncBaseAgent
+from core.transaction import NS_PER_SECOND
 
+# Baseline thresholds for the range checks, shared with the fused validator
+DEFAULT_THRESHOLDS = {
+    'min_transaction_value': 0.000001,  # Minimum meaningful transaction
+    'max_transaction_value': 1000000000,  # Upper limit for single transaction
+    'max_time_future': 300,  # Maximum seconds into future for timestamps
+    'max_time_past': 86400,  # Maximum seconds into past (24 hours)
+}
 
-class ValueRangeAgent(BaseAgent):
+
+class ValueRangeAgent(AsyncBaseAgent):
     """
     Specialized agent that validates if transaction values fall within
     expected ranges and patterns. This helps identify unusual or potentially
     problematic transactions early in the processing pipeline.
     """
 
+    input_channel = "TypeValidationChannel"
+
     def __init__(self, name, message_bus):
         super().__init__(name, message_bus)
-        self.logger = logging.getLogger(self.name)
         # Define baseline thresholds for different validation checks
-        self.thresholds = {
-            'min_transaction_value': 0.000001,  # Minimum meaningful transaction
-            'max_transaction_value': 1000000000,  # Upper limit for single transaction
-            'max_time_future': 300,  # Maximum seconds into future for timestamps
-            'max_time_past': 86400,  # Maximum seconds into past (24 hours)
-        }
-
-    def start(self):
-        self.logger.info(f"[{self.name}] ValueRangeAgent starting.")
-        while True:
-            # Get messages that passed type validation
-            messages = self.message_bus.get_messages("TypeValidationChannel")
-            if messages:
-                for msg in messages:
-                    if self._validate_ranges(msg):
-                        self.message_bus.send_message("RangeValidationChannel", msg)
-            time.sleep(1)
+        self.thresholds = dict(DEFAULT_THRESHOLDS)
+
+    async def handle(self, msg):
+        # Receives messages that passed type validation
+        if self._validate_ranges(msg):
+            await self.send("RangeValidationChannel", msg)
 
     def _validate_ranges(self, transaction):
         """
@@ -40,11 +38,11 @@ class ValueRangeAgent(BaseAgent):
         """
         try:
             # Validate transaction value range
-            if not self._check_value_range(transaction['value']):
+            if not self._check_value_range(transaction.value):
                 return False
 
             # Validate timestamp is within reasonable range
-            if not self._check_timestamp_range(transaction['timestamp']):
+            if not self._check_timestamp_range(transaction.timestamp_ns):
                 return False
 
             # Add any additional range checks specific to your needs
@@ -76,28 +74,22 @@ class ValueRangeAgent(BaseAgent):
             self.logger.error(f"Value range check failed: {e}")
             return False
 
-    def _check_timestamp_range(self, timestamp) -> bool:
+    def _check_timestamp_range(self, timestamp_ns: int) -> bool:
         """
-        Validates if a timestamp is within a reasonable range.
+        Validates if an epoch-ns timestamp is within a reasonable range.
         Prevents processing of transactions too far in the past or future.
         """
         try:
-            # Convert timestamp to datetime if it's numeric
-            if isinstance(timestamp, (int, float)):
-                timestamp = datetime.fromtimestamp(timestamp)
-            elif isinstance(timestamp, str):
-                timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-
-            current_time = datetime.now()
+            current_ns = time.time_ns()
 
             # Check if timestamp is too far in the future
-            if timestamp > current_time + timedelta(seconds=self.thresholds['max_time_future']):
-                self.logger.warning(f"Timestamp too far in future: {timestamp}")
+            if timestamp_ns > current_ns + self.thresholds['max_time_future'] * NS_PER_SECOND:
+                self.logger.warning(f"Timestamp too far in future: {datetime.fromtimestamp(timestamp_ns / NS_PER_SECOND)}")
                 return False
 
             # Check if timestamp is too far in the past
-            if timestamp < current_time - timedelta(seconds=self.thresholds['max_time_past']):
-                self.logger.warning(f"Timestamp too far in past: {timestamp}")
+            if timestamp_ns < current_ns - self.thresholds['max_time_past'] * NS_PER_SECOND:
+                self.logger.warning(f"Timestamp too far in past: {datetime.fromtimestamp(timestamp_ns / NS_PER_SECOND)}")
                 return False
 
             return True
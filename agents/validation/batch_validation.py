@@ -0,0 +1,121 @@
+import time
+from decimal import Decimal
+from agents.validation.FusedValidationAgent import Rejection
+from agents.validation.ValueRangeAgent import DEFAULT_THRESHOLDS
+from core.transaction import NS_PER_SECOND
+
+try:
+    import numpy as np
+except ImportError:  # Batch validation is optional; the per-message validator needs no numpy
+    np = None
+
+# Reason codes returned by the batch validator, in rule order. Code 0 means valid;
+# the first failing rule of the fused validator determines a transaction's code.
+REJECTIONS = (
+    None,
+    Rejection("integrity", "timestamp", "missing"),
+    Rejection("integrity", "token_address", "missing"),
+    Rejection("integrity", "value", "missing"),
+    Rejection("integrity", "transaction_hash", "missing"),
+    Rejection("type", "token_address", "bad_length"),
+    Rejection("type", "token_address", "bad_prefix"),
+    Rejection("type", "value", "not_numeric"),
+    Rejection("type", "value", "negative"),
+    Rejection("range", "value", "too_small"),
+    Rejection("range", "value", "too_large"),
+    Rejection("range", "timestamp", "too_far_future"),
+    Rejection("range", "timestamp", "too_far_past"),
+)
+
+PREFIX_OTHER, PREFIX_HEX, PREFIX_SOL = 0, 1, 2
+_MISSING_TS = -(2 ** 63)
+# Timestamps parse_timestamp_ns accepts can lie beyond int64 (past year 2262);
+# they are clamped to these, which fail the future and past checks respectively
+_MAX_TS = 2 ** 63 - 1
+_MIN_TS = _MISSING_TS + 1
+
+
+def batch_available():
+    return np is not None
+
+
+def to_columns(transactions):
+    """
+    Flatten a micro-batch of Transactions into the column arrays the batch
+    validator works on. This is the only per-transaction Python loop.
+    """
+    timestamps, values, missing, numeric, address_lengths, prefixes, hashes = [], [], [], [], [], [], []
+    for tx in transactions:
+        timestamps.append(_MISSING_TS if tx.timestamp_ns is None else tx.timestamp_ns)
+        value = tx.value
+        is_numeric = isinstance(value, (int, float, Decimal))
+        missing.append(value is None)
+        numeric.append(is_numeric or value is None)
+        values.append(float(value) if is_numeric else 0.0)
+        address = tx.token_address
+        if address is None:
+            address_lengths.append(-1)
+            prefixes.append(PREFIX_OTHER)
+        else:
+            address_lengths.append(len(address))
+            prefixes.append(PREFIX_HEX if address.startswith('0x')
+                            else PREFIX_SOL if address.startswith('sol:') else PREFIX_OTHER)
+        hashes.append(tx.transaction_hash is not None)
+    try:
+        timestamp_column = np.array(timestamps, dtype=np.int64)
+    except OverflowError:
+        timestamp_column = np.array([ts if ts == _MISSING_TS else min(max(ts, _MIN_TS), _MAX_TS)
+                                     for ts in timestamps], dtype=np.int64)
+    return {
+        'timestamp_ns': timestamp_column,
+        'value': np.array(values, dtype=np.float64),
+        'value_missing': np.array(missing, dtype=bool),
+        'value_numeric': np.array(numeric, dtype=bool),
+        'address_length': np.array(address_lengths, dtype=np.int32),
+        'address_prefix': np.array(prefixes, dtype=np.int8),
+        'has_hash': np.array(hashes, dtype=bool),
+    }
+
+
+def build_batch_validator(thresholds=None, clock=time.time_ns):
+    """
+    Vectorized counterpart of build_validator(). The returned function takes the
+    columns from to_columns() and returns (mask, codes): a boolean array that is
+    True for valid rows and a uint8 array indexing REJECTIONS. Every rule is one
+    NumPy comparison over the whole batch; rules are applied last-to-first so the
+    earliest failing rule wins, exactly as in the per-message validator.
+    """
+    if np is None:
+        raise RuntimeError("Batch validation requires numpy")
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    min_value = thresholds['min_transaction_value']
+    max_value = thresholds['max_transaction_value']
+    max_future_ns = int(thresholds['max_time_future'] * NS_PER_SECOND)
+    max_past_ns = int(thresholds['max_time_past'] * NS_PER_SECOND)
+
+    def validate_batch(columns):
+        timestamps = columns['timestamp_ns']
+        values = columns['value']
+        lengths = columns['address_length']
+        prefixes = columns['address_prefix']
+        now_ns = clock()
+        rules = (
+            timestamps == _MISSING_TS,
+            lengths < 0,
+            columns['value_missing'],
+            ~columns['has_hash'],
+            (prefixes == PREFIX_HEX) & (lengths != 42),
+            prefixes == PREFIX_OTHER,
+            ~columns['value_numeric'],
+            values < 0,
+            values < min_value,
+            values > max_value,
+            timestamps > now_ns + max_future_ns,
+            timestamps < now_ns - max_past_ns,
+        )
+        codes = np.zeros(len(timestamps), dtype=np.uint8)
+        for code in range(len(rules), 0, -1):
+            codes[rules[code - 1]] = code
+        return codes == 0, codes
+
+    return validate_batch
@@ -1,47 +1,28 @@
-import logging
-import time
-from agents.base.agent import BaseAgent
+from agents.base.agent import AsyncBaseAgent
 
 
-class DataIntegrityAgent(BaseAgent):
+class DataIntegrityAgent(AsyncBaseAgent):
     """
     Specialized agent that focuses solely on checking data structure integrity.
     Validates that all required fields are present and properly formatted.
     """
 
-    def __init__(self, name, message_bus):
-        super().__init__(name, message_bus)
-        self.logger = logging.getLogger(self.name)
+    input_channel = "RawDataChannel"
 
-    def start(self):
-        self.logger.info(f"[{self.name}] DataIntegrityAgent starting.")
-        while True:
-            messages = self.message_bus.get_messages("RawDataChannel")
-            if messages:
-                for msg in messages:
-                    if self._check_data_integrity(msg):
-                        self.message_bus.send_message("IntegrityChannel", msg)
-            time.sleep(1)
+    async def handle(self, msg):
+        if self._check_data_integrity(msg):
+            await self.send("IntegrityChannel", msg)
 
     def _check_data_integrity(self, transaction):
         """Check if transaction data has all required fields with correct structure."""
         try:
-            required_structure = {
-                'timestamp': (str, int, float),  # Accepts multiple possible types
-                'token_address': str,
-                'value': (int, float),
-                'transaction_hash': str
-            }
-
-            # Check all required fields exist and have correct type
-            for field, expected_type in required_structure.items():
-                if field not in transaction:
-                    self.logger.warning(f"Missing required field: {field}")
-                    return False
+            # Transaction.from_dict leaves a field as None when the payload omitted it
+            # or sent the wrong type (timestamp: str/int/float, value: int/float, rest: str)
+            required_fields = ('timestamp_ns', 'token_address', 'value', 'transaction_hash')
 
-                if not isinstance(transaction[field], expected_type):
-                    self.logger.warning(
-                        f"Invalid type for {field}: expected {expected_type}, got {type(transaction[field])}")
+            for field in required_fields:
+                if getattr(transaction, field) is None:
+                    self.logger.warning(f"Missing or invalid required field: {field}")
                     return False
 
             return True
@@ -0,0 +1,162 @@
+# benchmarks/__main__.py
+"""
+Run the benchmarks and write the results as JSON.
+
+    python -m benchmarks micro --count 50000 --output micro.json
+    python -m benchmarks e2e --count 100000 --profile burst --set VALIDATION_MODE=chain
+    python -m benchmarks all --output new.json --compare baseline.json
+    python -m benchmarks ingest --count 200000 --disconnect-after 20000 --resend 100
+"""
+import argparse
+import contextlib
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+
+from core.config import settings
+from benchmarks.generator import PROFILES, SwapGenerator
+
+
+def _setting(assignment):
+    key, _, raw = assignment.partition('=')
+    if not hasattr(settings, key):
+        raise argparse.ArgumentTypeError(f"Unknown setting: {key}")
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        value = raw
+    return key, value
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _throughputs(results, prefix=""):
+    # Flatten every msgs_per_s in the results to {"path.to.stage": value}
+    found = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            found.update(_throughputs(value, f"{prefix}{key}."))
+        elif key == 'msgs_per_s' and value:
+            found[prefix.rstrip('.')] = value
+    return found
+
+
+def _failures(results, prefix=""):
+    # Flatten every count under a "failures" key to {"path.to.suite.reason": count}
+    found = {}
+    for key, value in results.items():
+        if key == 'failures' and isinstance(value, dict):
+            found.update({f"{prefix}{key}.{reason}": count for reason, count in value.items()})
+        elif isinstance(value, dict):
+            found.update(_failures(value, f"{prefix}{key}."))
+    return found
+
+
+def compare(results, baseline, tolerance):
+    """
+    Stages whose throughput fell more than `tolerance` (a fraction) below the
+    baseline, and failure counts (shed, timed out, undrained) above it.
+    """
+    current = _throughputs(results)
+    regressions = {}
+    for stage, before in _throughputs(baseline).items():
+        after = current.get(stage)
+        if after is not None and after < before * (1.0 - tolerance):
+            regressions[stage] = {'baseline': before, 'current': after,
+                                  'change': round(after / before - 1.0, 3)}
+    before_failures = _failures(baseline)
+    for stage, after in _failures(results).items():
+        before = before_failures.get(stage, 0)
+        if after > before:
+            regressions[stage] = {'baseline': before, 'current': after}
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.split('\n\n')[0])
+    parser.add_argument('suite', choices=('micro', 'e2e', 'ingest', 'all'))
+    parser.add_argument('--count', type=int, default=50000, help="swaps to generate")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--wallets', type=int, default=10000)
+    parser.add_argument('--tokens', type=int, default=1000)
+    parser.add_argument('--wallet-skew', type=float, default=1.1, help="Zipf exponent of wallet activity")
+    parser.add_argument('--token-skew', type=float, default=1.2, help="Zipf exponent of token popularity")
+    parser.add_argument('--rate', type=float, default=500.0, help="feed-time swaps per second")
+    parser.add_argument('--profile', choices=PROFILES, default="steady")
+    parser.add_argument('--invalid-ratio', type=float, default=0.02)
+    parser.add_argument('--stages', nargs='*', help="only run these microbenchmark stages")
+    parser.add_argument('--feed-rate', type=float, default=0.0,
+                        help="pace the end-to-end feed at this many frames per second (0 = as fast as possible)")
+    parser.add_argument('--disconnect-after', type=int, default=0,
+                        help="ingest: the mock feed drops each connection after this many frames")
+    parser.add_argument('--resend', type=int, default=0, help="ingest: swaps resent after each reconnect")
+    parser.add_argument('--malformed-ratio', type=float, default=0.0,
+                        help="ingest: share of swaps preceded by a truncated frame")
+    parser.add_argument('--codec', default="json", help="ingest: frame encoding of the mock feed")
+    parser.add_argument('--set', type=_setting, action='append', default=[], metavar="KEY=VALUE",
+                        help="override a setting for this run, e.g. VALIDATION_MODE=chain")
+    parser.add_argument('--output', help="write the results here as JSON (default: stdout only)")
+    parser.add_argument('--compare', help="baseline results file; exit 1 on throughput or failure regressions")
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help="fractional throughput drop tolerated before --compare fails")
+    parser.add_argument('--log-level', default='ERROR')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level, format="%(asctime)s [%(levelname)s] %(message)s")
+    for key, value in args.set:
+        setattr(settings, key, value)
+
+    # Timestamps end around now so the range validator accepts them
+    generator = SwapGenerator(
+        seed=args.seed, wallets=args.wallets, tokens=args.tokens, wallet_skew=args.wallet_skew,
+        token_skew=args.token_skew, rate=args.rate, profile=args.profile,
+        invalid_ratio=args.invalid_ratio, start=time.time() - args.count / args.rate)
+
+    report = {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'count': args.count,
+        'generator': generator.params(),
+        'settings': dict(args.set),
+    }
+    # Keep stdout for the results alone; anything the agents print goes to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.suite in ('micro', 'all'):
+            from benchmarks.micro import run_micro
+            report['micro'] = run_micro(generator, args.count, args.stages)
+        if args.suite in ('e2e', 'all'):
+            from benchmarks.end_to_end import run_end_to_end
+            report['end_to_end'] = run_end_to_end(generator, args.count, rate=args.feed_rate)
+        if args.suite in ('ingest', 'all'):
+            from benchmarks.ingest import run_ingest
+            report['ingest'] = run_ingest(generator, args.count, rate=args.feed_rate,
+                                          disconnect_after=args.disconnect_after, resend=args.resend,
+                                          malformed_ratio=args.malformed_ratio, codec=args.codec)
+
+    status = 0
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            report['regressions'] = compare(report, json.load(f), args.tolerance)
+        status = 1 if report['regressions'] else 0
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+# benchmarks/end_to_end.py
+import asyncio
+import json
+import sys
+import time
+
+from core.config import settings
+from core.latency import tracer
+from core.message_bus import MessageBus
+from agents.collection.cielo_agent import CieloAgent
+from agents.communication.alert_agent import AlertAgent
+from agents.communication.sinks import LogSink
+from agents.patterns.pattern_pipeline import OUTPUT_CHANNELS
+from benchmarks.micro import summarize
+from main import CHANNELS, build_agents
+
+try:
+    import resource
+except ImportError:     # Not available on Windows
+    resource = None
+
+# Channels whose deliveries are timed; a swap's latency on a channel runs from
+# the moment its frame is handed to CieloAgent until a sink reads it there
+MEASURED_CHANNELS = ("RangeValidationChannel", *OUTPUT_CHANNELS)
+_SINK = "Benchmark.sink"
+# Drops that mean the pipeline did not keep up. Overwrites are left out: the
+# drop_oldest channels (e.g. ProcessedDataChannel) only keep the newest deltas by design
+FAILURE_REASONS = ('shed', 'timeout')
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process so far, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+async def _sink(bus, channel, sent_ns, latencies):
+    clock = time.perf_counter_ns
+    while True:
+        messages = await bus.get_messages_async(channel, subscriber=_SINK)
+        now = clock()
+        for msg in messages:
+            sent = sent_ns.get(msg.transaction_hash)
+            if sent is not None:
+                latencies.append(now - sent)
+
+
+def _pending(bus):
+    # Unread messages across the subscribers of every channel
+    return sum(subscriber['pending'] for channel in bus.stats().values()
+               for subscriber in channel['subscribers'].values())
+
+
+async def _feed(cielo, frames, hashes, sent_ns, rate):
+    # Unpaced when rate is 0; otherwise frames are released in small batches on schedule
+    clock = time.perf_counter_ns
+    started = time.perf_counter()
+    for index, (frame, tx_hash) in enumerate(zip(frames, hashes)):
+        if rate:
+            delay = started + index / rate - time.perf_counter()
+            if delay > 0.001:
+                await asyncio.sleep(delay)
+        if tx_hash is not None:
+            sent_ns[tx_hash] = clock()
+        await cielo._handle_websocket_message(frame)
+        if not index % 64:
+            # Let the downstream agents run between batches of frames
+            await asyncio.sleep(0)
+
+
+async def _run(frames, hashes, rate, drain_timeout):
+    bus = MessageBus()
+    for channel in CHANNELS:
+        bus.register_agent(channel)
+    cielo = CieloAgent(name="CieloAgent", message_bus=bus)
+    cielo.frame_log = None      # Benchmark the pipeline, not the disk
+    agents = build_agents(bus)
+    for agent in agents:
+        if isinstance(agent, AlertAgent):
+            agent.sink = LogSink()     # Alerts are counted, not delivered
+    latencies = {channel: [] for channel in MEASURED_CHANNELS}
+    sent_ns = {}
+    for channel in MEASURED_CHANNELS:
+        bus.subscribe(channel, _SINK)
+
+    # Per-stage histograms for this run only, with any --set tracing overrides
+    tracer.reset()
+    tracer.enabled = settings.LATENCY_TRACING
+    tracer.max_per_second = settings.LATENCY_MAX_TRACES_PER_SECOND
+
+    tasks = [asyncio.create_task(agent.run(), name=agent.name) for agent in agents]
+    tasks += [asyncio.create_task(_sink(bus, channel, sent_ns, latencies[channel]))
+              for channel in MEASURED_CHANNELS]
+    try:
+        started = time.perf_counter()
+        await _feed(cielo, frames, hashes, sent_ns, rate)
+        fed = time.perf_counter()
+        # Wait until every agent has read everything sent to it
+        deadline = fed + drain_timeout
+        while _pending(bus) and time.perf_counter() < deadline:
+            await asyncio.sleep(0.001)
+        drained = time.perf_counter()
+        await asyncio.sleep(0)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    elapsed = drained - started
+    channel_stats = bus.stats()
+    pending = _pending(bus)
+    # Throughput counts swaps that made it through validation to the pattern
+    # stage, so shedding or dropping cannot make a run look faster
+    validated = len(latencies["RangeValidationChannel"])
+    failures = {reason: sum(stats['dropped'][reason] for stats in channel_stats.values())
+                for reason in FAILURE_REASONS}
+    failures['undrained'] = pending
+    return {
+        'count': len(frames),
+        'validated': validated,
+        'msgs_per_s': round(validated / elapsed, 1) if elapsed else None,
+        'feed_seconds': round(fed - started, 3),
+        'elapsed_seconds': round(elapsed, 3),
+        'drained': not pending,
+        'failures': failures,
+        'latency': {channel: summarize(values, elapsed) for channel, values in latencies.items()},
+        'dropped': {name: stats['dropped'] for name, stats in channel_stats.items()
+                    if any(stats['dropped'].values())},
+        'stages': tracer.snapshot(),
+        'peak_rss_bytes': peak_rss_bytes(),
+    }
+
+
+def run_end_to_end(generator, count, rate=0.0, drain_timeout=60.0):
+    """
+    Feed `count` generated frames through CieloAgent's message handler into the
+    agents main.py builds (as configured in settings), all on one event loop,
+    and report validated messages/s, per-channel latency, the latency tracer's
+    per-stage histograms and peak RSS. Swaps shed or timed out on a channel,
+    and messages still unread after `drain_timeout`, are counted under
+    `failures`, which --compare reports as regressions. With a
+    `rate` the frames are paced at that many per second instead of as fast as
+    possible, to measure latency below saturation.
+    """
+    payloads = list(generator.payloads(count))
+    hashes = [payload.get('transaction_hash') for payload in payloads]
+    frames = [json.dumps({'type': 'tx', 'data': payload}) for payload in payloads]
+    return asyncio.run(_run(frames, hashes, rate, drain_timeout))
@@ -0,0 +1,115 @@
+# benchmarks/generator.py
+import json
+import random
+import string
+import time
+from bisect import bisect_left
+from itertools import accumulate
+
+PROFILES = ("steady", "burst", "spike")
+
+
+def _zipf_sampler(rng, count, skew):
+    # Rank k (0-based) is drawn with probability proportional to 1 / (k + 1) ** skew
+    cumulative = list(accumulate(1.0 / (k + 1) ** skew for k in range(count)))
+    total = cumulative[-1]
+    return lambda: min(bisect_left(cumulative, rng.random() * total), count - 1)
+
+
+def _address(rng, prefix, length):
+    return prefix + ''.join(rng.choices(string.ascii_letters + string.digits, k=length))
+
+
+class SwapGenerator:
+    """
+    Seeded source of synthetic Solana swaps in the shape of the Cielo feed:
+    `frames()` yields the websocket text frames CieloAgent._handle_websocket_message
+    receives, `payloads()` just the swap dicts inside them. The same arguments
+    always produce the same stream.
+
+    Wallets and tokens are drawn from fixed populations with Zipf skew (a few
+    wallets and tokens account for most swaps), values from a log-normal
+    distribution. Timestamps advance from `start` at `rate` swaps per second
+    following `profile`:
+      - "steady": Poisson arrivals at `rate`
+      - "burst": every `burst_period` seconds, `burst_length` seconds at
+        `burst_factor` times the rate
+      - "spike": steady, with one `burst_length` second spike halfway through
+        the first `burst_period` seconds
+    `invalid_ratio` of the swaps are corrupted (missing fields, bad addresses,
+    negative values) to exercise the validators' reject paths.
+    """
+
+    def __init__(self, seed=0, wallets=10000, tokens=1000, wallet_skew=1.1, token_skew=1.2,
+                 rate=500.0, profile="steady", burst_factor=20.0, burst_period=60.0,
+                 burst_length=5.0, invalid_ratio=0.0, start=None):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown burst profile: {profile!r}")
+        self.seed = seed
+        self.wallets = wallets
+        self.tokens = tokens
+        self.wallet_skew = wallet_skew
+        self.token_skew = token_skew
+        self.rate = rate
+        self.profile = profile
+        self.burst_factor = burst_factor
+        self.burst_period = burst_period
+        self.burst_length = burst_length
+        self.invalid_ratio = invalid_ratio
+        self.start = time.time() if start is None else start
+
+    def params(self):
+        """The generator's arguments, for recording alongside benchmark results."""
+        return {key: getattr(self, key) for key in (
+            'seed', 'wallets', 'tokens', 'wallet_skew', 'token_skew', 'rate', 'profile',
+            'burst_factor', 'burst_period', 'burst_length', 'invalid_ratio')}
+
+    def _rate_at(self, elapsed):
+        if self.profile == "steady":
+            return self.rate
+        if self.profile == "burst":
+            in_burst = elapsed % self.burst_period < self.burst_length
+        else:
+            spike_at = self.burst_period / 2
+            in_burst = spike_at <= elapsed < spike_at + self.burst_length
+        return self.rate * self.burst_factor if in_burst else self.rate
+
+    def _corrupt(self, rng, payload):
+        kind = rng.randrange(4)
+        if kind == 0:
+            del payload['token_address']
+        elif kind == 1:
+            payload['token_address'] = payload['token_address'][4:]
+        elif kind == 2:
+            payload['value'] = -payload['value']
+        else:
+            payload['timestamp'] = "not a timestamp"
+
+    def payloads(self, count):
+        """`count` swap payload dicts, as found under "data" in a feed frame."""
+        rng = random.Random(self.seed)
+        wallets = [_address(rng, "", 44) for _ in range(self.wallets)]
+        tokens = [_address(rng, "sol:", 44) for _ in range(self.tokens)]
+        wallet_rank = _zipf_sampler(rng, self.wallets, self.wallet_skew)
+        token_rank = _zipf_sampler(rng, self.tokens, self.token_skew)
+        elapsed = 0.0
+        for seq in range(count):
+            elapsed += rng.expovariate(self._rate_at(elapsed))
+            payload = {
+                'tx_type': 'swap',
+                'chain': 'solana',
+                'transaction_hash': f"{self.seed:x}-{seq:012x}",
+                'wallet_address': wallets[wallet_rank()],
+                'token_address': tokens[token_rank()],
+                'transaction_type': 'buy' if rng.random() < 0.55 else 'sell',
+                'value': round(rng.lognormvariate(5.0, 2.0), 6),
+                'timestamp': round(self.start + elapsed, 6),
+            }
+            if self.invalid_ratio and rng.random() < self.invalid_ratio:
+                self._corrupt(rng, payload)
+            yield payload
+
+    def frames(self, count):
+        """`count` websocket text frames wrapping the payloads."""
+        for payload in self.payloads(count):
+            yield json.dumps({'type': 'tx', 'data': payload})
@@ -0,0 +1,102 @@
+# benchmarks/ingest.py
+import asyncio
+import time
+
+from core.config import settings
+from core.latency import tracer
+from core.message_bus import MessageBus
+from agents.collection.cielo_agent import CieloAgent
+from benchmarks.end_to_end import peak_rss_bytes
+from benchmarks.mock_feed import MockFeedServer, matches
+
+_SINK = "Benchmark.sink"
+
+
+async def _drain(bus, channel):
+    while True:
+        await bus.get_messages_async(channel, subscriber=_SINK)
+
+
+async def _run(payloads, rate, disconnect_after, resend, malformed_ratio, codec, timeout):
+    server = MockFeedServer(payloads, rate=rate, disconnect_after=disconnect_after, resend=resend,
+                            malformed_ratio=malformed_ratio, codec=codec)
+    await server.start()
+    settings.CIELO_WS_URL = server.url
+    settings.FEED_CODEC = codec
+
+    # Only the ingestion side: sinks keep the channels CieloAgent writes to empty
+    bus = MessageBus()
+    channels = ["RawDataChannel"] + (["RangeValidationChannel"] if settings.VALIDATION_MODE == "inline" else [])
+    for channel in channels:
+        bus.register_agent(channel)
+        bus.subscribe(channel, _SINK)
+    cielo = CieloAgent(name="CieloAgent", message_bus=bus)
+    cielo.frame_log = None
+    shards = [connection.filters for connection in cielo.connections]
+    expected = sum(1 for filters in shards for payload in payloads if matches(filters, payload))
+
+    tracer.reset()
+    tracer.enabled = settings.LATENCY_TRACING
+    tracer.max_per_second = settings.LATENCY_MAX_TRACES_PER_SECOND
+
+    tasks = [asyncio.create_task(_drain(bus, channel)) for channel in channels]
+    started = time.perf_counter()
+    cielo_task = asyncio.create_task(cielo.run_async())
+    try:
+        # Done once every shard has been sent every matching swap and received them
+        deadline = started + timeout
+        while time.perf_counter() < deadline:
+            received = sum(connection.swaps for connection in cielo.connections)
+            if len(server.exhausted) == len(set(map(str, shards))) and received >= server.sent:
+                break
+            await asyncio.sleep(0.005)
+        elapsed = time.perf_counter() - started
+    finally:
+        await cielo.stop()
+        await asyncio.wait_for(cielo_task, timeout=10)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await server.stop()
+
+    received = sum(connection.swaps for connection in cielo.connections)
+    ingest = tracer.histograms.get("ingest:RawDataChannel")
+    return {
+        'count': received,
+        'msgs_per_s': round(received / elapsed, 1) if elapsed else None,
+        'elapsed_seconds': round(elapsed, 3),
+        'expected': expected + server.resent,
+        'complete': received >= expected + server.resent,
+        'published': bus.stats()["RawDataChannel"]['published'],
+        # Receive to enqueue on RawDataChannel: pre-filter, decode, dedup and parsing
+        'decode': ingest.summary() if ingest is not None else None,
+        'agent': {
+            'frames_skipped': cielo.frames_skipped,
+            'decode_errors': cielo.decode_errors,
+            'dedup': cielo.seen.stats() if cielo.seen is not None else None,
+            'connections': [{
+                'filters': connection.filters,
+                'swaps': connection.swaps,
+                'connect_attempts': connection.connect_attempts,
+                'reconnects': connection.reconnects,
+                'downtime_seconds': round(connection.downtime_seconds, 3),
+                'missed_estimate': round(connection.missed_estimate, 1),
+            } for connection in cielo.connections],
+        },
+        'server': server.stats(),
+        'peak_rss_bytes': peak_rss_bytes(),
+    }
+
+
+def run_ingest(generator, count, rate=0.0, disconnect_after=0, resend=0, malformed_ratio=0.0,
+               codec="json", timeout=300.0):
+    """
+    Serve `count` generated swaps from a local MockFeedServer to a CieloAgent
+    (with settings.CIELO_CONNECTION_SHARDS, dedup, codec and validation mode as
+    configured) over real websockets, and report ingestion messages/s, the
+    per-swap receive-to-enqueue cost, and the agent's dedup, decode error and
+    reconnect counters. `rate` paces each connection (0 = saturation);
+    `disconnect_after`, `resend` and `malformed_ratio` inject feed faults.
+    """
+    payloads = list(generator.payloads(count))
+    return asyncio.run(_run(payloads, rate, disconnect_after, resend, malformed_ratio, codec, timeout))
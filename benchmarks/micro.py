@@ -0,0 +1,178 @@
+# benchmarks/micro.py
+import asyncio
+import gc
+import time
+
+from core.clock import EventTimeClock
+from core.codec import available_codecs, get_codec
+from core.dedup import build_dedup
+from core.message_bus import MessageBus
+from core.transaction import Transaction
+from core.wallet_store import WalletStore
+from agents.validation.data_integrity_agent import DataIntegrityAgent
+from agents.validation.TypeValidationAgent import TypeValidationAgent
+from agents.validation.ValueRangeAgent import ValueRangeAgent
+from agents.validation.FusedValidationAgent import FusedValidationAgent, build_validator
+from agents.patterns.WalletBehaviorAgent import WalletBehaviorAgent
+from agents.patterns.TradingVolumeAgent import TradingVolumeAgent
+from agents.patterns.SmartPositionAgent import SmartPositionAgent
+from agents.patterns.pattern_pipeline import OUTPUT_CHANNELS
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list (None if it is empty)."""
+    if not sorted_values:
+        return None
+    return sorted_values[min(int(fraction * len(sorted_values)), len(sorted_values) - 1)]
+
+
+def summarize(latencies_ns, elapsed):
+    """Throughput and latency percentiles (microseconds) of one measured run."""
+    latencies_ns = sorted(latencies_ns)
+    count = len(latencies_ns)
+    return {
+        'count': count,
+        'msgs_per_s': round(count / elapsed, 1) if elapsed else None,
+        'p50_us': round(percentile(latencies_ns, 0.50) / 1e3, 3) if count else None,
+        'p99_us': round(percentile(latencies_ns, 0.99) / 1e3, 3) if count else None,
+        'max_us': round(latencies_ns[-1] / 1e3, 3) if count else None,
+    }
+
+
+def _bus():
+    bus = MessageBus()
+    for channel in ("IntegrityChannel", "TypeValidationChannel", "RangeValidationChannel", *OUTPUT_CHANNELS):
+        bus.register_agent(channel, policy="drop_oldest")
+    return bus
+
+
+def _validator(agent_class):
+    def setup():
+        return agent_class(agent_class.__name__, _bus()).handle
+    return setup
+
+
+def _fused_function():
+    validate = build_validator()
+
+    async def handle(msg):
+        validate(msg)
+    return handle
+
+
+def _pattern_agent(agent_class):
+    # The agent's own store, fed from its input channel, as when run without main.py's shared store
+    def setup():
+        bus = _bus()
+        agent = agent_class(agent_class.__name__, bus, wallet_store=WalletStore(
+            f"{agent_class.__name__}.wallets", clock=EventTimeClock()))
+        agent.wallet_store.attach(bus, agent_class.input_channel)
+
+        async def handle(msg):
+            bus.send_message(agent_class.input_channel, msg)
+            await agent.handle(msg)
+        return handle
+    return setup
+
+
+def _dedup(mode):
+    def setup():
+        seen = build_dedup(mode)
+
+        async def handle(msg):
+            seen.add(msg.transaction_hash)
+        return handle
+    return setup
+
+
+# Stage name -> (setup() returning an async handle(msg) doing the stage's per-message work,
+# the input the stage sees). Chain validators see what the previous link passes,
+# the fused validators every swap, and the pattern agents only valid swaps.
+STAGES = {
+    "DataIntegrityAgent": (_validator(DataIntegrityAgent), "raw"),
+    "TypeValidationAgent": (_validator(TypeValidationAgent), "integrity"),
+    "ValueRangeAgent": (_validator(ValueRangeAgent), "typed"),
+    "FusedValidationAgent": (_validator(FusedValidationAgent), "raw"),
+    "build_validator": (_fused_function, "raw"),
+    "dedup.exact": (_dedup("exact"), "raw"),
+    "dedup.bloom": (_dedup("bloom"), "raw"),
+    "WalletBehaviorAgent": (_pattern_agent(WalletBehaviorAgent), "valid"),
+    "TradingVolumeAgent": (_pattern_agent(TradingVolumeAgent), "valid"),
+    "SmartPositionAgent": (_pattern_agent(SmartPositionAgent), "valid"),
+}
+
+
+def _inputs(swaps):
+    # The fused validator runs the chain's rules in order, so its rejection's
+    # stage tells how far down the chain each swap gets
+    validate = build_validator()
+    rejections = [validate(tx) for tx in swaps]
+    return {
+        'raw': swaps,
+        'integrity': [tx for tx, r in zip(swaps, rejections) if r is None or r.stage != "integrity"],
+        'typed': [tx for tx, r in zip(swaps, rejections) if r is None or r.stage == "range"],
+        'valid': [tx for tx, r in zip(swaps, rejections) if r is None],
+    }
+
+
+async def _measure(handle, messages):
+    latencies = []
+    clock = time.perf_counter_ns
+    started = time.perf_counter()
+    for msg in messages:
+        t0 = clock()
+        await handle(msg)
+        latencies.append(clock() - t0)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+# Frames the feed sends besides swaps, which the codec pre-filter should discard undecoded
+_OTHER_FRAMES = (
+    {'type': 'pong'},
+    {'type': 'subscribed', 'filter': {'chains': ['solana'], 'tx_types': ['swap']}},
+    {'type': 'heartbeat', 'timestamp': 1700000000},
+)
+
+
+def _codec_stages(payloads):
+    # codec.<name>.decode / .encode on swap frames, .prefilter on the other frames
+    # (compare it with decode to see what skipping a full decode saves)
+    stages = {}
+    for name in available_codecs():
+        codec = get_codec(name)
+        frames = [codec.dumps({'type': 'tx', 'data': payload}) for payload in payloads]
+        others = [codec.dumps(_OTHER_FRAMES[i % len(_OTHER_FRAMES)]) for i in range(len(payloads))]
+
+        def stage(operation):
+            async def handle(msg):
+                operation(msg)
+            return handle
+        stages[f"codec.{name}.decode"] = (stage(codec.loads), frames)
+        stages[f"codec.{name}.encode"] = (stage(lambda payload, dumps=codec.dumps: dumps({'type': 'tx', 'data': payload})),
+                                          payloads)
+        stages[f"codec.{name}.prefilter"] = (stage(codec.is_tx_frame), others)
+    return stages
+
+
+def run_micro(generator, count, stages=None):
+    """
+    Time each stage's handle() on `count` generated swaps, one message at a
+    time with no channel waits, so the numbers are the stage's own cost.
+    Every installed codec is timed too (codec.<name>.decode/encode/prefilter).
+    Returns {stage: summary}; `stages` limits which stages run.
+    """
+    payloads = list(generator.payloads(count))
+    inputs = _inputs([Transaction.from_dict(payload) for payload in payloads])
+    results = {}
+    for name, (setup, source) in STAGES.items():
+        if stages and name not in stages:
+            continue
+        handle = setup()
+        gc.collect()
+        results[name] = asyncio.run(_measure(handle, inputs[source]))
+    for name, (handle, messages) in _codec_stages(payloads).items():
+        if stages and name not in stages:
+            continue
+        gc.collect()
+        results[name] = asyncio.run(_measure(handle, messages))
+    return results
@@ -0,0 +1,226 @@
+# benchmarks/mock_feed.py
+"""
+Local stand-in for the Cielo WebSocket feed, for load-testing CieloAgent
+without the real CIELO_WS_URL.
+
+    python -m benchmarks.mock_feed --port 8765 --rate 2000 --count 100000
+    python -m benchmarks.mock_feed --recorded data/frames --rate 0 --disconnect-after 5000
+
+then point CIELO_WS_URL at ws://127.0.0.1:8765. `python -m benchmarks ingest`
+runs one in-process against a CieloAgent and reports ingestion throughput.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+
+import websockets
+from websockets.exceptions import ConnectionClosed
+
+from core.codec import get_codec
+
+logger = logging.getLogger("MockFeed")
+
+
+def matches(filters, payload):
+    """Whether a swap passes a subscribe_feed filter (chains, tx_types, min/max_usd_value)."""
+    chains = filters.get('chains')
+    if chains and payload.get('chain') not in chains:
+        return False
+    tx_types = filters.get('tx_types')
+    if tx_types and payload.get('tx_type') not in tx_types:
+        return False
+    value = payload.get('value')
+    if isinstance(value, (int, float)):
+        if 'min_usd_value' in filters and value < filters['min_usd_value']:
+            return False
+        if 'max_usd_value' in filters and value >= filters['max_usd_value']:
+            return False
+    return True
+
+
+def recorded_payloads(paths, codec=None):
+    """Swap payloads from frame logs or JSON-lines files, as read by replay.py."""
+    from replay import iter_frames, parse_swap
+    codec = codec or get_codec()
+    payloads = []
+    for _, frame in iter_frames(paths):
+        try:
+            data = parse_swap(frame, codec)
+        except ValueError:
+            continue
+        if data is not None:
+            payloads.append(data)
+    return payloads
+
+
+class MockFeedServer:
+    """
+    Speaks the feed's protocol: a client sends {"type": "subscribe_feed",
+    "filter": {...}} and receives {"type": "tx", "data": swap} frames for the
+    swaps in `payloads` that match its filter, until it sends
+    "unsubscribe_feed" or the payloads run out.
+
+    Each client is paced at `rate` frames per second (0 = as fast as the
+    socket takes them). Faults are injected on request:
+      - `disconnect_after`: the server drops the connection after that many
+        frames (close code 1011); a client resubscribing with the same filter
+        resumes where it was cut off, first resending the last `resend`
+        swaps, as the real feed may after a reconnect
+      - `malformed_ratio`: that share of swaps are preceded by a truncated
+        copy of their frame
+    Frames are encoded with `codec` (json text frames by default, binary for
+    orjson/msgpack).
+    """
+
+    def __init__(self, payloads, host="127.0.0.1", port=0, rate=0.0, disconnect_after=0,
+                 resend=0, malformed_ratio=0.0, codec="json", seed=0):
+        self.payloads = payloads
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.disconnect_after = disconnect_after
+        self.resend = resend
+        self.malformed_ratio = malformed_ratio
+        self.codec = get_codec(codec)
+        self._rng = random.Random(seed)
+        self._resume = {}           # Filter (as JSON) -> index of the next payload to send
+        self.exhausted = set()      # Filters whose subscribers have been sent every payload
+        self._server = None
+        # Counters
+        self.connections = 0
+        self.sent = 0               # Swap frames
+        self.resent = 0
+        self.malformed_sent = 0
+        self.disconnects = 0        # Injected
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await websockets.serve(self._handler, self.host, self.port, max_size=None)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Mock feed serving {len(self.payloads)} swaps on {self.url}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def run(self):
+        """Serve until cancelled."""
+        await self.start()
+        try:
+            await asyncio.Future()
+        finally:
+            await self.stop()
+
+    def stats(self):
+        return {
+            'connections': self.connections,
+            'sent': self.sent,
+            'resent': self.resent,
+            'malformed_sent': self.malformed_sent,
+            'disconnects': self.disconnects,
+        }
+
+    async def _handler(self, websocket, path=None):
+        self.connections += 1
+        stream = None
+        try:
+            async for message in websocket:
+                request = json.loads(message)
+                kind = request.get('type')
+                if kind == 'subscribe_feed' and stream is None:
+                    filters = request.get('filter') or {}
+                    await websocket.send(json.dumps({'type': 'subscribed', 'filter': filters}))
+                    stream = asyncio.create_task(self._stream(websocket, filters))
+                elif kind == 'unsubscribe_feed' and stream is not None:
+                    stream.cancel()
+                    stream = None
+        except ConnectionClosed:
+            pass
+        finally:
+            if stream is not None:
+                stream.cancel()
+
+    async def _stream(self, websocket, filters):
+        key = json.dumps(filters, sort_keys=True)
+        index = self._resume.get(key, 0)
+        if index:
+            resume_at = index
+            index = max(0, index - self.resend)
+            self.resent += sum(1 for payload in self.payloads[index:resume_at] if matches(filters, payload))
+        sent = 0
+        started = time.perf_counter()
+        dumps = self.codec.dumps
+        try:
+            while index < len(self.payloads):
+                payload = self.payloads[index]
+                index += 1
+                if not matches(filters, payload):
+                    continue
+                if self.rate:
+                    delay = started + sent / self.rate - time.perf_counter()
+                    if delay > 0.001:
+                        await asyncio.sleep(delay)
+                frame = dumps({'type': 'tx', 'data': payload})
+                if self.malformed_ratio and self._rng.random() < self.malformed_ratio:
+                    # Cut short after the "tx" marker: passes the pre-filter, fails to decode
+                    await websocket.send(frame[:len(frame) // 2])
+                    self.malformed_sent += 1
+                await websocket.send(frame)
+                self.sent += 1
+                sent += 1
+                if not self.rate and not sent % 256:
+                    await asyncio.sleep(0)
+                if self.disconnect_after and not sent % self.disconnect_after:
+                    self._resume[key] = index
+                    self.disconnects += 1
+                    await websocket.close(1011, "injected disconnect")
+                    return
+            self.exhausted.add(key)
+        finally:
+            self._resume[key] = max(self._resume.get(key, 0), index)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.mock_feed",
+                                     description=__doc__.strip().split('\n\n')[0])
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--recorded', nargs='*', help="serve swaps from frame logs or JSON-lines files")
+    parser.add_argument('--count', type=int, default=100000, help="synthetic swaps to serve")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rate', type=float, default=1000.0,
+                        help="frames per second per client (0 = as fast as possible)")
+    parser.add_argument('--disconnect-after', type=int, default=0, help="drop clients after this many frames")
+    parser.add_argument('--resend', type=int, default=0, help="swaps resent after a client reconnects")
+    parser.add_argument('--malformed-ratio', type=float, default=0.0)
+    parser.add_argument('--codec', default="json", help="frame encoding: json, orjson or msgpack")
+    parser.add_argument('--log-level', default='INFO')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level, format="%(asctime)s [%(levelname)s] %(message)s")
+    if args.recorded:
+        payloads = recorded_payloads(args.recorded)
+    else:
+        from benchmarks.generator import SwapGenerator
+        # Timestamps start now and run ahead at the feed rate, so the range validator accepts them
+        payloads = list(SwapGenerator(seed=args.seed, rate=args.rate or 1000.0).payloads(args.count))
+    server = MockFeedServer(payloads, args.host, args.port, rate=args.rate,
+                            disconnect_after=args.disconnect_after, resend=args.resend,
+                            malformed_ratio=args.malformed_ratio, codec=args.codec, seed=args.seed)
+    try:
+        asyncio.run(server.run())
+    except KeyboardInterrupt:
+        pass
+    logger.info(f"Mock feed stopped: {server.stats()}")
+
+
+if __name__ == "__main__":
+    main()
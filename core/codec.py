@@ -0,0 +1,86 @@
+# core/codec.py
+import json
+import logging
+from core.config import settings
+
+try:
+    import orjson
+except ImportError:  # Optional; stdlib json is the fallback
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional; only needed for binary (msgpack) frames
+    msgpack = None
+
+logger = logging.getLogger("Codec")
+
+
+class Codec:
+    """
+    Encoder/decoder for feed frames and the records derived from them.
+
+    `tx_marker` is how the literal "tx" type value looks in an encoded frame.
+    A `tx` frame always contains it, so is_tx_frame() can discard pings,
+    acknowledgements and other non-swap frames with a substring search
+    instead of a full decode. Frames it lets through are still checked after
+    decoding, so an occasional false positive only costs the decode.
+    """
+
+    def __init__(self, name, loads, dumps, tx_marker):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps          # Returns bytes, except for the stdlib json codec (str)
+        self._marker_bytes = tx_marker
+        self._marker_text = tx_marker.decode('latin-1')
+
+    def is_tx_frame(self, frame):
+        """False only for frames that cannot be `tx` frames (str or bytes)."""
+        marker = self._marker_text if isinstance(frame, str) else self._marker_bytes
+        return marker in frame
+
+    def __repr__(self):
+        return f"Codec({self.name!r})"
+
+
+def _json_codec():
+    return Codec("json", json.loads, lambda obj: json.dumps(obj, separators=(',', ':')), b'"tx"')
+
+
+def _orjson_codec():
+    return Codec("orjson", orjson.loads, orjson.dumps, b'"tx"')
+
+
+def _msgpack_codec():
+    # "tx" packs as a 2-byte fixstr: 0xa2 followed by the characters
+    return Codec("msgpack", lambda data: msgpack.unpackb(data, raw=False), msgpack.packb, b'\xa2tx')
+
+
+_CODECS = {
+    "json": (lambda: True, _json_codec),
+    "orjson": (lambda: orjson is not None, _orjson_codec),
+    "msgpack": (lambda: msgpack is not None, _msgpack_codec),
+}
+
+
+def available_codecs():
+    """Names of the codecs whose libraries are installed."""
+    return [name for name, (available, _) in _CODECS.items() if available()]
+
+
+def get_codec(name=None):
+    """
+    Codec for `name` (default settings.FEED_CODEC). "auto" picks orjson when
+    it is installed and stdlib json otherwise; a codec whose library is missing
+    falls back to json with a warning, so the pipeline always starts.
+    """
+    name = name or settings.FEED_CODEC
+    if name == "auto":
+        name = "orjson" if orjson is not None else "json"
+    if name not in _CODECS:
+        raise ValueError(f"Unknown codec: {name!r}")
+    available, factory = _CODECS[name]
+    if not available():
+        logger.warning(f"Codec {name!r} is not installed; falling back to json")
+        return _json_codec()
+    return factory()
@@ -0,0 +1,219 @@
+# core/columnar_store.py
+from collections import deque
+from core.config import settings
+from core.transaction import NS_PER_SECOND
+
+try:
+    import numpy as np
+except ImportError:  # Only the analysis agents' column store needs numpy
+    np = None
+
+NO_ID = -1      # Token or wallet id for a transaction without that field
+
+
+class _Interner:
+    """Maps strings to small int ids, reusing the ids of strings no row refers to any more."""
+
+    def __init__(self):
+        self._ids = {}
+        self._names = []
+        self._refs = []
+        self._free = []
+
+    def __len__(self):
+        return len(self._ids)
+
+    def get(self, name):
+        return self._ids.get(name, NO_ID)
+
+    def name(self, id_):
+        return self._names[id_] if id_ != NO_ID else None
+
+    def acquire(self, name):
+        if name is None:
+            return NO_ID
+        id_ = self._ids.get(name)
+        if id_ is None:
+            if self._free:
+                id_ = self._free.pop()
+                self._names[id_] = name
+                self._refs[id_] = 0
+            else:
+                id_ = len(self._names)
+                self._names.append(name)
+                self._refs.append(0)
+            self._ids[name] = id_
+        self._refs[id_] += 1
+        return id_
+
+    def release(self, id_):
+        if id_ == NO_ID:
+            return
+        self._refs[id_] -= 1
+        if not self._refs[id_]:
+            del self._ids[self._names[id_]]
+            self._names[id_] = None
+            self._free.append(id_)
+
+
+class ColumnView:
+    """
+    Rows of a ColumnarStore as NumPy arrays: timestamp_ns, value, token_id and
+    wallet_id. Views of a time range are zero-copy slices and stay valid only
+    until the store is next modified; copy the arrays to keep them longer.
+    """
+
+    __slots__ = ('timestamp_ns', 'value', 'token_id', 'wallet_id')
+
+    def __init__(self, timestamp_ns, value, token_id, wallet_id):
+        self.timestamp_ns = timestamp_ns
+        self.value = value
+        self.token_id = token_id
+        self.wallet_id = wallet_id
+
+    def __len__(self):
+        return len(self.timestamp_ns)
+
+
+class ColumnarStore:
+    """
+    Array-backed copy of the recent, time-ordered transactions that
+    DataProcessingAgent publishes, kept current by applying its SortedDeltas.
+
+    Columns live in preallocated arrays of twice the capacity: rows are
+    appended at the end and the live rows are moved back to the front only
+    when the end is reached, so any range of live rows is one contiguous
+    slice. Because rows are in time order the timestamp column is its own
+    time index (binary search); the token index keeps each token's row
+    positions. Token and wallet addresses are stored as interned int ids.
+    """
+
+    def __init__(self, capacity=None):
+        if np is None:
+            raise RuntimeError("ColumnarStore requires numpy")
+        self.capacity = capacity or settings.PROCESSED_BUFFER_SIZE
+        size = 2 * self.capacity
+        self._timestamp_ns = np.zeros(size, dtype=np.int64)
+        self._value = np.zeros(size, dtype=np.float64)
+        self._token_id = np.full(size, NO_ID, dtype=np.int32)
+        self._wallet_id = np.full(size, NO_ID, dtype=np.int32)
+        self._start = self._end = 0     # Live rows are [_start, _end) of the arrays
+        self._base = 0                  # Absolute position of the row at _start
+        self._seq = None
+        self.tokens = _Interner()
+        self.wallets = _Interner()
+        self._token_rows = {}           # token id -> deque of absolute positions, ascending
+
+    def __len__(self):
+        return self._end - self._start
+
+    def apply(self, delta):
+        """
+        Apply a SortedDelta. Returns False when the store cannot be brought up
+        to date (a missed delta, or no snapshot yet) and a snapshot is needed.
+        """
+        if delta.snapshot:
+            self._drop_front(len(self))
+            self._base = delta.first
+        elif self._seq is None or delta.seq != self._seq + 1:
+            return False
+        else:
+            # The trim may have gone past every row held; rebase to `first` either way
+            self._drop_front(delta.first - self._base)
+            self._base = delta.first
+            self._drop_back(self._base + len(self) - delta.start)
+        self.extend(delta.transactions)
+        self._seq = delta.seq
+        return True
+
+    def extend(self, transactions):
+        """Append transactions, which must not be older than the newest row."""
+        count = len(transactions)
+        if count > self.capacity:
+            # Only the newest `capacity` transactions fit
+            self._drop_front(len(self))
+            self._base += count - self.capacity
+            transactions = transactions[count - self.capacity:]
+            count = self.capacity
+        overflow = len(self) + count - self.capacity
+        if overflow > 0:
+            self._drop_front(overflow)
+        if self._end + count > len(self._timestamp_ns):
+            # Move the live rows to the front to make room at the end
+            live = len(self)
+            for column in (self._timestamp_ns, self._value, self._token_id, self._wallet_id):
+                column[:live] = column[self._start:self._end]
+            self._start, self._end = 0, live
+        end = self._end
+        position = self._base + len(self)
+        for offset, tx in enumerate(transactions):
+            row = end + offset
+            self._timestamp_ns[row] = tx.timestamp_ns or 0
+            self._value[row] = tx.value or 0.0
+            token = self.tokens.acquire(tx.token_address)
+            self._token_id[row] = token
+            self._wallet_id[row] = self.wallets.acquire(tx.wallet_address)
+            if token != NO_ID:
+                self._token_rows.setdefault(token, deque()).append(position + offset)
+        self._end = end + count
+
+    def _release(self, row):
+        self.wallets.release(int(self._wallet_id[row]))
+        token = int(self._token_id[row])
+        self.tokens.release(token)
+        return token
+
+    def _drop_front(self, count):
+        count = min(max(count, 0), len(self))
+        for row in range(self._start, self._start + count):
+            token = self._release(row)
+            if token != NO_ID:
+                rows = self._token_rows[token]
+                rows.popleft()
+                if not rows:
+                    del self._token_rows[token]
+        self._start += count
+        self._base += count
+
+    def _drop_back(self, count):
+        count = min(max(count, 0), len(self))
+        for row in range(self._end - 1, self._end - count - 1, -1):
+            token = self._release(row)
+            if token != NO_ID:
+                rows = self._token_rows[token]
+                rows.pop()
+                if not rows:
+                    del self._token_rows[token]
+        self._end -= count
+
+    def _span(self, start_ns, end_ns):
+        # Row range [lo, hi) of the arrays with start_ns <= timestamp <= end_ns
+        timestamps = self._timestamp_ns[self._start:self._end]
+        lo = 0 if start_ns is None else int(np.searchsorted(timestamps, start_ns, side='left'))
+        hi = len(timestamps) if end_ns is None else int(np.searchsorted(timestamps, end_ns, side='right'))
+        return self._start + lo, self._start + max(lo, hi)
+
+    def view(self, start_ns=None, end_ns=None):
+        """Zero-copy view of the rows with start_ns <= timestamp_ns <= end_ns (either bound optional)."""
+        lo, hi = self._span(start_ns, end_ns)
+        return ColumnView(self._timestamp_ns[lo:hi], self._value[lo:hi],
+                          self._token_id[lo:hi], self._wallet_id[lo:hi])
+
+    def last(self, seconds):
+        """Zero-copy view of the rows within `seconds` of the newest timestamp."""
+        if not len(self):
+            return self.view()
+        newest = int(self._timestamp_ns[self._end - 1])
+        return self.view(newest - int(seconds * NS_PER_SECOND), None)
+
+    def token_view(self, token_address, start_ns=None, end_ns=None):
+        """Rows of one token within the time range, gathered through the token index (a copy)."""
+        rows = self._token_rows.get(self.tokens.get(token_address))
+        if not rows:
+            return ColumnView(*(column[:0] for column in (
+                self._timestamp_ns, self._value, self._token_id, self._wallet_id)))
+        index = np.fromiter(rows, dtype=np.int64, count=len(rows)) - self._base + self._start
+        lo, hi = self._span(start_ns, end_ns)
+        index = index[(index >= lo) & (index < hi)]
+        return ColumnView(self._timestamp_ns[index], self._value[index],
+                          self._token_id[index], self._wallet_id[index])
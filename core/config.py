@@ -17,7 +17,23 @@ class Settings:
         "tx_types": ["swap"],
         "min_usd_value": 500
     })
-    CIELO_RECONNECT_DELAY: int = 15  # Seconds to wait before reconnecting
+    CIELO_CONNECTION_SHARDS: list = field(default_factory=list)
+    # One websocket per entry, each subscribed to CIELO_FILTERS updated with the entry, e.g.
+    # [{"chains": ["solana"]}, {"chains": ["ethereum", "base"]}] or USD bands
+    # [{"max_usd_value": 5000}, {"min_usd_value": 5000}]. Empty = a single connection.
+    CIELO_RECONNECT_MIN_DELAY: float = 1.0  # First reconnect delay; doubled per failed attempt, with jitter
+    CIELO_RECONNECT_DELAY: int = 15  # Max seconds to wait before reconnecting (backoff cap)
+    DEDUP_MODE: str = "exact"               # Repeated transaction_hash filter: "exact", "bloom" or "off"
+    DEDUP_TTL_SECONDS: float = 300.0        # exact: how long a transaction_hash is remembered to drop repeats
+    DEDUP_MAX_ENTRIES: int = 200000         # exact: hashes remembered at most; the oldest are forgotten first
+    DEDUP_BLOOM_MAX_BYTES: int = 4 * 1024 * 1024  # bloom: fixed size of both filter generations together
+    DEDUP_BLOOM_FP_RATE: float = 0.0001     # bloom: share of new swaps wrongly dropped as duplicates
+    FEED_CODEC: str = "auto"                # Frame codec: "json", "orjson", "msgpack" or "auto" (orjson if installed)
+    FRAME_LOG_ENABLED: bool = True          # Persist raw swap frames under DATA_DIR/frames
+    FRAME_LOG_SEGMENT_BYTES: int = 64 * 1024 * 1024  # Rotate to a new segment file past this size
+    FRAME_LOG_RETENTION_SEGMENTS: int = 32  # Newest segments kept; older ones are deleted
+    FRAME_LOG_FSYNC_INTERVAL: float = 1.0   # Max seconds between flush+fsync of written frames
+    FRAME_LOG_QUEUE_SIZE: int = 65536       # Frames buffered for the writer thread before dropping
 
     # Telegram Settings (for communication agents)
     API_ID: str = "26398708"
@@ -26,6 +42,53 @@ class Settings:
     TRADEWIZ_CHANNEL: str = "@TradeonNova2Bot"   # Secondary channel
     CA_CHANNEL2: str = "@helenus_trojanbot"      # Additional channel 1
     CA_CHANNEL3: str = "@TradeWiz_Solbot"         # Additional channel 2
+    TELEGRAM_BOT_TOKEN: str = ""                  # Bot the telegram alert sink logs in as; required (empty = file sink)
+
+    # Alert Settings
+    ALERT_SINK: str = "file"                # "telegram", "file" (DATA_DIR/alerts.jsonl) or "log"
+    ALERT_TARGETS: list = field(default_factory=list)  # Chats every alert goes to; empty = [TARGET_CHANNEL]
+    ALERT_COOLDOWN_SECONDS: float = 300.0   # Hits for a wallet+token within this of its last alert merge into one
+    ALERT_FLUSH_INTERVAL: float = 2.0       # Seconds between dispatches of due alerts
+    ALERT_BATCH_SIZE: int = 10              # Alerts combined into one outbound message
+    ALERT_RATE_PER_MINUTE: float = 20.0     # Outbound messages per target per minute (0 = unlimited)
+    ALERT_BURST: int = 5                    # Messages a target may take at once before the rate applies
+    ALERT_MAX_PENDING: int = 10000          # Wallet+token alerts awaiting dispatch; new ones beyond are dropped
+    ALERT_QUEUE_LIMIT: int = 1000           # Alerts queued per target; the oldest are dropped beyond it
+
+    # Message Bus Settings
+    CHANNEL_CAPACITY: int = 8192            # Default ring buffer size per channel
+    CHANNEL_POLICY: str = "block"           # "block", "drop_oldest" or "drop_newest" when full
+    CHANNEL_BLOCK_TIMEOUT: float = 1.0      # Seconds a blocked sender waits before dropping
+    CHANNEL_SHED_WATERMARK: float = 0.8     # Fill ratio above which low-value swaps are shed
+    CHANNEL_LIMITS: dict = field(default_factory=lambda: {
+        # Per-channel overrides, e.g. "RawDataChannel": {"capacity": 16384, "policy": "block"}
+        "ProcessedDataChannel": {"capacity": 64, "policy": "drop_oldest"},
+    })
+    PROCESSED_BUFFER_SIZE: int = 50000      # Max transactions DataProcessingAgent keeps sorted
+    PROCESSED_RETENTION_SECONDS: float = 3600.0  # Drop buffered transactions older than this behind the newest (0 = off)
+    PROCESSED_PUBLISH_INTERVAL: float = 5.0     # Seconds between deltas published to ProcessedDataChannel
+
+    # Validation Settings
+    VALIDATION_MODE: str = "fused"          # "chain" (three agents), "fused" (one stage) or "inline" (in CieloAgent)
+    VALIDATION_BATCH_MIN: int = 64          # Batches at least this large use NumPy validation, if installed
+
+    # Pattern Agent Settings
+    PATTERN_SHARDS: int = 0                 # Worker processes for wallet-sharded pattern agents (0 = in-process)
+    WALLET_STORE_REPORT_INTERVAL: float = 300.0  # Seconds between wallet store size/memory log lines (0 = never)
+    WALLET_STORE_MAX_BYTES: int = 512 * 1024 * 1024  # Estimated wallet state budget; LRU wallets evicted beyond it (0 = no limit)
+    WALLET_EXPIRY_TICK: float = 1.0         # Timer wheel resolution for dropping idle wallets, in seconds
+    CLOCK_MODE: str = "event"               # "event" (transaction timestamps) or "wall" (processing time)
+    EVENT_TIME_MAX_LATENESS: float = 5.0    # Seconds of out-of-order arrival tolerated before eviction
+
+    # Latency Tracing Settings
+    LATENCY_TRACING: bool = True            # Stamp sampled swaps and keep per-stage/channel latency histograms
+    LATENCY_MAX_TRACES_PER_SECOND: int = 1000  # Swaps traced per second; the rest go untraced (0 = trace all)
+    LATENCY_REPORT_INTERVAL: float = 60.0   # Seconds between latency summaries in the log (0 = never)
+
+    # Metrics Settings
+    METRICS_ENABLED: bool = True            # Serve Prometheus metrics over HTTP
+    METRICS_HOST: str = "127.0.0.1"         # Interface to bind; localhost keeps the endpoint private
+    METRICS_PORT: int = 9108                # Port for http://METRICS_HOST:METRICS_PORT/metrics
 
     # Directories for Data and Logging
     DATA_DIR: Path = field(default_factory=lambda: Path("data"))
@@ -0,0 +1,187 @@
+# core/dedup.py
+import hashlib
+import logging
+import math
+import struct
+import time
+from collections import OrderedDict
+from core.config import settings
+
+logger = logging.getLogger("Dedup")
+
+
+class SeenSet:
+    """
+    Bounded, time-expiring set of recently seen keys (transaction hashes).
+
+    Every key lives for `ttl` seconds after it was first seen, so insertion
+    order is also expiry order: expired keys are dropped from the front of an
+    OrderedDict as new keys arrive, and once `max_entries` is reached the
+    oldest key is evicted early. Each add() is O(1) amortised and memory stays
+    bounded however long the feed runs. A key evicted before its TTL can be
+    let through again; size `max_entries` for the expected rate times the TTL.
+    """
+
+    def __init__(self, ttl=None, max_entries=None, clock=time.monotonic):
+        self.ttl = settings.DEDUP_TTL_SECONDS if ttl is None else ttl
+        self.max_entries = settings.DEDUP_MAX_ENTRIES if max_entries is None else max_entries
+        self.clock = clock
+        self._expiry = OrderedDict()     # key -> expiry time, oldest first
+        self.hits = 0                   # Duplicates
+        self.misses = 0                 # New keys
+        self.expired = 0
+        self.evicted = 0                # Dropped before their TTL to stay within max_entries
+
+    def __len__(self):
+        return len(self._expiry)
+
+    def __contains__(self, key):
+        expiry = self._expiry.get(key)
+        return expiry is not None and expiry > self.clock()
+
+    def _expire(self, now):
+        expiry = self._expiry
+        while expiry:
+            key, deadline = next(iter(expiry.items()))
+            if deadline > now:
+                break
+            del expiry[key]
+            self.expired += 1
+
+    def add(self, key):
+        """Record `key`; False if it was already seen within the TTL (a duplicate)."""
+        now = self.clock()
+        self._expire(now)
+        if key in self._expiry:
+            self.hits += 1
+            return False
+        self._expiry[key] = now + self.ttl
+        self.misses += 1
+        if len(self._expiry) > self.max_entries:
+            self._expiry.popitem(last=False)
+            self.evicted += 1
+        return True
+
+    def stats(self):
+        return {
+            'size': len(self._expiry),
+            'hits': self.hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'evicted': self.evicted,
+        }
+
+
+class RotatingBloomFilter:
+    """
+    Probabilistic seen-set with a fixed memory budget, for when the exact
+    SeenSet would be too large.
+
+    Two Bloom filters (generations) sharing `max_bytes`. Keys go into the
+    current one; once it holds as many keys as it was sized for, the older
+    generation is cleared and the two swap, so the last `capacity` to
+    2 * `capacity` keys are always remembered. A lookup checks both, so each
+    generation is sized for half of `fp_rate`. Every add() is one hash and a
+    fixed number of bit tests whatever the stream length, and unlike the TTL
+    of SeenSet the rotation depends only on the key count, so a replay
+    deduplicates exactly like the live run. Errors are one-sided: about
+    `fp_rate` of new keys are taken for duplicates, but a duplicate within
+    the window is never missed.
+    """
+
+    _MAX_HASHES = 16                    # 32-bit positions cut from one 64-byte blake2b digest
+
+    def __init__(self, max_bytes=None, fp_rate=None):
+        max_bytes = settings.DEDUP_BLOOM_MAX_BYTES if max_bytes is None else max_bytes
+        self.fp_rate = settings.DEDUP_BLOOM_FP_RATE if fp_rate is None else fp_rate
+        if not 0 < self.fp_rate < 1:
+            raise ValueError(f"fp_rate must be between 0 and 1, got {self.fp_rate}")
+        # Bits per generation: a power of two (so positions are masked, not divided), within budget
+        self.bits = 1 << min(32, max(6, (max(1, max_bytes // 2) * 8).bit_length() - 1))
+        target = self.fp_rate / 2
+        # Optimal Bloom sizing: n = m (ln 2)^2 / -ln p keys, k = -log2 p hash functions
+        self.capacity = max(1, int(self.bits * math.log(2) ** 2 / -math.log(target)))
+        self.hashes = min(self._MAX_HASHES, max(1, round(-math.log2(target))))
+        self._mask = self.bits - 1
+        self._unpack = struct.Struct(f"<{self.hashes}I").unpack
+        self._current = bytearray(self.bits // 8)
+        self._previous = bytearray(self.bits // 8)
+        self._count = 0                 # Keys added to the current generation
+        self.hits = 0                   # Duplicates (including false positives)
+        self.misses = 0                 # New keys
+        self.rotations = 0
+        logger.info(f"Bloom dedup: {self.bits // 4} bytes, {self.capacity} keys per generation, "
+                    f"{self.hashes} hashes, fp_rate={self.fp_rate}")
+
+    def __len__(self):
+        """Keys added since the last rotation (the previous generation holds as many again)."""
+        return self._count
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=4 * self.hashes).digest()
+        mask = self._mask
+        return [position & mask for position in self._unpack(digest)]
+
+    @staticmethod
+    def _test(bitmap, positions):
+        for position in positions:
+            if not bitmap[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __contains__(self, key):
+        positions = self._positions(key)
+        return self._test(self._current, positions) or self._test(self._previous, positions)
+
+    def add(self, key):
+        """Record `key`; False if it was (probably) already seen (a duplicate)."""
+        positions = self._positions(key)
+        current = self._current
+        if self._test(current, positions):
+            self.hits += 1
+            return False
+        seen = self._test(self._previous, positions)
+        # Keys found only in the older generation are copied forward, so they
+        # outlive its rotation like any key added now
+        for position in positions:
+            current[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+        if seen:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if self._count >= self.capacity:
+            self._rotate()
+        return not seen
+
+    def _rotate(self):
+        previous = self._previous
+        previous[:] = bytes(len(previous))
+        self._previous, self._current = self._current, previous
+        self._count = 0
+        self.rotations += 1
+
+    def stats(self):
+        return {
+            'size': self._count,
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'rotations': self.rotations,
+            'memory_bytes': len(self._current) + len(self._previous),
+        }
+
+
+def build_dedup(mode=None, clock=time.monotonic):
+    """
+    The transaction-hash dedup stage for settings.DEDUP_MODE: "exact" (SeenSet),
+    "bloom" (RotatingBloomFilter) or "off" (None, nothing is dropped).
+    """
+    mode = mode or settings.DEDUP_MODE
+    if mode == "off":
+        return None
+    if mode == "exact":
+        return SeenSet(clock=clock)
+    if mode == "bloom":
+        return RotatingBloomFilter()
+    raise ValueError(f"Unknown dedup mode: {mode!r}")
@@ -0,0 +1,185 @@
+# core/frame_log.py
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from pathlib import Path
+from core.config import settings
+
+logger = logging.getLogger("FrameLog")
+
+# Every record is: payload length, crc32 of the payload, receive time (epoch ns), payload
+_RECORD = struct.Struct("<IIq")
+_SEGMENT_GLOB = "segment-*.log"
+
+
+def _segment_path(directory, index):
+    return Path(directory) / f"segment-{index:08d}.log"
+
+
+def list_segments(directory):
+    """Segment files under `directory`, oldest first."""
+    return sorted(Path(directory).glob(_SEGMENT_GLOB))
+
+
+class FrameLogWriter:
+    """
+    Append-only, segmented log of raw feed frames.
+
+    append() only puts the frame on a bounded deque and wakes the writer
+    thread if it is idle, so it never blocks or does I/O on the caller's
+    (websocket receive) path; if the deque is full the frame is counted in
+    `dropped` instead. The writer drains the deque in batches as
+    length-prefixed, checksummed records, and flushes and fsyncs written
+    frames within `fsync_interval` seconds, at most that often, even if the
+    feed goes quiet. Segments are rotated at `segment_bytes` and only the
+    newest `retention_segments` are kept.
+    """
+
+    def __init__(self, directory=None, segment_bytes=None, retention_segments=None,
+                 fsync_interval=None, queue_size=None):
+        self.directory = Path(directory or settings.DATA_DIR / "frames")
+        self.segment_bytes = segment_bytes or settings.FRAME_LOG_SEGMENT_BYTES
+        self.retention_segments = retention_segments or settings.FRAME_LOG_RETENTION_SEGMENTS
+        self.fsync_interval = settings.FRAME_LOG_FSYNC_INTERVAL if fsync_interval is None else fsync_interval
+        self.queue_size = queue_size or settings.FRAME_LOG_QUEUE_SIZE
+        self._pending = deque()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._file = None
+        self._segment_index = 0
+        self.written = 0
+        self.dropped = 0
+        self.bytes_written = 0
+
+    def start(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        existing = list_segments(self.directory)
+        # Never append to a segment a previous run may have left half-written
+        self._segment_index = int(existing[-1].stem.split('-')[1]) + 1 if existing else 0
+        self._open_segment()
+        self._thread = threading.Thread(target=self._run, name="FrameLogWriter", daemon=True)
+        self._thread.start()
+        logger.info(f"Logging frames to {self.directory}")
+
+    def append(self, frame, received_ns=None):
+        """Queue a frame (str or bytes) for writing; returns False if it was dropped."""
+        if len(self._pending) >= self.queue_size:
+            self.dropped += 1
+            return False
+        self._pending.append((time.time_ns() if received_ns is None else received_ns, frame))
+        if not self._wakeup.is_set():
+            self._wakeup.set()
+        return True
+
+    def stats(self):
+        return {'written': self.written, 'dropped': self.dropped, 'bytes_written': self.bytes_written}
+
+    def close(self, timeout=5.0):
+        """Write what is queued, fsync and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _open_segment(self):
+        self._file = open(_segment_path(self.directory, self._segment_index), 'ab', buffering=1 << 20)
+
+    def _rotate(self):
+        self._sync()
+        self._file.close()
+        self._segment_index += 1
+        self._open_segment()
+        for path in list_segments(self.directory)[:-self.retention_segments]:
+            try:
+                path.unlink()
+            except OSError as e:
+                logger.warning(f"Could not remove old segment {path}: {e}")
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _write(self, received_ns, frame):
+        payload = frame.encode() if isinstance(frame, str) else frame
+        self._file.write(_RECORD.pack(len(payload), zlib.crc32(payload), received_ns))
+        self._file.write(payload)
+        self.written += 1
+        self.bytes_written += _RECORD.size + len(payload)
+        if self._file.tell() >= self.segment_bytes:
+            self._rotate()
+
+    def _run(self):
+        pending, wakeup = self._pending, self._wakeup
+        last_sync = time.monotonic()
+        unsynced = False
+        while True:
+            # Clear before reading the flag and draining, so an append() or
+            # close() from here on wakes the wait below
+            wakeup.clear()
+            # Read the flag first so frames appended before close() are still written
+            stopping = self._stopping
+            try:
+                # Drain everything queued so one flush covers the whole batch
+                while pending:
+                    received_ns, frame = pending.popleft()
+                    self._write(received_ns, frame)
+                    unsynced = True
+                if stopping or (unsynced and time.monotonic() - last_sync >= self.fsync_interval):
+                    self._sync()
+                    last_sync = time.monotonic()
+                    unsynced = False
+            except Exception as e:
+                logger.error(f"Error writing frame log: {e}", exc_info=True)
+            if stopping:
+                break
+            if not pending:
+                # Sleep until frames arrive, or until written ones are due a sync
+                wakeup.wait(max(0.0, last_sync + self.fsync_interval - time.monotonic()) if unsynced else None)
+        self._file.close()
+
+
+class FrameLogReader:
+    """
+    Sequential reader over the segments a FrameLogWriter produced. Each segment
+    is memory-mapped and scanned in place; iteration yields (received_ns,
+    payload bytes) in write order. A truncated or corrupt record (e.g. from a
+    crash mid-write) ends that segment's scan, and `corrupt` counts them.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = Path(directory or settings.DATA_DIR / "frames")
+        self.corrupt = 0
+
+    def __iter__(self):
+        for path in list_segments(self.directory):
+            yield from self.read_segment(path)
+
+    def read_segment(self, path):
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                offset = 0
+                end = len(data)
+                header_size = _RECORD.size
+                while offset + header_size <= end:
+                    length, crc, received_ns = _RECORD.unpack_from(data, offset)
+                    start = offset + header_size
+                    payload = data[start:start + length]
+                    if len(payload) != length or zlib.crc32(payload) != crc:
+                        self.corrupt += 1
+                        logger.warning(f"Corrupt or truncated record in {path} at offset {offset}")
+                        return
+                    yield received_ns, payload
+                    offset = start + length
+                if offset < end:
+                    self.corrupt += 1
+                    logger.warning(f"Truncated record header in {path} at offset {offset}")
@@ -0,0 +1,199 @@
+# core/latency.py
+import logging
+import time
+from core.config import settings
+
+logger = logging.getLogger("Latency")
+
+_SUB_BITS = 6                       # 2**(_SUB_BITS - 1) buckets per power of two: at most ~3% error
+_HALF = 1 << (_SUB_BITS - 1)
+_MAX_EXPONENT = 40                  # Values up to ~2**46 ns (about 19 hours); larger ones are clamped
+
+
+def _bucket(value):
+    exponent = value.bit_length() - _SUB_BITS
+    if exponent <= 0:
+        return value
+    return exponent * _HALF + (value >> exponent)
+
+
+def _bucket_value(index):
+    # Highest value that falls in this bucket
+    if index < 2 * _HALF:
+        return index
+    exponent = index // _HALF - 1
+    return ((index - exponent * _HALF + 1) << exponent) - 1
+
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of nanosecond latencies. Buckets are linear below 64 ns
+    and logarithmic above it, with 32 buckets per power of two, so every
+    recorded value is within about 3% of its bucket's bound and the whole range
+    from nanoseconds to hours fits in a fixed list of about 1,300 counters.
+    record() is a bit_length, a shift and an increment: no allocation and no sorting.
+    """
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * ((_MAX_EXPONENT + 2) * _HALF)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value):
+        if value < 0:
+            value = 0
+        # _bucket(), inlined
+        exponent = value.bit_length() - _SUB_BITS
+        index = value if exponent <= 0 else exponent * _HALF + (value >> exponent)
+        counts = self.counts
+        if index >= len(counts):
+            index = len(counts) - 1
+        counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding this fraction of values (0 when empty)."""
+        if not self.count:
+            return 0
+        rank = max(1, int(fraction * self.count + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(_bucket_value(index), self.max)
+        return self.max
+
+    def summary(self):
+        """Count and mean/p50/p90/p99/p99.9/max in microseconds."""
+        return {
+            'count': self.count,
+            'mean_us': round(self.total / self.count / 1e3, 3) if self.count else None,
+            'p50_us': round(self.percentile(0.50) / 1e3, 3),
+            'p90_us': round(self.percentile(0.90) / 1e3, 3),
+            'p99_us': round(self.percentile(0.99) / 1e3, 3),
+            'p999_us': round(self.percentile(0.999) / 1e3, 3),
+            'max_us': round(self.max / 1e3, 3),
+        }
+
+
+class Trace:
+    """
+    Timing carried by a sampled Transaction: when it was received and when it
+    was sent to each channel, on the perf_counter_ns clock. Pattern copies get
+    their own Trace (see fork()) so stamps on one branch do not leak into another.
+    """
+
+    __slots__ = ('ingest_ns', 'sent')
+
+    def __init__(self, ingest_ns, sent=None):
+        self.ingest_ns = ingest_ns
+        self.sent = sent or {}
+
+    def fork(self):
+        return Trace(self.ingest_ns, dict(self.sent))
+
+
+class LatencyTracer:
+    """
+    Per-stage and per-channel latency histograms for sampled messages.
+
+    CieloAgent starts a Trace for a swap with begin(); every send stamps the
+    channel and records the time since ingest under "ingest:<channel>", an
+    agent picking the message up records the queueing delay under
+    "wait:<channel>", and its handling time goes under "stage:<agent>".
+    Messages without a trace cost the agents one attribute lookup.
+
+    At most `max_per_second` messages are traced each second (0 = all of
+    them), so tracing stays cheap at any feed rate: below the limit every
+    swap is traced, above it the limit becomes a sample. Histograms are
+    summarised in the log every `report_interval` seconds.
+    """
+
+    def __init__(self, enabled=None, max_per_second=None, report_interval=None):
+        self.enabled = settings.LATENCY_TRACING if enabled is None else enabled
+        self.max_per_second = settings.LATENCY_MAX_TRACES_PER_SECOND if max_per_second is None else max_per_second
+        self.report_interval = settings.LATENCY_REPORT_INTERVAL if report_interval is None else report_interval
+        self.histograms = {}
+        self.traced = 0
+        self.skipped = 0
+        self._second = 0
+        self._in_second = 0
+        self._last_report = time.monotonic()
+
+    def _histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        return histogram
+
+    def begin(self, now_ns=None):
+        """A new Trace for a message received now, or None if it is not sampled."""
+        if not self.enabled:
+            return None
+        now_ns = time.perf_counter_ns() if now_ns is None else now_ns
+        second = now_ns // 1_000_000_000
+        if second != self._second:
+            self._second = second
+            self._in_second = 0
+            if self.report_interval and time.monotonic() - self._last_report >= self.report_interval:
+                self.report()
+        if self.max_per_second and self._in_second >= self.max_per_second:
+            self.skipped += 1
+            return None
+        self._in_second += 1
+        self.traced += 1
+        return Trace(now_ns)
+
+    def sent(self, trace, channel):
+        now = time.perf_counter_ns()
+        trace.sent[channel] = now
+        self._histogram(f"ingest:{channel}").record(now - trace.ingest_ns)
+
+    def enter(self, trace, channel):
+        """Stamp a message being picked up from `channel`; returns the stamp for exit()."""
+        now = time.perf_counter_ns()
+        sent = trace.sent.get(channel)
+        if sent is not None:
+            self._histogram(f"wait:{channel}").record(now - sent)
+        return now
+
+    def exit(self, stage, enter_ns):
+        self._histogram(f"stage:{stage}").record(time.perf_counter_ns() - enter_ns)
+
+    def reset(self):
+        self.histograms = {}
+        self.traced = self.skipped = 0
+
+    def snapshot(self):
+        """Summaries of every histogram, keyed by name, plus the sampling counters."""
+        return {
+            'traced': self.traced,
+            'skipped': self.skipped,
+            'histograms': {name: histogram.summary() for name, histogram in sorted(self.histograms.items())},
+        }
+
+    def report(self):
+        """Log p50/p99 of every stage and channel."""
+        self._last_report = time.monotonic()
+        for name, histogram in sorted(self.histograms.items()):
+            summary = histogram.summary()
+            logger.info(f"{name}: n={summary['count']} p50={summary['p50_us']}us "
+                        f"p99={summary['p99_us']}us max={summary['max_us']}us")
+
+
+# Process-wide tracer shared by every agent, like `settings`
+tracer = LatencyTracer()
@@ -1,23 +1,410 @@
 # core/message_bus.py
+import asyncio
+import bisect
+import logging
+import threading
+from collections import deque
+
+from core.config import settings
+from core.metrics import registry
+
+DEFAULT_CHANNEL_CAPACITY = 8192
+
+POLICY_BLOCK = "block"
+POLICY_DROP_OLDEST = "drop_oldest"
+POLICY_DROP_NEWEST = "drop_newest"
+CHANNEL_POLICIES = (POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_DROP_NEWEST)
+
+logger = logging.getLogger("MessageBus")
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+def _wake_all(waiters):
+    # Waiters may belong to event loops on other threads, so hand off safely.
+    # A loop that has shut down has nobody left to wake.
+    for loop, future in waiters:
+        if loop.is_closed():
+            continue
+        try:
+            loop.call_soon_threadsafe(_wake, future)
+        except RuntimeError:
+            pass    # Closed since the check
+    waiters.clear()
+
+
+def _discard(waiters, waiter):
+    try:
+        waiters.remove(waiter)
+    except ValueError:
+        pass        # Already woken, which clears the list
+
+
+class ValueShedder:
+    """
+    Decides which messages to shed once a channel passes its watermark.
+
+    Keeps a sorted sample of recently seen message values. As the channel fills
+    from the watermark towards capacity, the admission threshold rises from the
+    lowest to the highest sampled value, so the lowest-value messages are shed
+    first and only the largest ones get through when the channel is nearly full.
+    """
+
+    def __init__(self, watermark, sample_size=512):
+        self.watermark = watermark
+        self._recent = deque(maxlen=sample_size)
+        self._sorted = []
+
+    def _observe(self, value):
+        if len(self._recent) == self._recent.maxlen:
+            del self._sorted[bisect.bisect_left(self._sorted, self._recent[0])]
+        self._recent.append(value)
+        bisect.insort(self._sorted, value)
+
+    def should_shed(self, value, fill_ratio):
+        if not isinstance(value, (int, float)):
+            return False
+        self._observe(value)
+        if fill_ratio < self.watermark or len(self._sorted) < 2:
+            return False
+        pressure = min((fill_ratio - self.watermark) / (1.0 - self.watermark), 1.0)
+        threshold = self._sorted[int(pressure * (len(self._sorted) - 1))]
+        return value < threshold
+
+
+class Channel:
+    """
+    A single named channel on the bus, backed by one bounded ring buffer.
+
+    Every subscriber keeps its own read cursor into the shared buffer, so each
+    message is stored once and handed to all subscribers by reference (fan-out
+    without copying). Readers block until a message past their cursor arrives.
+
+    When the slowest critical subscriber is `capacity` messages behind, the
+    channel is full and `policy` decides what happens to the next message:
+      - "block": the sender waits for space (up to `block_timeout`), then drops it
+      - "drop_oldest": the oldest unread message is overwritten
+      - "drop_newest": the new message is rejected
+    Messages sent with a value can additionally be shed by a ValueShedder once
+    the fill ratio passes `shed_watermark`. All drops are counted by reason.
+
+    Subscribers registered with critical=False (periodic readers such as the
+    sorted buffer) do not count towards the fill ratio: they never hold back
+    senders or trigger shedding, and when they fall `capacity` behind their
+    oldest unread messages are overwritten and counted as lagged instead.
+
+    Both sides have blocking (thread) and awaitable (asyncio) variants, so
+    threaded and event-loop agents can share the same channel.
+    """
+
+    def __init__(self, name, capacity=DEFAULT_CHANNEL_CAPACITY, policy=POLICY_DROP_OLDEST,
+                 block_timeout=1.0, shed_watermark=None):
+        if policy not in CHANNEL_POLICIES:
+            raise ValueError(f"Unknown channel policy '{policy}' for {name}")
+        self.name = name
+        self.capacity = capacity
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.shedder = ValueShedder(shed_watermark) if shed_watermark is not None else None
+        self._buffer = [None] * capacity
+        self._head = 0          # Sequence number of the next message written
+        self._cursors = {}      # Subscriber -> sequence number of its next read
+        self._lagged = {}       # Subscriber -> messages overwritten before being read
+        self._delivered = {}    # Subscriber -> messages read
+        self._lossy = set()     # Subscribers left out of the backlog (critical=False)
+        self.dropped = {'overwritten': 0, 'rejected': 0, 'timeout': 0, 'shed': 0}
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._async_readers = []    # (loop, future) pairs waiting for a message
+        self._async_writers = []    # (loop, future) pairs waiting for space
+
+    def __len__(self):
+        """Number of messages retained in the ring buffer."""
+        return min(self._head, self.capacity)
+
+    def _oldest(self):
+        return max(0, self._head - self.capacity)
+
+    def _backlog(self):
+        """Unread messages of the slowest critical subscriber."""
+        if self._lossy:
+            cursors = [cursor for subscriber, cursor in self._cursors.items() if subscriber not in self._lossy]
+        else:
+            cursors = self._cursors.values()
+        if not cursors:
+            return 0
+        return self._head - max(min(cursors), self._oldest())
+
+    def subscribe(self, subscriber, critical=True):
+        """
+        Register a subscriber; it receives every message sent from now on.
+        A non-critical subscriber skips what it falls too far behind on rather
+        than slowing the channel down for everyone else.
+        """
+        with self._lock:
+            self._cursors.setdefault(subscriber, self._head)
+            self._lagged.setdefault(subscriber, 0)
+            self._delivered.setdefault(subscriber, 0)
+            if critical:
+                self._lossy.discard(subscriber)
+            else:
+                self._lossy.add(subscriber)
+            self._not_full.notify_all()
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._cursors.pop(subscriber, None)
+            self._lagged.pop(subscriber, None)
+            self._delivered.pop(subscriber, None)
+            self._lossy.discard(subscriber)
+            self._not_full.notify_all()
+
+    def _full(self):
+        return self._backlog() >= self.capacity
+
+    def _shed(self, value):
+        if self.shedder is not None and \
+                self.shedder.should_shed(value, self._backlog() / self.capacity):
+            self.dropped['shed'] += 1
+            return True
+        return False
+
+    def _append(self, message):
+        if self._full():
+            self.dropped['overwritten'] += 1
+        self._buffer[self._head % self.capacity] = message
+        self._head += 1
+        self._cond.notify_all()
+        if self._async_readers:
+            _wake_all(self._async_readers)
+        return True
+
+    def put(self, message, value=None):
+        """Append a message; returns False if it was dropped or shed instead."""
+        with self._lock:
+            if self._shed(value):
+                return False
+            if self._full():
+                if self.policy == POLICY_DROP_NEWEST:
+                    self.dropped['rejected'] += 1
+                    return False
+                if self.policy == POLICY_BLOCK and \
+                        not self._not_full.wait_for(lambda: not self._full(), self.block_timeout):
+                    self.dropped['timeout'] += 1
+                    return False
+            return self._append(message)
+
+    async def put_async(self, message, value=None):
+        """Awaitable put: a full "block" channel suspends the caller instead of the thread."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._shed(value):
+                return False
+            if self._full() and self.policy == POLICY_DROP_NEWEST:
+                self.dropped['rejected'] += 1
+                return False
+        deadline = loop.time() + self.block_timeout
+        while True:
+            with self._lock:
+                if self.policy != POLICY_BLOCK or not self._full():
+                    return self._append(message)
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    self.dropped['timeout'] += 1
+                    return False
+                waiter = (loop, loop.create_future())
+                self._async_writers.append(waiter)
+            try:
+                await asyncio.wait_for(waiter[1], remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                # Timed out or cancelled waiters must not outlive their loop
+                with self._lock:
+                    _discard(self._async_writers, waiter)
+
+    def _cursor(self, subscriber):
+        # Subscribers that never called subscribe() start at the oldest retained
+        # message, which keeps plain get_messages() callers behaving like a queue.
+        cursor = self._cursors.get(subscriber)
+        if cursor is None:
+            cursor = self._cursors[subscriber] = self._oldest()
+            self._lagged[subscriber] = 0
+            self._delivered[subscriber] = 0
+        oldest = self._oldest()
+        if cursor < oldest:
+            self._lagged[subscriber] += oldest - cursor
+            cursor = self._cursors[subscriber] = oldest
+        return cursor
+
+    def _wait(self, subscriber, timeout):
+        if timeout == 0:
+            return self._head > self._cursor(subscriber)
+        return self._cond.wait_for(lambda: self._head > self._cursor(subscriber), timeout)
+
+    def _advance(self, subscriber, cursor):
+        self._delivered[subscriber] += cursor - self._cursors[subscriber]
+        self._cursors[subscriber] = cursor
+        if self.policy == POLICY_BLOCK:
+            self._not_full.notify_all()
+            if self._async_writers:
+                _wake_all(self._async_writers)
+
+    def get(self, subscriber=None, timeout=None):
+        """Return the subscriber's next message, or None if the timeout expires."""
+        with self._lock:
+            if not self._wait(subscriber, timeout):
+                return None
+            cursor = self._cursor(subscriber)
+            self._advance(subscriber, cursor + 1)
+            return self._buffer[cursor % self.capacity]
+
+    def _read_all(self, subscriber):
+        cursor = self._cursor(subscriber)
+        capacity = self.capacity
+        messages = [self._buffer[seq % capacity] for seq in range(cursor, self._head)]
+        self._advance(subscriber, self._head)
+        return messages
+
+    def get_all(self, subscriber=None, timeout=0):
+        """
+        Return every message the subscriber has not read yet. Blocks until at
+        least one is available (timeout=None waits forever, timeout=0 never waits).
+        """
+        with self._lock:
+            if not self._wait(subscriber, timeout):
+                return []
+            return self._read_all(subscriber)
+
+    async def get_all_async(self, subscriber=None, timeout=None):
+        """Awaitable get_all: suspends the calling task until a message arrives."""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            with self._lock:
+                if self._head > self._cursor(subscriber):
+                    return self._read_all(subscriber)
+                remaining = None if deadline is None else deadline - loop.time()
+                if remaining is not None and remaining <= 0:
+                    return []
+                waiter = (loop, loop.create_future())
+                self._async_readers.append(waiter)
+            try:
+                await asyncio.wait_for(waiter[1], remaining)
+            except asyncio.TimeoutError:
+                return []
+            finally:
+                with self._lock:
+                    _discard(self._async_readers, waiter)
+
+    def stats(self):
+        """Depth, drop counters and per-subscriber backlog for this channel."""
+        with self._lock:
+            oldest = self._oldest()
+            return {
+                'published': self._head,
+                'retained': len(self),
+                'capacity': self.capacity,
+                'policy': self.policy,
+                'depth': self._backlog(),
+                'dropped': dict(self.dropped),
+                'subscribers': {
+                    str(subscriber): {
+                        'pending': self._head - max(cursor, oldest),
+                        'delivered': self._delivered[subscriber],
+                        'lagged': self._lagged[subscriber] + max(0, oldest - cursor),
+                        'critical': subscriber not in self._lossy,
+                    }
+                    for subscriber, cursor in self._cursors.items()
+                },
+            }
+
 
 class MessageBus:
     def __init__(self):
-        # Each channel is just a dictionary where keys are agent names and values are lists of messages.
+        # Each channel name maps to its own ring-buffered Channel.
         self.channels = {}
+        self._lock = threading.Lock()
+        registry.register_bus(self)
 
-    def register_agent(self, agent_name):
-        if agent_name not in self.channels:
-            self.channels[agent_name] = []
-            print(f"MessageBus: Registered agent '{agent_name}'.")
+    def _new_channel(self, agent_name, capacity=None, policy=None):
+        # Explicit arguments win over per-channel overrides, which win over defaults.
+        limits = settings.CHANNEL_LIMITS.get(agent_name, {})
+        return Channel(
+            agent_name,
+            capacity=capacity or limits.get('capacity', settings.CHANNEL_CAPACITY),
+            policy=policy or limits.get('policy', settings.CHANNEL_POLICY),
+            block_timeout=limits.get('block_timeout', settings.CHANNEL_BLOCK_TIMEOUT),
+            shed_watermark=limits.get('shed_watermark', settings.CHANNEL_SHED_WATERMARK),
+        )
 
-    def send_message(self, recipient, message):
-        if recipient in self.channels:
-            self.channels[recipient].append(message)
-        else:
-            print(f"MessageBus: Agent '{recipient}' not registered.")
+    def register_agent(self, agent_name, capacity=None, policy=None):
+        with self._lock:
+            if agent_name in self.channels:
+                return
+            self.channels[agent_name] = self._new_channel(agent_name, capacity, policy)
+        logger.info(f"Registered agent '{agent_name}'.")
 
-    def get_messages(self, agent_name):
-        # Retrieve and clear messages for the agent.
-        messages = self.channels.get(agent_name, [])
-        self.channels[agent_name] = []
-        return messages
+    def _get_channel(self, agent_name):
+        channel = self.channels.get(agent_name)
+        if channel is None:
+            with self._lock:
+                channel = self.channels.get(agent_name)
+                if channel is None:
+                    channel = self.channels[agent_name] = self._new_channel(agent_name)
+        return channel
+
+    def subscribe(self, agent_name, subscriber, critical=True):
+        """
+        Subscribe to a channel so the subscriber sees every message sent to it.
+        Pass critical=False for periodic readers that should not apply back
+        pressure or shedding to the channel (see Channel).
+        """
+        self._get_channel(agent_name).subscribe(subscriber, critical)
+
+    def unsubscribe(self, agent_name, subscriber):
+        self._get_channel(agent_name).unsubscribe(subscriber)
+
+    def send_message(self, recipient, message, value=None):
+        """
+        Send a message to a channel. Pass the swap's `value` to make it eligible
+        for value-aware load shedding. Returns False if the message was dropped.
+        """
+        channel = self.channels.get(recipient)
+        if channel is not None:
+            return channel.put(message, value)
+        logger.warning(f"Agent '{recipient}' not registered.")
+        return False
+
+    async def send_message_async(self, recipient, message, value=None):
+        """Awaitable send_message for agents running on an event loop."""
+        channel = self.channels.get(recipient)
+        if channel is not None:
+            return await channel.put_async(message, value)
+        logger.warning(f"Agent '{recipient}' not registered.")
+        return False
+
+    def get_messages(self, agent_name, timeout=0, subscriber=None):
+        """
+        Retrieve messages the subscriber has not yet read from the channel.
+        Callers without a subscriber share one cursor and consume the channel
+        like a queue. By default this returns immediately; pass a timeout (or
+        None to wait forever) to block until at least one message arrives.
+        """
+        return self._get_channel(agent_name).get_all(subscriber, timeout)
+
+    async def get_messages_async(self, agent_name, timeout=None, subscriber=None):
+        """Awaitable get_messages; waits forever by default."""
+        return await self._get_channel(agent_name).get_all_async(subscriber, timeout)
+
+    def receive(self, agent_name, timeout=None, subscriber=None):
+        """Block until a single message arrives; returns None on timeout."""
+        return self._get_channel(agent_name).get(subscriber, timeout)
+
+    def stats(self):
+        """Snapshot of every channel's counters, keyed by channel name."""
+        return {name: channel.stats() for name, channel in list(self.channels.items())}
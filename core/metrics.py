@@ -0,0 +1,282 @@
+# core/metrics.py
+import asyncio
+import logging
+import weakref
+from core.config import settings
+from core.latency import tracer
+
+logger = logging.getLogger("Metrics")
+
+PREFIX = "pipeline_"
+_QUANTILES = (("0.5", 'p50_us'), ("0.9", 'p90_us'), ("0.99", 'p99_us'), ("0.999", 'p999_us'))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricFamily:
+    """One metric name with its type, help text and labelled samples."""
+
+    __slots__ = ('name', 'type', 'help', 'samples')
+
+    def __init__(self, name, type_, help_):
+        self.name = PREFIX + name
+        self.type = type_
+        self.help = help_
+        self.samples = []
+
+    def add(self, value, suffix="", **labels):
+        self.samples.append((suffix, labels, value))
+        return self
+
+    def render(self, lines):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} {self.type}")
+        for suffix, labels, value in self.samples:
+            label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+            name = self.name + suffix
+            lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+
+class MetricsRegistry:
+    """
+    Collects metrics from the live MessageBus instances and agents at scrape
+    time. Components register themselves when they are created (BaseAgent and
+    MessageBus do so in __init__) and are held weakly, so short-lived buses
+    and agents, e.g. in benchmarks, drop out on their own. Nothing is counted
+    on the hot path here: scraping reads the counters the components already
+    keep, through MessageBus.stats() and each agent's stats(), which nests its
+    components' own stats() (feed connections, dedup, frame log, wallet stores).
+    Extra sources can be added with add_collector(fn), where fn returns an
+    iterable of MetricFamily.
+    """
+
+    def __init__(self):
+        self._buses = weakref.WeakSet()
+        self._agents = weakref.WeakSet()
+        self._collectors = []
+
+    def register_bus(self, bus):
+        self._buses.add(bus)
+
+    def register_agent(self, agent):
+        self._agents.add(agent)
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def collect(self):
+        # Each agent reports its own counters and its components' (see BaseAgent.stats)
+        agents = [(agent.name, agent.stats()) for agent in sorted(self._agents, key=lambda agent: agent.name)]
+        families = [*_bus_metrics(list(self._buses)), *_agent_metrics(agents),
+                    *_wallet_store_metrics(agents), *_latency_metrics()]
+        for collector in self._collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:
+                logger.error(f"Metrics collector {collector!r} failed: {e}", exc_info=True)
+        return families
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for family in self.collect():
+            if family.samples:
+                family.render(lines)
+        return "\n".join(lines) + "\n"
+
+
+def _bus_metrics(buses):
+    published = MetricFamily("channel_published_total", "counter", "Messages sent to the channel (enqueued).")
+    depth = MetricFamily("channel_depth", "gauge", "Unread messages of the channel's slowest critical subscriber.")
+    capacity = MetricFamily("channel_capacity", "gauge", "Ring buffer size of the channel.")
+    dropped = MetricFamily("channel_dropped_total", "counter", "Messages dropped by the channel, by reason.")
+    delivered = MetricFamily("channel_delivered_total", "counter", "Messages read (dequeued) per subscriber.")
+    pending = MetricFamily("channel_pending", "gauge", "Unread messages per subscriber.")
+    lagged = MetricFamily("channel_lagged_total", "counter", "Messages overwritten before a subscriber read them.")
+    for bus in buses:
+        for channel, stats in sorted(bus.stats().items()):
+            published.add(stats['published'], channel=channel)
+            depth.add(stats['depth'], channel=channel)
+            capacity.add(stats['capacity'], channel=channel)
+            for reason, count in stats['dropped'].items():
+                dropped.add(count, channel=channel, reason=reason)
+            for subscriber, sub in stats['subscribers'].items():
+                delivered.add(sub['delivered'], channel=channel, subscriber=subscriber)
+                pending.add(sub['pending'], channel=channel, subscriber=subscriber)
+                lagged.add(sub['lagged'], channel=channel, subscriber=subscriber)
+    return published, depth, capacity, dropped, delivered, pending, lagged
+
+
+def _agent_metrics(agents):
+    handled = MetricFamily("agent_handled_total", "counter", "Messages an agent has handled.")
+    errors = MetricFamily("agent_errors_total", "counter", "Messages whose handling raised an error.")
+    sent = MetricFamily("agent_sent_total", "counter", "Messages an agent has sent, by channel.")
+    rejected = MetricFamily("validation_rejected_total", "counter",
+                            "Swaps rejected by validation, by stage, field and reason.")
+    patterns = MetricFamily("patterns_emitted_total", "counter", "Patterns detected, by channel and type.")
+    oversize = MetricFamily("pattern_shard_oversize_total", "counter",
+                            "Swaps skipped because their record does not fit a shard queue slot.")
+    reconnects = MetricFamily("websocket_reconnects_total", "counter", "Feed connections re-established.")
+    attempts = MetricFamily("websocket_connect_attempts_total", "counter", "Feed connection attempts.")
+    connected = MetricFamily("websocket_connected", "gauge", "1 while the feed websocket is open.")
+    downtime = MetricFamily("websocket_downtime_seconds_total", "counter",
+                            "Time spent reconnecting after a feed connection was lost.")
+    missed = MetricFamily("feed_gap_missed_swaps_total", "counter",
+                          "Swaps likely missed during reconnect gaps (downtime x prior swap rate).")
+    skipped = MetricFamily("feed_frames_skipped_total", "counter", "Non-tx frames discarded before decoding.")
+    undecodable = MetricFamily("feed_decode_errors_total", "counter", "Frames the codec failed to decode.")
+    dedup = MetricFamily("dedup_lookups_total", "counter",
+                         "Transaction-hash dedup lookups: hit (dropped as duplicate) or miss (new).")
+    dedup_entries = MetricFamily("dedup_entries", "gauge", "Transaction hashes in the dedup set (current generation).")
+    dedup_rotations = MetricFamily("dedup_rotations_total", "counter", "Bloom dedup filter generations retired.")
+    alerts = MetricFamily("alerts_total", "counter",
+                          "Alert pipeline: created, coalesced, dispatched, sent and dropped alerts.")
+    alert_messages = MetricFamily("alert_messages_total", "counter", "Outbound alert messages, by target and result.")
+    alert_queued = MetricFamily("alert_queue_depth", "gauge", "Alerts waiting to be sent, per target.")
+    alert_pending = MetricFamily("alerts_pending", "gauge", "Wallet+token alerts still coalescing hits.")
+    frames = MetricFamily("frame_log_frames_total", "counter", "Raw frames written to or dropped by the frame log.")
+    frame_bytes = MetricFamily("frame_log_bytes_total", "counter", "Bytes written to the frame log.")
+    for name, stats in agents:
+        if 'handled' in stats:
+            handled.add(stats['handled'], agent=name)
+            errors.add(stats['errors'], agent=name)
+            for channel, count in sorted(stats['sent'].items()):
+                sent.add(count, agent=name, channel=channel)
+            for (channel, type_), count in sorted(stats['patterns_emitted'].items()):
+                patterns.add(count, agent=name, channel=channel, type=type_)
+        for (stage, field, reason), count in sorted(stats.get('rejections', {}).items()):
+            rejected.add(count, agent=name, stage=stage, field=field, reason=reason)
+        if 'oversize' in stats:
+            oversize.add(stats['oversize'], agent=name)
+        for connection, feed in stats.get('connections', {}).items():
+            reconnects.add(feed['reconnects'], agent=name, connection=connection)
+            attempts.add(feed['connect_attempts'], agent=name, connection=connection)
+            connected.add(int(feed['state'] == "connected"), agent=name, connection=connection)
+            downtime.add(round(feed['downtime_seconds'], 3), agent=name, connection=connection)
+            missed.add(round(feed['missed_estimate'], 1), agent=name, connection=connection)
+        if 'frames_skipped' in stats:
+            skipped.add(stats['frames_skipped'], agent=name)
+            undecodable.add(stats['decode_errors'], agent=name)
+        seen = stats.get('dedup')
+        if seen is not None:
+            dedup.add(seen['hits'], agent=name, result="hit")
+            dedup.add(seen['misses'], agent=name, result="miss")
+            dedup_entries.add(seen['size'], agent=name)
+            if 'rotations' in seen:
+                dedup_rotations.add(seen['rotations'], agent=name)
+        if 'alerts' in stats:
+            for result, count in sorted(stats['alerts'].items()):
+                alerts.add(count, agent=name, result=result)
+            for target, sink in stats['targets'].items():
+                alert_messages.add(sink['sent'], agent=name, target=target, result="sent")
+                alert_messages.add(sink['errors'], agent=name, target=target, result="error")
+                alert_queued.add(sink['queued'], agent=name, target=target)
+            alert_pending.add(stats['pending'], agent=name)
+        frame_log = stats.get('frame_log')
+        if frame_log is not None:
+            frames.add(frame_log['written'], agent=name, result="written")
+            frames.add(frame_log['dropped'], agent=name, result="dropped")
+            frame_bytes.add(frame_log['bytes_written'], agent=name)
+    return (handled, errors, sent, rejected, patterns, oversize, reconnects, attempts, connected, downtime, missed, skipped, undecodable,
+            dedup, dedup_entries, dedup_rotations, alerts, alert_messages, alert_queued, alert_pending,
+            frames, frame_bytes)
+
+
+def _wallet_store_metrics(agents):
+    wallets = MetricFamily("wallet_store_wallets", "gauge", "Wallets tracked by the store.")
+    events = MetricFamily("wallet_store_events", "gauge", "Events held across the store's wallet logs.")
+    ingested = MetricFamily("wallet_store_ingested_total", "counter", "Transactions ingested by the store.")
+    evicted = MetricFamily("wallet_store_evicted_total", "counter", "Wallets evicted, by reason.")
+    late = MetricFamily("wallet_store_late_total", "counter", "Transactions dropped for arriving behind the event-time watermark.")
+    estimated = MetricFamily("wallet_store_estimated_bytes", "gauge", "Estimated wallet state footprint.")
+    # The pattern agents usually share one store; report each store once.
+    # Sharded pattern agents report the stores their worker processes own.
+    stores = {}
+    for _, agent_stats in agents:
+        for name, stats in agent_stats.get('wallet_stores', {}).items():
+            stores.setdefault(name, stats)
+    for name, stats in stores.items():
+        wallets.add(stats['wallets'], store=name)
+        events.add(stats['events'], store=name)
+        ingested.add(stats['ingested'], store=name)
+        evicted.add(stats['evicted_idle'], store=name, reason="idle")
+        evicted.add(stats['evicted_budget'], store=name, reason="budget")
+        late.add(stats['late'], store=name)
+        estimated.add(stats['estimated_bytes'], store=name)
+    return wallets, events, ingested, evicted, late, estimated
+
+
+def _latency_metrics():
+    latency = MetricFamily("latency_seconds", "summary",
+                           "Traced swap latency: ingest->send per channel, wait per channel, time per stage.")
+    traced = MetricFamily("latency_traced_total", "counter", "Swaps sampled for latency tracing, or skipped.")
+    traced.add(tracer.traced, result="traced")
+    traced.add(tracer.skipped, result="skipped")
+    for key, histogram in sorted(tracer.histograms.items()):
+        kind, _, name = key.partition(':')
+        summary = histogram.summary()
+        for quantile, field in _QUANTILES:
+            latency.add(summary[field] / 1e6, kind=kind, name=name, quantile=quantile)
+        latency.add(histogram.total / 1e9, "_sum", kind=kind, name=name)
+        latency.add(histogram.count, "_count", kind=kind, name=name)
+    return latency, traced
+
+
+# Process-wide registry that agents and buses report into, like `settings`
+registry = MetricsRegistry()
+
+
+class MetricsServer:
+    """
+    Serves the registry as Prometheus text on http://host:port/metrics. A
+    minimal HTTP/1.0 responder on the agents' event loop: scrapes are rare and
+    cheap, so it needs no thread or web framework. Binds to localhost by default.
+    """
+
+    def __init__(self, metrics=None, host=None, port=None):
+        self.name = "MetricsServer"
+        self.registry = metrics or registry
+        self.host = host or settings.METRICS_HOST
+        self.port = settings.METRICS_PORT if port is None else port
+        self._server = None
+
+    async def _respond(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readline(), timeout=5.0)
+            # Skip the headers; the request line is all that matters
+            while (await asyncio.wait_for(reader.readline(), timeout=5.0)).strip():
+                pass
+            parts = request.decode('latin-1').split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split('?')[0] in ("/metrics", "/"):
+                status, body = "200 OK", self.registry.render().encode()
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                status, body, content_type = "404 Not Found", b"Not found\n", "text/plain"
+            writer.write(f"HTTP/1.0 {status}\r\nContent-Type: {content_type}\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            logger.debug(f"Metrics request failed: {e}")
+        except Exception as e:
+            logger.error(f"Error serving metrics: {e}", exc_info=True)
+        finally:
+            writer.close()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._respond, self.host, self.port)
+        logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def run(self):
+        """
+        Entry point for AgentRuntime: serve until cancelled. If the port cannot
+        be bound the error is logged and the agents carry on without metrics.
+        """
+        try:
+            await self.start()
+        except OSError as e:
+            logger.error(f"Could not serve metrics on {self.host}:{self.port}: {e}")
+            return
+        async with self._server:
+            await self._server.serve_forever()
@@ -0,0 +1,48 @@
+# core/rate_limit.py
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter: up to `burst` operations at once, then `rate`
+    per second on average. `rate` 0 means unlimited. acquire() suspends only
+    the awaiting coroutine, so a rate-limited sender never holds up the loop.
+    """
+
+    def __init__(self, rate, burst=1, clock=time.monotonic):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.clock = clock
+        self.tokens = float(self.burst)
+        self.updated = clock()
+        self.waits = 0              # acquire() calls that had to wait for a token
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        """Take a token if one is available."""
+        if not self.rate:
+            return True
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def delay(self):
+        """Seconds until the next token is available (0 if one is now)."""
+        if not self.rate:
+            return 0.0
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    async def acquire(self):
+        if self.try_acquire():
+            return
+        self.waits += 1
+        while not self.try_acquire():
+            await asyncio.sleep(self.delay())
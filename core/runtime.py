@@ -0,0 +1,33 @@
+# core/runtime.py
+import asyncio
+import logging
+
+logger = logging.getLogger("AgentRuntime")
+
+
+class AgentRuntime:
+    """
+    Schedules every agent as a task on a single asyncio event loop.
+    Agents must expose `async def run()` (see AsyncBaseAgent and CieloAgent);
+    they exchange messages through the bus' awaitable send/receive, so a
+    message is picked up by the next stage as soon as it is sent.
+    """
+
+    def __init__(self, agents):
+        self.agents = list(agents)
+
+    async def run(self):
+        tasks = [asyncio.create_task(agent.run(), name=agent.name) for agent in self.agents]
+        logger.info(f"AgentRuntime started {len(tasks)} agents on one event loop.")
+        try:
+            await asyncio.gather(*tasks)
+        except Exception as e:
+            logger.error(f"Agent task failed, stopping runtime: {e}", exc_info=True)
+            raise
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def start(self):
+        asyncio.run(self.run())
@@ -0,0 +1,72 @@
+# core/shm_queue.py
+import multiprocessing
+import struct
+from multiprocessing import shared_memory
+
+_LENGTH = struct.Struct("<H")
+
+
+class SharedMemoryQueue:
+    """
+    Single-producer/single-consumer queue of byte records between two processes.
+
+    Records live in fixed-size slots of one multiprocessing.shared_memory block,
+    so handing a message to another process is a memcpy into the ring rather
+    than pickling it through a pipe. Two semaphores count free and filled slots;
+    each side only advances its own index, so no further locking is needed.
+    Pass the queue to the child process as a Process argument.
+    """
+
+    def __init__(self, slots=4096, slot_size=256, ctx=None):
+        ctx = ctx or multiprocessing
+        self.slots = slots
+        self.slot_size = slot_size
+        self.max_record_size = slot_size - _LENGTH.size
+        self._shm = shared_memory.SharedMemory(create=True, size=slots * slot_size)
+        self._owner = True
+        self._items = ctx.Semaphore(0)
+        self._spaces = ctx.Semaphore(slots)
+        self._head = 0  # Next slot to read (consumer side)
+        self._tail = 0  # Next slot to write (producer side)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_shm'] = self._shm.name
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Child processes share the creator's resource tracker, which unlinks
+        # the block if the creator dies without calling close().
+        self._shm = shared_memory.SharedMemory(name=state['_shm'])
+        self._owner = False
+
+    def put(self, record, timeout=None):
+        """Copy a record into the next free slot. Returns False if none frees up in time."""
+        size = len(record)
+        if size > self.max_record_size:
+            raise ValueError(f"Record of {size} bytes does not fit a {self.slot_size}-byte slot")
+        if not self._spaces.acquire(timeout=timeout):
+            return False
+        offset = (self._tail % self.slots) * self.slot_size
+        _LENGTH.pack_into(self._shm.buf, offset, size)
+        self._shm.buf[offset + _LENGTH.size:offset + _LENGTH.size + size] = record
+        self._tail += 1
+        self._items.release()
+        return True
+
+    def get(self, timeout=None):
+        """Return the next record, or None if nothing arrives within the timeout."""
+        if not self._items.acquire(timeout=timeout):
+            return None
+        offset = (self._head % self.slots) * self.slot_size
+        (size,) = _LENGTH.unpack_from(self._shm.buf, offset)
+        record = bytes(self._shm.buf[offset + _LENGTH.size:offset + _LENGTH.size + size])
+        self._head += 1
+        self._spaces.release()
+        return record
+
+    def close(self):
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
@@ -0,0 +1,138 @@
+# core/sorted_buffer.py
+import heapq
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from operator import itemgetter
+
+
+def timestamp_key(transaction):
+    # Transactions without a valid timestamp sort first
+    return transaction.timestamp_ns or 0
+
+
+@dataclass(frozen=True)
+class SortedDelta:
+    """
+    Change to a SortedBuffer since the previous delta. Positions are absolute:
+    they keep counting as old transactions are trimmed off the front.
+    A consumer replaces everything from `start` on with `transactions`, then
+    drops everything before `first`. A snapshot carries the whole buffer.
+    """
+    seq: int                # Consecutive per buffer; a gap means a delta was missed
+    start: int
+    transactions: tuple
+    first: int
+    snapshot: bool = False
+
+
+class SortedBuffer:
+    """
+    Bounded, time-ordered transaction buffer that reports what changed.
+
+    New transactions are sorted as a batch and merged into the tail from the
+    first position they affect, so in-order arrivals are a plain append and
+    only the out-of-order stretch is rewritten. The buffer keeps at most
+    `max_size` transactions and, with `retention_ns`, only those within that
+    long of the newest one.
+    """
+
+    def __init__(self, max_size, retention_ns=0, key=timestamp_key):
+        self.max_size = max_size
+        self.retention_ns = retention_ns
+        self.key = key
+        self._items = []
+        self._keys = []             # key(item) for each item, for bisecting
+        self._base = 0              # Absolute position of _items[0]
+        self._dirty_from = None     # Absolute position of the first change since the last delta
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def insert_many(self, transactions):
+        if not transactions:
+            return
+        key = self.key
+        batch = sorted(transactions, key=key)
+        batch_keys = [key(tx) for tx in batch]
+        pos = bisect_right(self._keys, batch_keys[0])
+        if pos == len(self._items):
+            self._items.extend(batch)
+            self._keys.extend(batch_keys)
+        else:
+            # Merge the affected tail with the batch; earlier entries win ties,
+            # as a stable sort of the whole buffer would order them
+            merged = list(heapq.merge(zip(self._keys[pos:], self._items[pos:]),
+                                      zip(batch_keys, batch), key=itemgetter(0)))
+            del self._keys[pos:], self._items[pos:]
+            self._keys.extend(k for k, _ in merged)
+            self._items.extend(tx for _, tx in merged)
+        changed = self._base + pos
+        self._dirty_from = changed if self._dirty_from is None else min(self._dirty_from, changed)
+        self._trim()
+
+    def _trim(self):
+        drop = len(self._items) - self.max_size
+        if self.retention_ns and self._keys:
+            drop = max(drop, bisect_left(self._keys, self._keys[-1] - self.retention_ns))
+        if drop > 0:
+            del self._items[:drop], self._keys[:drop]
+            self._base += drop
+            if self._dirty_from is not None:
+                self._dirty_from = max(self._dirty_from, self._base)
+
+    def delta(self):
+        """Changes since the previous delta, or None if nothing changed."""
+        if self._dirty_from is None:
+            return None
+        start = self._dirty_from
+        self._dirty_from = None
+        self._seq += 1
+        return SortedDelta(self._seq, start, tuple(self._items[start - self._base:]), self._base)
+
+    def snapshot(self):
+        """The whole buffer as a delta; also settles any pending changes."""
+        self._dirty_from = None
+        self._seq += 1
+        return SortedDelta(self._seq, self._base, tuple(self._items), self._base, snapshot=True)
+
+
+class SortedView:
+    """Consumer-side copy of a SortedBuffer, kept current by applying its deltas."""
+
+    def __init__(self):
+        self.items = []
+        self._base = 0
+        self._seq = None
+
+    def __len__(self):
+        return len(self.items)
+
+    def apply(self, delta):
+        """
+        Apply a delta and return (removed, added) transactions, or None when the
+        view cannot be brought up to date (a missed delta, or no snapshot yet)
+        and the consumer should request a snapshot.
+        """
+        if delta.snapshot:
+            removed, self.items = self.items, list(delta.transactions)
+            self._base = delta.first
+            self._seq = delta.seq
+            return removed, delta.transactions
+        if self._seq is None or delta.seq != self._seq + 1:
+            return None
+        # Rebase to `first` before replacing the tail: trimming may have gone
+        # past everything the view holds, in which case it starts over empty
+        drop = min(delta.first, self._base + len(self.items)) - self._base
+        removed = self.items[:drop]
+        del self.items[:drop]
+        self._base = delta.first
+        cut = delta.start - self._base
+        removed += self.items[cut:]
+        del self.items[cut:]
+        self.items.extend(delta.transactions)
+        self._seq = delta.seq
+        return removed, delta.transactions
@@ -0,0 +1,98 @@
+# core/timer_wheel.py
+import math
+import sys
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel for expiring many keys with coarse deadlines.
+
+    Keys hash into one of `slots` buckets by deadline tick. Moving a key's
+    deadline is an O(1) dict update: the key stays in its old bucket and is
+    re-filed when that bucket comes round, so frequently refreshed keys cost
+    nothing until they actually go quiet. Deadlines further away than one
+    revolution simply survive the pass and are re-filed, as are keys whose
+    deadline was pushed back since they were filed.
+
+    Bucket entries carry the generation they were filed under. Cancelling a
+    key, or filing it again for an earlier deadline, leaves its old entry
+    behind; the entry no longer matches the key's generation and is dropped
+    when its bucket fires, so a key is never expired or re-filed twice.
+    """
+
+    def __init__(self, tick=1.0, slots=4096):
+        self.tick = tick
+        self.slots = slots
+        self._buckets = [set() for _ in range(slots)]
+        self._deadlines = {}            # key -> current deadline
+        self._filed = {}                # key -> generation of its live bucket entry
+        self._generation = 0
+        self._current = None            # Last tick advance() processed
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def __contains__(self, key):
+        return key in self._deadlines
+
+    def _tick_of(self, when):
+        return math.floor(when / self.tick)
+
+    def schedule(self, key, deadline):
+        """Expire `key` at `deadline`, replacing its previous deadline."""
+        previous = self._deadlines.get(key)
+        if previous is None or deadline < previous:
+            # Later deadlines are picked up when the old bucket comes round
+            self._file(key, deadline)
+        self._deadlines[key] = deadline
+
+    def _file(self, key, deadline):
+        tick = self._tick_of(deadline)
+        if self._current is not None and tick <= self._current:
+            tick = self._current + 1    # Already due: pick it up on the next advance
+        self._generation += 1
+        self._filed[key] = self._generation
+        self._buckets[tick % self.slots].add((key, self._generation))
+
+    def cancel(self, key):
+        # The bucket entry is dropped lazily when its slot comes round
+        self._deadlines.pop(key, None)
+        self._filed.pop(key, None)
+
+    @staticmethod
+    def key_bytes(samples=4096):
+        """Approximate bytes a scheduled key adds to the wheel, not counting the key itself."""
+        keys = range(samples)
+        dict_entry = (sys.getsizeof(dict.fromkeys(keys)) - sys.getsizeof({})) / samples
+        set_entry = (sys.getsizeof(set(keys)) - sys.getsizeof(set())) / samples
+        # Deadline and generation dict entries, the bucket's (key, generation) entry and the numbers
+        return int(2 * dict_entry + set_entry + sys.getsizeof((None, 0))
+                   + sys.getsizeof(0.0) + sys.getsizeof(2 ** 40))
+
+    def advance(self, now):
+        """Return the keys whose deadline is <= now, removing them from the wheel."""
+        target = self._tick_of(now)
+        if self._current is None:
+            self._current = target - 1
+        expired = []
+        # After a long pause every bucket is visited once, not once per missed tick
+        first = max(self._current + 1, target - self.slots + 1)
+        for tick in range(first, target + 1):
+            bucket = self._buckets[tick % self.slots]
+            if not bucket:
+                continue
+            self._buckets[tick % self.slots] = set()
+            for entry in bucket:
+                key, generation = entry
+                if self._filed.get(key) != generation:
+                    continue                        # Cancelled or filed again since
+                deadline = self._deadlines[key]
+                if deadline <= now:
+                    del self._deadlines[key]
+                    del self._filed[key]
+                    expired.append(key)
+                else:
+                    refile = self._tick_of(deadline)
+                    self._buckets[max(refile, target + 1) % self.slots].add(entry)
+        self._current = max(self._current, target)
+        return expired
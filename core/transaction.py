@@ -0,0 +1,118 @@
+# core/transaction.py
+from datetime import datetime
+
+NS_PER_SECOND = 1_000_000_000
+
+
+def parse_timestamp_ns(timestamp):
+    """
+    Convert a feed timestamp (epoch seconds or an ISO-8601 string) to epoch
+    nanoseconds. Returns None if the value is missing or not a valid time.
+    Naive ISO strings are interpreted as local time, like datetime.timestamp().
+    """
+    try:
+        if isinstance(timestamp, str):
+            seconds = datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp()
+        elif isinstance(timestamp, (int, float)):
+            # Reject values datetime cannot represent, as the validators always have
+            datetime.fromtimestamp(timestamp)
+            if isinstance(timestamp, int):
+                return timestamp * NS_PER_SECOND
+            seconds = timestamp
+        else:
+            return None
+        return int(seconds * NS_PER_SECOND)
+    except (ValueError, OverflowError, OSError):
+        return None
+
+
+class Transaction:
+    """
+    A swap as it travels through the pipeline, parsed once at ingestion.
+
+    Fields hold typed values (epoch-ns timestamp, float value, str addresses)
+    or None when the feed omitted the field or sent it with the wrong type;
+    validators reject on None instead of re-checking the raw payload. Agents
+    never mutate a Transaction, because every subscriber of a channel shares
+    the same object: pattern results are attached to a copy via with_patterns().
+    """
+
+    __slots__ = (
+        'timestamp_ns',
+        'value',
+        'token_address',
+        'wallet_address',
+        'transaction_hash',
+        'tx_type',
+        'chain',
+        'transaction_type',
+        'patterns',
+        'trace',
+    )
+
+    def __init__(self, timestamp_ns=None, value=None, token_address=None, wallet_address=None,
+                 transaction_hash=None, tx_type=None, chain=None, transaction_type=None, patterns=None,
+                 trace=None):
+        self.timestamp_ns = timestamp_ns
+        self.value = value
+        self.token_address = token_address
+        self.wallet_address = wallet_address
+        self.transaction_hash = transaction_hash
+        self.tx_type = tx_type
+        self.chain = chain
+        self.transaction_type = transaction_type
+        self.patterns = patterns or {}
+        self.trace = trace          # core.latency.Trace when this swap is sampled for latency tracing
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a Transaction from a decoded Cielo `tx` payload."""
+        value = data.get('value')
+        return cls(
+            timestamp_ns=parse_timestamp_ns(data.get('timestamp')),
+            value=float(value) if isinstance(value, (int, float)) else None,
+            token_address=_str_or_none(data.get('token_address')),
+            wallet_address=_str_or_none(data.get('wallet_address')),
+            transaction_hash=_str_or_none(data.get('transaction_hash')),
+            tx_type=_str_or_none(data.get('tx_type')),
+            chain=_str_or_none(data.get('chain')),
+            transaction_type=_str_or_none(data.get('transaction_type')),
+        )
+
+    @property
+    def timestamp(self):
+        """Epoch seconds as a float, or None."""
+        return None if self.timestamp_ns is None else self.timestamp_ns / NS_PER_SECOND
+
+    def with_patterns(self, **patterns):
+        """Return a copy carrying these pattern results in addition to existing ones."""
+        copy = Transaction.__new__(Transaction)
+        for slot in self.__slots__:
+            setattr(copy, slot, getattr(self, slot))
+        copy.patterns = {**self.patterns, **patterns}
+        if self.trace is not None:
+            copy.trace = self.trace.fork()
+        return copy
+
+    def to_dict(self):
+        """Plain dict (epoch-second timestamp) for logs, files and outbound alerts."""
+        data = {
+            'timestamp': self.timestamp,
+            'value': self.value,
+            'token_address': self.token_address,
+            'wallet_address': self.wallet_address,
+            'transaction_hash': self.transaction_hash,
+            'tx_type': self.tx_type,
+            'chain': self.chain,
+            'transaction_type': self.transaction_type,
+        }
+        data.update(self.patterns)
+        return data
+
+    def __repr__(self):
+        return (f"Transaction(hash={self.transaction_hash!r}, wallet={self.wallet_address!r}, "
+                f"token={self.token_address!r}, value={self.value!r}, ts_ns={self.timestamp_ns!r})")
+
+
+def _str_or_none(value):
+    return value if isinstance(value, str) else None
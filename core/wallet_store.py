@@ -0,0 +1,292 @@
+# core/wallet_store.py
+import bisect
+import logging
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from core.clock import make_clock
+from core.config import settings
+from core.timer_wheel import TimerWheel
+from core.wallet_window import EventLog, WalletWindow
+
+_ADDRESS_CHARS = 44                     # Longest wallet address (base58 Solana; EVM ones are 42)
+_POINTER_BYTES = struct.calcsize('P')   # One list slot
+
+
+class WalletState:
+    """One wallet's event log plus a WalletWindow per registered window length."""
+
+    __slots__ = ('log', 'windows')
+
+    def __init__(self, window_lengths):
+        self.log = EventLog()
+        self.windows = {seconds: WalletWindow(seconds, self.log) for seconds in window_lengths}
+
+    def insert(self, event, watermark):
+        """
+        Insert an event older than the log's newest at its own time. The log is
+        append-only, so the wallet's live events are re-appended in order and
+        every window rebuilt over them; O(events held), paid only on reordering.
+        """
+        log = self.log
+        events = [log[seq] for seq in range(log.start, log.end)]
+        events.insert(bisect.bisect_right([timestamp for timestamp, _, _ in events], event[0]), event)
+        self.log = EventLog()
+        for queued in events:
+            self.log.append(queued)
+        self.windows = {seconds: WalletWindow(seconds, self.log) for seconds in self.windows}
+        for window in self.windows.values():
+            window.advance(watermark)
+
+
+class WalletStore:
+    """
+    Per-wallet transaction history shared by the pattern agents.
+
+    Each transaction is ingested once into its wallet's EventLog; agents read
+    it through windows of the lengths they registered (e.g. 1 h and 2 h), each
+    keeping its own incremental statistics over the same events. The log only
+    retains what the longest window still covers.
+
+    The pipeline feeds it through PatternPipeline, which ingests each
+    transaction and runs every agent on it before the next, so analyses see
+    exactly the history up to their own transaction. A pattern agent running
+    on its own can instead use a store attached to a message bus, which
+    ingests from its own cursor on a channel: the agent calls sync(until=msg)
+    before reading. Agents sharing such a store judge each message against
+    whatever the fastest of them has pulled in, which during a burst includes
+    later transactions; main.py therefore uses the pipeline. All access goes
+    through `lock` so agents on other threads can share the store. Across
+    processes the store is partitioned rather than shared: each wallet-sharded
+    worker (see ShardedPatternAgent) owns the stores for its wallets.
+
+    Events are stamped and windows evicted by `clock` (core.clock): by default
+    the transaction's own timestamp, with eviction following the watermark.
+    A transaction older than its wallet's newest event is inserted at its own
+    time; one older than the watermark is dropped and counted in `late`, since
+    every window has already moved past it.
+
+    State stays bounded over weeks of one-shot wallets. A timer wheel drops a
+    wallet once its last event has left the longest window, and when the
+    estimated footprint exceeds `max_bytes` the least recently active wallets
+    are evicted first. Both are counted in stats().
+    """
+
+    def __init__(self, name="WalletStore", clock=None, max_bytes=None):
+        self.name = name
+        self.logger = logging.getLogger(name)
+        self.clock = clock or make_clock()     # core.clock: event time or wall time
+        self.lock = threading.RLock()
+        self.wallets = OrderedDict()    # Least recently active first
+        self.window_lengths = set()
+        self.max_bytes = settings.WALLET_STORE_MAX_BYTES if max_bytes is None else max_bytes
+        self.expiry = TimerWheel(tick=settings.WALLET_EXPIRY_TICK)
+        self.events = 0                 # Events held across all wallet logs
+        self.ingested = 0
+        self.evicted_idle = 0
+        self.evicted_budget = 0
+        self.late = 0                   # Dropped for arriving behind the watermark
+        self.reordered = 0              # Inserted before their wallet's newest event
+        self._wallet_bytes = self._event_bytes = 0
+        self.report_interval = settings.WALLET_STORE_REPORT_INTERVAL
+        self._last_report = time.monotonic()
+        self._message_bus = None
+        self._channel = None
+        self._synced = OrderedDict()    # Key -> transaction sync() ingested, newest last
+        self._synced_limit = 0
+
+    def attach(self, message_bus, channel):
+        """Ingest every transaction published on `channel` from now on (see sync())."""
+        self._message_bus = message_bus
+        self._channel = channel
+        message_bus.subscribe(channel, self.name)
+        # A reader on the channel cannot be more than a ring buffer behind the store
+        self._synced_limit = message_bus.channels[channel].capacity
+
+    def register_window(self, seconds):
+        """Make a window of this length available for every wallet."""
+        with self.lock:
+            if seconds in self.window_lengths:
+                return
+            self.window_lengths.add(seconds)
+            watermark = self.clock.watermark()
+            for state in self.wallets.values():
+                window = state.windows[seconds] = WalletWindow(seconds, state.log)
+                window.advance(watermark)
+            self._calibrate()
+
+    def _calibrate(self):
+        # Footprint of an empty wallet and of one more event, for the budget check
+        state = WalletState(self.window_lengths)
+        samples = 4096
+        wallets_entry = (sys.getsizeof(OrderedDict.fromkeys(range(samples))) - sys.getsizeof(OrderedDict())) / samples
+        # A wallet: its address, state, empty log and windows, and its entries in
+        # `wallets` and the expiry wheel
+        self._wallet_bytes = int(sys.getsizeof('x' * _ADDRESS_CHARS) + sys.getsizeof(state)
+                                 + wallets_entry + TimerWheel.key_bytes()
+                                 + state.log.memory_usage()
+                                 + sum(window.memory_usage() for window in state.windows.values()))
+        # An event: its (timestamp, value, type) tuple, two floats and a log slot, plus
+        # about two monotonic-queue entries per window, each a (seq, value) tuple, a seq and a slot
+        queue_entry = sys.getsizeof((0, 0.0)) + sys.getsizeof(2 ** 40) + _POINTER_BYTES
+        self._event_bytes = (sys.getsizeof((0.0, 0.0, None)) + 2 * sys.getsizeof(0.0) + _POINTER_BYTES
+                             + 2 * queue_entry * len(self.window_lengths))
+
+    def sync(self, until=None):
+        """
+        Ingest what the attached channel has published since the last call. With
+        `until`, stop once that transaction (or a copy of it) has been ingested,
+        so the caller does not see transactions queued behind the one it handles;
+        if an earlier call already ingested it, nothing more is read.
+        """
+        if self._message_bus is None:
+            return 0
+        ingested = 0
+        with self.lock:
+            if until is None:
+                messages = self._message_bus.get_messages(self._channel, timeout=0, subscriber=self.name)
+                for msg in messages:
+                    self._ingest_synced(msg)
+                ingested = len(messages)
+            elif self._synced.get(self._sync_key(until)) is not None:
+                return 0
+            else:
+                key = self._sync_key(until)
+                while True:
+                    msg = self._message_bus.receive(self._channel, timeout=0, subscriber=self.name)
+                    if msg is None:
+                        break
+                    self._ingest_synced(msg)
+                    ingested += 1
+                    if msg is until or self._sync_key(msg) == key:
+                        break
+        return ingested
+
+    @staticmethod
+    def _sync_key(transaction):
+        # Copies of a transaction (e.g. from VolumePatternChannel) share its hash
+        return transaction.transaction_hash or id(transaction)
+
+    def _ingest_synced(self, transaction):
+        self.ingest(transaction)
+        # Holding the transaction keeps its id() from being reused while remembered
+        self._synced[self._sync_key(transaction)] = transaction
+        if len(self._synced) > self._synced_limit:
+            self._synced.popitem(last=False)
+
+    def ingest(self, transaction):
+        wallet = transaction.wallet_address
+        if wallet is None:
+            return
+        with self.lock:
+            # Windows have evicted up to the watermark as it stood before this transaction
+            horizon = self.clock.watermark()
+            timestamp = self.clock.observe(transaction)
+            watermark = self.clock.watermark()
+            self._expire_idle(watermark)
+            if timestamp < horizon:
+                self.late += 1
+                return
+            event = (timestamp, transaction.value, transaction.transaction_type or 'unknown')
+            state = self.wallets.get(wallet)
+            if state is None:
+                state = self.wallets[wallet] = WalletState(self.window_lengths)
+            else:
+                self.wallets.move_to_end(wallet)
+            if len(state.log) and timestamp < state.log[state.log.end - 1][0]:
+                state.insert(event, watermark)
+                self.reordered += 1
+            else:
+                state.log.append(event)
+            self.events += 1
+            for window in state.windows.values():
+                window.advance(watermark)
+            # Events every window has moved past are no longer needed
+            self.events -= state.log.discard_before(min((window.start for window in state.windows.values()),
+                                                        default=state.log.end))
+            self.expiry.schedule(wallet, state.log[state.log.end - 1][0] + max(self.window_lengths, default=0))
+            self.ingested += 1
+            if self.max_bytes:
+                self._enforce_budget()
+        if self.report_interval and time.monotonic() - self._last_report >= self.report_interval:
+            self.report()
+
+    def _drop(self, wallet):
+        state = self.wallets.pop(wallet)
+        self.events -= len(state.log)
+
+    def _expire_idle(self, watermark):
+        # Wallets whose newest event has left every window hold nothing useful
+        if watermark == float('-inf'):
+            return
+        for wallet in self.expiry.advance(watermark):
+            if wallet in self.wallets:
+                self._drop(wallet)
+                self.evicted_idle += 1
+
+    def estimated_bytes(self):
+        """O(1) estimate of the footprint that the budget is enforced against."""
+        return len(self.wallets) * self._wallet_bytes + self.events * self._event_bytes
+
+    def _enforce_budget(self):
+        # Least recently active first; the wallet just ingested is last and kept
+        while len(self.wallets) > 1 and self.estimated_bytes() > self.max_bytes:
+            wallet = next(iter(self.wallets))
+            self._drop(wallet)
+            self.expiry.cancel(wallet)
+            self.evicted_budget += 1
+
+    def window(self, wallet_address, seconds):
+        """The wallet's window of this registered length as of now (empty for unknown wallets)."""
+        with self.lock:
+            state = self.wallets.get(wallet_address)
+            if state is None:
+                return WalletWindow(seconds)
+            window = state.windows[seconds]
+            window.advance(self.clock.watermark())
+            return window
+
+    def __len__(self):
+        return len(self.wallets)
+
+    def memory_usage(self):
+        """Approximate bytes held by wallet state (logs, events and windows); walks every wallet."""
+        with self.lock:
+            total = sys.getsizeof(self.wallets)
+            for address, state in self.wallets.items():
+                total += sys.getsizeof(address) + sys.getsizeof(state) + state.log.memory_usage()
+                total += sum(window.memory_usage() for window in state.windows.values())
+            return total
+
+    def report(self):
+        """Log the store's size and estimated footprint; O(1), so it is safe on the event loop."""
+        self._last_report = time.monotonic()
+        stats = self.stats()
+        self.logger.info(f"[{self.name}] {stats['wallets']} wallets, {stats['events']} events, "
+                         f"~{stats['estimated_bytes'] / 1e6:.1f} MB estimated, evicted {stats['evicted_idle']} idle "
+                         f"and {stats['evicted_budget']} over budget")
+
+    def stats(self, measure=False):
+        """
+        Snapshot of the store's size, for logs and monitoring. With `measure`
+        it also includes `memory_bytes` from memory_usage(), which walks every
+        wallet and event; use it on demand, not periodically.
+        """
+        with self.lock:
+            stats = {
+                'wallets': len(self.wallets),
+                'events': self.events,
+                'windows': sorted(self.window_lengths),
+                'ingested': self.ingested,
+                'evicted_idle': self.evicted_idle,
+                'evicted_budget': self.evicted_budget,
+                'late': self.late,
+                'reordered': self.reordered,
+                'estimated_bytes': self.estimated_bytes(),
+                'max_bytes': self.max_bytes,
+            }
+            if measure:
+                stats['memory_bytes'] = self.memory_usage()
+            return stats
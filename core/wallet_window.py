@@ -0,0 +1,278 @@
+# core/wallet_window.py
+import operator
+import sys
+
+
+class _MonotonicQueue:
+    """Sliding-window min or max: amortized O(1) push, expire and peek."""
+
+    # A list with a head index rather than a deque: an empty deque costs ~760
+    # bytes, and every wallet carries four of these per window
+    __slots__ = ('_items', '_head', '_keep')
+
+    def __init__(self, largest):
+        self._items = []        # (seq, value) from _head on, values monotonic from the front
+        self._head = 0
+        self._keep = operator.gt if largest else operator.lt
+
+    def __len__(self):
+        return len(self._items) - self._head
+
+    def push(self, seq, value):
+        items = self._items
+        while len(items) > self._head and not self._keep(items[-1][1], value):
+            items.pop()
+        items.append((seq, value))
+
+    def expire(self, seq):
+        items = self._items
+        if len(items) > self._head and items[self._head][0] == seq:
+            self._head += 1
+            if self._head * 2 >= len(items):
+                del items[:self._head]
+                self._head = 0
+
+    def peek(self):
+        return self._items[self._head][1] if len(self._items) > self._head else None
+
+    def memory_usage(self):
+        # Each entry is a (seq, value) tuple and a seq int; values are shared with the log
+        return sys.getsizeof(self._items) + len(self) * (sys.getsizeof((0, 0.0)) + sys.getsizeof(2 ** 40))
+
+
+class EventLog:
+    """
+    Append-only list of (timestamp, value, type) events addressed by sequence
+    number, shared by every WalletWindow over the same wallet. Events before the
+    oldest window's start are discarded in amortized O(1).
+    """
+
+    __slots__ = ('_events', '_offset', '_head')
+
+    def __init__(self):
+        self._events = []
+        self._offset = 0                    # Sequence number of _events[0]
+        self._head = 0                      # Index of the first live event
+
+    def __len__(self):
+        return len(self._events) - self._head
+
+    def __getitem__(self, seq):
+        return self._events[seq - self._offset]
+
+    @property
+    def start(self):
+        return self._offset + self._head
+
+    @property
+    def end(self):
+        return self._offset + len(self._events)
+
+    def append(self, event):
+        self._events.append(event)
+
+    def memory_usage(self):
+        """Approximate bytes held: the list plus each live event tuple and its floats."""
+        total = sys.getsizeof(self._events)
+        for timestamp, value, _ in self._events[self._head:]:
+            # Type strings are shared literals and not counted
+            total += sys.getsizeof((timestamp, value, None)) + sys.getsizeof(timestamp) + sys.getsizeof(value)
+        return total
+
+    def discard_before(self, seq):
+        """Drop events before `seq`; returns how many were dropped."""
+        head = max(self._head, min(seq, self.end) - self._offset)
+        dropped = head - self._head
+        self._head = head
+        # Compact once at least half the list is dead, so each event is moved O(1) times
+        if self._head and self._head * 2 >= len(self._events):
+            del self._events[:self._head]
+            self._offset += self._head
+            self._head = 0
+        return dropped
+
+
+class WalletWindow:
+    """
+    Time-windowed view of one wallet's events with statistics maintained
+    incrementally as events enter and leave the window.
+
+    Each event is (timestamp in seconds, value, type). Sums, counts, buy/sell
+    counters, min/max value, inter-arrival mean/min/max and the consecutive-pair
+    statistics used by SmartPositionAgent are all updated in O(1) amortized time
+    per event, so pattern checks never rescan the window. Several windows of
+    different lengths can share one EventLog (see core.wallet_store); a window
+    created without one owns a private log and trims it itself.
+    """
+
+    __slots__ = (
+        'window', 'log', '_owns_log', '_total', '_total_error', 'buys', 'sells',
+        '_start_seq', '_end_seq', '_values_min', '_values_max', '_gaps_min', '_gaps_max',
+        'increasing_pairs', 'decreasing_pairs', '_relative_change_sum',
+    )
+
+    def __init__(self, window, log=None):
+        self.window = window
+        self._owns_log = log is None
+        self.log = EventLog() if log is None else log
+        self._total = 0.0
+        self._total_error = 0.0             # Compensation term, see _accumulate()
+        self.buys = 0
+        self.sells = 0
+        self._start_seq = self._end_seq = self.log.start   # Events [start, end) are in the window
+        self._values_min = _MonotonicQueue(largest=False)
+        self._values_max = _MonotonicQueue(largest=True)
+        self._gaps_min = _MonotonicQueue(largest=False)     # Gap keyed by the later event's seq
+        self._gaps_max = _MonotonicQueue(largest=True)
+        self.increasing_pairs = 0           # Pairs with v[i] <= v[i + 1] * 1.1
+        self.decreasing_pairs = 0           # Pairs with v[i] >= v[i + 1] * 0.9
+        self._relative_change_sum = 0.0     # Sum of |v[i] - v[i - 1]| / v[i - 1]
+
+    def __len__(self):
+        return self._end_seq - self._start_seq
+
+    def _accumulate(self, value):
+        # Neumaier-compensated running sum: adding and later subtracting large
+        # values would otherwise leave rounding residue in small totals
+        total = self._total + value
+        if abs(self._total) >= abs(value):
+            self._total_error += (self._total - total) + value
+        else:
+            self._total_error += (value - total) + self._total
+        self._total = total
+
+    @property
+    def total(self):
+        return self._total + self._total_error
+
+    @staticmethod
+    def _pair_stats(previous, current):
+        increasing = previous <= current * 1.1
+        decreasing = previous >= current * 0.9
+        change = abs(current - previous) / previous if previous else 0.0
+        return increasing, decreasing, change
+
+    def add(self, timestamp, value, tx_type=None):
+        """Append an event and drop events that fall out of the window ending at it."""
+        self.log.append((timestamp, value, tx_type))
+        self.advance(timestamp)
+
+    def advance(self, now):
+        """Take in events appended to the log since the last call, then evict up to `now - window`."""
+        log = self.log
+        while self._end_seq < log.end:
+            self._include(self._end_seq, log[self._end_seq])
+            self._end_seq += 1
+        self.evict(now - self.window)
+
+    def _include(self, seq, event):
+        timestamp, value, tx_type = event
+        if self._end_seq > self._start_seq:
+            last_timestamp, last_value, _ = self.log[seq - 1]
+            gap = timestamp - last_timestamp
+            self._gaps_min.push(seq, gap)
+            self._gaps_max.push(seq, gap)
+            increasing, decreasing, change = self._pair_stats(last_value, value)
+            self.increasing_pairs += increasing
+            self.decreasing_pairs += decreasing
+            self._relative_change_sum += change
+
+        self._accumulate(value)
+        self.buys += tx_type == 'buy'
+        self.sells += tx_type == 'sell'
+        self._values_min.push(seq, value)
+        self._values_max.push(seq, value)
+
+    def evict(self, cutoff):
+        """Drop events with timestamp <= cutoff; returns how many were dropped."""
+        log = self.log
+        dropped = 0
+        while self._start_seq < self._end_seq and log[self._start_seq][0] <= cutoff:
+            seq = self._start_seq
+            timestamp, value, tx_type = log[seq]
+            self._start_seq += 1
+            dropped += 1
+            self._accumulate(-value)
+            self.buys -= tx_type == 'buy'
+            self.sells -= tx_type == 'sell'
+            self._values_min.expire(seq)
+            self._values_max.expire(seq)
+            if self._start_seq < self._end_seq:
+                # The pair (evicted, new first) and its gap leave the window too
+                self._gaps_min.expire(seq + 1)
+                self._gaps_max.expire(seq + 1)
+                increasing, decreasing, change = self._pair_stats(value, log[seq + 1][1])
+                self.increasing_pairs -= increasing
+                self.decreasing_pairs -= decreasing
+                self._relative_change_sum -= change
+        if self._start_seq == self._end_seq:
+            # Reset running sums so floating-point residue does not accumulate
+            self._total = self._total_error = 0.0
+            self._relative_change_sum = 0.0
+        if dropped and self._owns_log:
+            log.discard_before(self._start_seq)
+        return dropped
+
+    def memory_usage(self):
+        """Approximate bytes held by the window's own state, excluding a shared log."""
+        total = sys.getsizeof(self) + sum(queue.memory_usage() for queue in (
+            self._values_min, self._values_max, self._gaps_min, self._gaps_max))
+        return total + self.log.memory_usage() if self._owns_log else total
+
+    @property
+    def start(self):
+        """Sequence number of the oldest event in the window."""
+        return self._start_seq
+
+    @property
+    def first(self):
+        if self._start_seq == self._end_seq:
+            raise IndexError("window is empty")
+        return self.log[self._start_seq]
+
+    @property
+    def last(self):
+        if self._start_seq == self._end_seq:
+            raise IndexError("window is empty")
+        return self.log[self._end_seq - 1]
+
+    @property
+    def mean_value(self):
+        return self.total / len(self) if len(self) else 0
+
+    @property
+    def min_value(self):
+        return self._values_min.peek()
+
+    @property
+    def max_value(self):
+        return self._values_max.peek()
+
+    @property
+    def span(self):
+        """Seconds between the first and last event in the window."""
+        return self.last[0] - self.first[0] if len(self) else 0
+
+    @property
+    def mean_interval(self):
+        # Consecutive gaps telescope, so their mean is the span over the gap count
+        return self.span / (len(self) - 1) if len(self) > 1 else None
+
+    @property
+    def min_interval(self):
+        return self._gaps_min.peek()
+
+    @property
+    def max_interval(self):
+        return self._gaps_max.peek()
+
+    @property
+    def mean_relative_change(self):
+        pairs = len(self) - 1
+        return self._relative_change_sum / pairs if pairs > 0 else 0
+
+    def recent_total(self, count):
+        """Sum of the values of the last `count` events."""
+        log = self.log
+        first = max(self._start_seq, self._end_seq - count)
+        return sum(log[seq][1] for seq in range(first, self._end_seq))
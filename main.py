@@ -1,6 +1,4 @@
 # main.py
-import threading
-import time
 import sys
 import asyncio
 
@@ -10,86 +8,86 @@ if sys.platform.startswith('win'):
 from core.config import settings
 from core.logging_setup import setup_logging
 from core.message_bus import MessageBus
+from core.metrics import MetricsServer
+from core.runtime import AgentRuntime
 from agents.collection.cielo_agent import CieloAgent
 from agents.analysis.data_processing_agent import DataProcessingAgent
 from agents.processing.validation_agent import DataValidationAgent
 from agents.validation.data_integrity_agent import DataIntegrityAgent
-from agents.validation.type_validation_agent import TypeValidationAgent
-from agents.validation.value_range_agent import ValueRangeAgent
-from agents.patterns.wallet_behavior_agent import WalletBehaviorAgent
-from agents.patterns.trading_volume_agent import TradingVolumeAgent
-from agents.patterns.smart_position_agent import SmartPositionAgent
+from agents.validation.TypeValidationAgent import TypeValidationAgent
+from agents.validation.ValueRangeAgent import ValueRangeAgent
+from agents.validation.FusedValidationAgent import FusedValidationAgent
+from agents.patterns.PatternPipelineAgent import PatternPipelineAgent
+from agents.patterns.ShardedPatternAgent import ShardedPatternAgent
+from agents.communication.alert_agent import AlertAgent
+
+
+CHANNELS = (
+    "CieloAgent",
+    "AlertAgent",
+    "RawDataChannel",
+    "ProcessedDataChannel",
+    "ProcessedSnapshotChannel",
+    "ValidationChannel",
+    "DataValidationAgent",
+    "IntegrityChannel",
+    "TypeValidationChannel",
+    "RangeValidationChannel",
+    "PatternChannel",
+    "VolumePatternChannel",
+    "PositionPatternChannel",
+)
+
+
+def build_agents(bus):
+    """Every agent downstream of CieloAgent, wired as configured in settings."""
+    # Data processing and validation agents
+    data_processor = DataProcessingAgent(name="DataProcessingAgent", message_bus=bus)
+    data_validator = DataValidationAgent(name="DataValidationAgent", message_bus=bus)
 
+    # Validation: the original three-agent chain, one fused stage, or nothing
+    # here when CieloAgent validates inline
+    if settings.VALIDATION_MODE == "chain":
+        validation_agents = [
+            DataIntegrityAgent(name="DataIntegrityAgent", message_bus=bus),
+            TypeValidationAgent(name="TypeValidationAgent", message_bus=bus),
+            ValueRangeAgent(name="ValueRangeAgent", message_bus=bus),
+        ]
+    elif settings.VALIDATION_MODE == "fused":
+        validation_agents = [FusedValidationAgent(name="FusedValidationAgent", message_bus=bus)]
+    else:
+        validation_agents = []
+
+    # Pattern agents, either in-process or spread over wallet-sharded worker processes
+    if settings.PATTERN_SHARDS > 0:
+        pattern_agents = [ShardedPatternAgent(name="ShardedPatternAgent", message_bus=bus)]
+    else:
+        # One wallet history for all three, each transaction ingested once and
+        # analysed by every agent before the next, as in the sharded workers
+        pattern_agents = [PatternPipelineAgent(name="PatternPipelineAgent", message_bus=bus)]
+
+    # Coalesced, rate-limited alerts for the detections of every pattern agent
+    alert_agent = AlertAgent(name="AlertAgent", message_bus=bus)
+
+    return [data_processor, data_validator, *validation_agents, *pattern_agents, alert_agent]
 
 
 def main():
     # Set up logging
     setup_logging(settings.LOG_LEVEL)
 
-    # Initialize the message bus
+    # Initialize the message bus and register every channel
     bus = MessageBus()
-
-    # Register agents with the message bus
-    bus.register_agent("CieloAgent")
-    bus.register_agent("AlertAgent")
-    bus.register_agent("RawDataChannel")
-    bus.register_agent("ProcessedDataChannel")
-    bus.register_agent("ValidationChannel")
-    bus.register_agent("DataValidationAgent")
-    bus.register_agent("IntegrityChannel")
-    bus.register_agent("TypeValidationChannel")
-    bus.register_agent("RangeValidationChannel")
-    bus.register_agent("PatternChannel")
-    bus.register_agent("VolumePatternChannel")
-    bus.register_agent("PositionPatternChannel")
-
+    for channel in CHANNELS:
+        bus.register_agent(channel)
 
     # Instantiate the agents
     cielo_agent = CieloAgent(name="CieloAgent", message_bus=bus)
 
-    # Data processing and validation agents
-    data_processor = DataProcessingAgent(name="DataProcessingAgent", message_bus=bus)
-    data_validator = DataValidationAgent(name="DataValidationAgent", message_bus=bus)
-
-    # Create threads for each agent
-    cielo_thread = threading.Thread(target=cielo_agent.start, daemon=True)
-    data_processor_thread = threading.Thread(target=data_processor.start, daemon=True)
-    data_validator_thread = threading.Thread(target=data_validator.start, daemon=True)
-    data_integrity_agent = DataIntegrityAgent(name="DataIntegrityAgent", message_bus=bus)
-    data_integrity_thread = threading.Thread(target=data_integrity_agent.start, daemon=True)
-    type_validator = TypeValidationAgent(name="TypeValidationAgent", message_bus=bus)
-    type_validator_thread = threading.Thread(target=type_validator.start, daemon=True)
-    value_range_validator = ValueRangeAgent(name="ValueRangeAgent", message_bus=bus)
-    value_range_thread = threading.Thread(target=value_range_validator.start, daemon=True)
-    wallet_behavior_agent = WalletBehaviorAgent(name="WalletBehaviorAgent", message_bus=bus)
-    wallet_behavior_thread = threading.Thread(target=wallet_behavior_agent.start, daemon=True)
-    volume_agent = TradingVolumeAgent(name="TradingVolumeAgent", message_bus=bus)
-    volume_thread = threading.Thread(target=volume_agent.start, daemon=True)
-    position_agent = SmartPositionAgent(name="SmartPositionAgent", message_bus=bus)
-    position_thread = threading.Thread(target=position_agent.start, daemon=True)
-
-
-    # Start all agent threads
-    cielo_thread.start()
-    data_processor_thread.start()
-    data_validator_thread.start()
-    data_integrity_thread.start()
-    type_validator_thread.start()
-    value_range_thread.start()
-    wallet_behavior_thread.start()
-    volume_thread.start()
-    position_thread.start()
-
-
-    # Start each agent in its own thread
-    cielo_thread = threading.Thread(target=cielo_agent.start, daemon=True)
-
-
-    cielo_thread.start()
-
-    # Keep the main thread alive indefinitely
-    while True:
-        time.sleep(1)
+    # Run every agent as a task on one event loop, with the metrics endpoint alongside
+    services = [MetricsServer()] if settings.METRICS_ENABLED else []
+    runtime = AgentRuntime([cielo_agent, *build_agents(bus), *services])
+    runtime.start()
 
 
 if __name__ == "__main__":
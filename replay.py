@@ -0,0 +1,165 @@
+# replay.py
+"""
+Replay recorded swap streams through the validation and pattern agents as fast
+as they will go, for backtesting thresholds and heuristics offline.
+
+Inputs are frame-log directories or segment files written by CieloAgent (see
+core.frame_log), or text files with one JSON frame or swap per line. Time is
+simulated: range validation sees "now" as the frame's receive time (or the
+swap's own timestamp for text files) and the wallet store runs on event time,
+so the same input always yields byte-identical output. Swaps repeated across
+inputs are dropped by the same transaction-hash dedup stage as the live feed.
+
+    python replay.py data/frames --output patterns.jsonl
+    python replay.py swaps.jsonl --thresholds '{"min_transaction_value": 100}'
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from core.clock import EventTimeClock
+from core.codec import get_codec
+from core.dedup import build_dedup
+from core.frame_log import FrameLogReader
+from core.transaction import Transaction
+from core.wallet_store import WalletStore
+from agents.validation.FusedValidationAgent import build_validator
+from agents.patterns.pattern_pipeline import OUTPUT_CHANNELS, PatternPipeline
+
+logger = logging.getLogger("Replay")
+
+
+def iter_frames(paths):
+    """Yield (received_ns or None, raw frame) from every input, in order."""
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from FrameLogReader(path)
+        elif path.suffix == '.log':
+            yield from FrameLogReader(path.parent).read_segment(path)
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield None, line
+
+
+def parse_swap(frame, codec):
+    """
+    The swap payload of a feed frame, a bare swap dict, or None for anything
+    else. Raises ValueError for frames that do not decode to an object.
+    """
+    data = codec.loads(frame)
+    if isinstance(data, dict) and data.get('type') == 'tx':
+        data = data.get('data', {})
+    if not isinstance(data, dict):
+        raise ValueError(f"Frame is not a JSON object: {type(data).__name__}")
+    return data if data.get('tx_type') == 'swap' else None
+
+
+class Replay:
+    """Drives recorded frames through the fused validator and a PatternPipeline."""
+
+    def __init__(self, output, thresholds=None, codec=None, dedup=None):
+        self.output = output
+        self.codec = codec or get_codec()
+        self.now_ns = 0
+        self.validate = build_validator(thresholds, clock=lambda: self.now_ns)
+        self.seen = build_dedup(dedup, clock=lambda: self.now_ns / 1e9)
+        self.pipeline = PatternPipeline(wallet_store=WalletStore(clock=EventTimeClock()))
+        self.counts = Counter()
+        self.rejections = Counter()
+        self.patterns = Counter()
+
+    async def run(self, frames):
+        for received_ns, frame in frames:
+            self.counts['frames'] += 1
+            try:
+                data = parse_swap(frame, self.codec)
+            except ValueError:
+                self.counts['unparseable'] += 1
+                continue
+            if data is None:
+                continue
+            transaction = Transaction.from_dict(data)
+            seq = self.counts['swaps']
+            self.counts['swaps'] += 1
+            # Simulated clock: when the frame arrived, else the swap's own time
+            if received_ns is not None:
+                self.now_ns = received_ns
+            elif transaction.timestamp_ns is not None:
+                self.now_ns = max(self.now_ns, transaction.timestamp_ns)
+            if (self.seen is not None and transaction.transaction_hash
+                    and not self.seen.add(transaction.transaction_hash)):
+                self.counts['duplicates'] += 1
+                continue
+
+            rejection = self.validate(transaction)
+            if rejection is not None:
+                self.rejections[f"{rejection.stage}.{rejection.field}.{rejection.reason}"] += 1
+                continue
+            self.counts['valid'] += 1
+            if transaction.wallet_address is None:
+                continue
+            emitted = await self.pipeline.process(transaction)
+            for channel in OUTPUT_CHANNELS:
+                if channel in emitted:
+                    self.patterns[channel] += 1
+                    self._write(seq, channel, transaction, emitted[channel])
+
+    def _write(self, seq, channel, transaction, patterns):
+        record = {
+            'seq': seq,
+            'channel': channel,
+            'transaction_hash': transaction.transaction_hash,
+            'wallet_address': transaction.wallet_address,
+            'token_address': transaction.token_address,
+            'timestamp': transaction.timestamp,
+            'value': transaction.value,
+            'patterns': patterns,
+        }
+        self.output.write(json.dumps(record, sort_keys=True) + '\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded swaps through the agent pipeline.")
+    parser.add_argument('inputs', nargs='+', help="frame-log directories, segment files or JSON-lines files")
+    parser.add_argument('--output', default='replay_patterns.jsonl', help="where to write emitted patterns")
+    parser.add_argument('--stats', help="also write the run's counters and throughput here as JSON")
+    parser.add_argument('--thresholds', type=json.loads, default=None,
+                        help="JSON object overriding ValueRangeAgent thresholds")
+    parser.add_argument('--codec', help="codec of the recorded frames (default: settings.FEED_CODEC)")
+    parser.add_argument('--dedup', choices=("exact", "bloom", "off"),
+                        help="transaction-hash dedup of the swaps (default: settings.DEDUP_MODE)")
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    with open(args.output, 'w', encoding='utf-8') as output:
+        replay = Replay(output, args.thresholds, get_codec(args.codec), args.dedup)
+        started = time.perf_counter()
+        asyncio.run(replay.run(iter_frames(args.inputs)))
+        elapsed = time.perf_counter() - started
+
+    stats = {
+        **replay.counts,
+        'rejected': dict(sorted(replay.rejections.items())),
+        'patterns': dict(replay.patterns),
+        'wallet_store': replay.pipeline.store.stats(),
+        'elapsed_seconds': round(elapsed, 3),
+        'swaps_per_second': round(replay.counts['swaps'] / elapsed, 1) if elapsed else None,
+    }
+    json.dump(stats, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    if args.stats:
+        with open(args.stats, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# tests/test_cielo_agent.py
+import asyncio
+import json
+import logging
+import time
+
+import pytest
+
+from agents.collection.cielo_agent import CieloAgent
+from core.codec import get_codec
+from core.message_bus import MessageBus
+
+
+@pytest.fixture
+def agent():
+    bus = MessageBus()
+    for channel in ("RawDataChannel", "RangeValidationChannel"):
+        bus.register_agent(channel)
+    bus.subscribe("RawDataChannel", "test")
+    cielo = CieloAgent("CieloAgent", bus)
+    cielo.codec = get_codec("json")
+    cielo.frame_log = None
+    return cielo
+
+
+def _swap_frame(tx_hash="h1"):
+    return json.dumps({'type': "tx", 'data': {
+        'tx_type': "swap", 'transaction_hash': tx_hash, 'timestamp': time.time(), 'value': 100.0,
+        'token_address': "sol:t", 'wallet_address': "w"}})
+
+
+@pytest.mark.parametrize("frame", [
+    '["tx"]',
+    '"tx"',
+    '{"type": "tx", "data": ["tx"]}',
+    '{"type": "tx", "data": null}',
+    '{"type": "tx", "data": "swap"}',
+])
+def test_frames_that_are_not_objects_count_as_decode_errors(agent, frame, caplog):
+    with caplog.at_level(logging.WARNING):
+        assert asyncio.run(agent._handle_websocket_message(frame)) is False
+    assert agent.decode_errors == 1
+    assert not [record for record in caplog.records if record.levelno >= logging.ERROR]
+
+    # The agent carries on with the next frame
+    assert asyncio.run(agent._handle_websocket_message(_swap_frame()))
+    forwarded = agent.message_bus.get_messages("RawDataChannel", timeout=0, subscriber="test")
+    assert [msg.transaction_hash for msg in forwarded] == ["h1"]
@@ -0,0 +1,49 @@
+# tests/test_columnar_store.py
+import pytest
+
+pytest.importorskip("numpy")
+
+from core.columnar_store import ColumnarStore
+from core.sorted_buffer import SortedBuffer
+from core.transaction import NS_PER_SECOND, Transaction
+
+
+def _txs(*seconds):
+    return [Transaction(timestamp_ns=s * NS_PER_SECOND, value=float(s), token_address=f"T{s % 2}")
+            for s in seconds]
+
+
+def _seconds(store):
+    return (store.view().timestamp_ns // NS_PER_SECOND).tolist()
+
+
+def test_store_follows_out_of_order_inserts():
+    buffer, store = SortedBuffer(10), ColumnarStore(10)
+    buffer.insert_many(_txs(1, 3, 5))
+    assert store.apply(buffer.snapshot())
+    buffer.insert_many(_txs(2, 6))
+    assert store.apply(buffer.delta())
+    assert _seconds(store) == [1, 2, 3, 5, 6]
+    assert store.token_view("T0").value.tolist() == [2.0, 6.0]
+
+
+def test_store_trimmed_past_its_end():
+    buffer, store = SortedBuffer(3), ColumnarStore(3)
+    buffer.insert_many(_txs(1, 2))
+    store.apply(buffer.snapshot())
+    buffer.insert_many(_txs(3, 4, 5, 6, 7))
+    assert store.apply(buffer.delta())
+    assert _seconds(store) == [5, 6, 7]
+    buffer.insert_many(_txs(8))
+    assert store.apply(buffer.delta())
+    assert _seconds(store) == [6, 7, 8]
+    assert store.token_view("T1").value.tolist() == [7.0]
+    assert len(store.tokens) == 2
+
+
+def test_store_needs_snapshot_before_deltas():
+    buffer, store = SortedBuffer(10), ColumnarStore(10)
+    buffer.insert_many(_txs(1))
+    assert not store.apply(buffer.delta())
+    assert store.apply(buffer.snapshot())
+    assert _seconds(store) == [1]
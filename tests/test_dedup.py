@@ -0,0 +1,112 @@
+# tests/test_dedup.py
+import pytest
+
+from core.dedup import RotatingBloomFilter, SeenSet, build_dedup
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_seen_set_catches_duplicates_within_ttl():
+    clock = FakeClock()
+    seen = SeenSet(ttl=10, max_entries=100, clock=clock)
+    assert seen.add("a") and seen.add("b")
+    clock.now = 9.9
+    assert not seen.add("a")
+    assert "b" in seen
+    assert seen.stats() == {'size': 2, 'hits': 1, 'misses': 2, 'expired': 0, 'evicted': 0}
+
+
+def test_seen_set_forgets_keys_after_ttl():
+    clock = FakeClock()
+    seen = SeenSet(ttl=10, max_entries=100, clock=clock)
+    seen.add("a")
+    clock.now = 5
+    seen.add("b")
+    clock.now = 10
+    # TTL runs from first sight: "a" has expired, "b" has not
+    assert "a" not in seen and "b" in seen
+    assert seen.add("a")
+    assert not seen.add("b")
+    assert seen.expired == 1 and len(seen) == 2
+
+
+def test_seen_set_evicts_oldest_beyond_max_entries():
+    seen = SeenSet(ttl=1000, max_entries=3, clock=FakeClock())
+    for key in "abcd":
+        assert seen.add(key)
+    assert len(seen) == 3 and seen.evicted == 1
+    # The oldest key was evicted before its TTL and is let through again
+    assert "a" not in seen
+    assert not seen.add("d")
+    assert seen.add("a")
+
+
+def _bloom():
+    return RotatingBloomFilter(max_bytes=1024, fp_rate=0.01)
+
+
+def _fill_until_rotation(bloom, prefix):
+    # False positives are not counted towards a generation, so this takes about `capacity` keys
+    rotations, keys = bloom.rotations, []
+    while bloom.rotations == rotations:
+        keys.append(f"{prefix}-{len(keys)}")
+        bloom.add(keys[-1])
+    return keys
+
+
+def test_bloom_never_misses_a_duplicate_within_the_window():
+    bloom = _bloom()
+    keys = _fill_until_rotation(bloom, "tx")
+    # The first generation has just rotated to previous; every key is still remembered
+    assert all(key in bloom for key in keys)
+    assert not any(bloom.add(key) for key in keys)
+
+
+def test_bloom_forgets_keys_after_two_rotations():
+    bloom = _bloom()
+    old = _fill_until_rotation(bloom, "old")
+    _fill_until_rotation(bloom, "new")
+    # Only false positives can still match, at roughly fp_rate
+    remembered = sum(key in bloom for key in old)
+    assert remembered <= len(old) * 0.05
+
+
+def test_bloom_carries_forward_keys_seen_again():
+    bloom = _bloom()
+    bloom.add("kept")
+    _fill_until_rotation(bloom, "a")
+    # Seen again while only in the previous generation: a duplicate, copied forward
+    assert not bloom.add("kept")
+    _fill_until_rotation(bloom, "b")
+    assert bloom.rotations == 2
+    assert "kept" in bloom
+
+
+def test_bloom_false_positive_rate_is_near_target():
+    bloom = _bloom()
+    _fill_until_rotation(bloom, "previous")
+    # Fill the current generation to just below a rotation so both are as full as they get
+    for i in range(bloom.capacity - 1):
+        bloom.add(f"current-{i}")
+    probes = 20000
+    false_positives = sum(f"fresh-{i}" in bloom for i in range(probes))
+    assert false_positives / probes < 3 * bloom.fp_rate
+
+
+def test_bloom_rejects_invalid_fp_rate():
+    with pytest.raises(ValueError):
+        RotatingBloomFilter(max_bytes=1024, fp_rate=1.5)
+
+
+def test_build_dedup_modes():
+    assert build_dedup("off") is None
+    assert isinstance(build_dedup("exact"), SeenSet)
+    assert isinstance(build_dedup("bloom"), RotatingBloomFilter)
+    with pytest.raises(ValueError):
+        build_dedup("fuzzy")
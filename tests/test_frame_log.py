@@ -0,0 +1,29 @@
+# tests/test_frame_log.py
+import time
+
+from core.frame_log import FrameLogReader, FrameLogWriter
+
+
+def test_frames_are_synced_when_the_feed_goes_quiet(tmp_path):
+    writer = FrameLogWriter(tmp_path, fsync_interval=0.05)
+    writer.start()
+    try:
+        writer.append('{"a": 1}', received_ns=1)
+        deadline = time.monotonic() + 2.0
+        while time.monotonic() < deadline and not list(FrameLogReader(tmp_path)):
+            time.sleep(0.01)
+        # Still running: the frame reached the file through the interval sync alone
+        assert list(FrameLogReader(tmp_path)) == [(1, b'{"a": 1}')]
+    finally:
+        writer.close()
+
+
+def test_close_writes_queued_frames(tmp_path):
+    writer = FrameLogWriter(tmp_path, fsync_interval=60.0)
+    writer.start()
+    for index in range(100):
+        writer.append(f"frame {index}", received_ns=index)
+    writer.close()
+    frames = list(FrameLogReader(tmp_path))
+    assert len(frames) == 100 and frames[-1] == (99, b"frame 99")
+    assert writer.written == 100 and not writer.dropped
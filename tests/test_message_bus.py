@@ -0,0 +1,61 @@
+# tests/test_message_bus.py
+import asyncio
+
+from core.message_bus import MessageBus, POLICY_BLOCK
+
+
+def _channel(bus, name, **kwargs):
+    bus.register_agent(name, **kwargs)
+    return bus.channels[name]
+
+
+def test_timed_out_reader_is_forgotten():
+    bus = MessageBus()
+    channel = _channel(bus, "C")
+    assert asyncio.run(bus.get_messages_async("C", timeout=0.01, subscriber="a")) == []
+    assert not channel._async_readers
+    # The loop the reader waited on is closed; sending must still work
+    assert bus.send_message("C", "x")
+    assert bus.get_messages("C", subscriber="a") == ["x"]
+
+
+def test_cancelled_reader_is_forgotten():
+    bus = MessageBus()
+    channel = _channel(bus, "C")
+
+    async def cancel_reader():
+        task = asyncio.create_task(bus.get_messages_async("C", subscriber="a"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(cancel_reader())
+    assert not channel._async_readers
+    assert bus.send_message("C", "x")
+
+
+def test_timed_out_writer_is_forgotten():
+    bus = MessageBus()
+    channel = _channel(bus, "C", capacity=1, policy=POLICY_BLOCK)
+    channel.block_timeout = 0.01
+    bus.subscribe("C", "a")
+    assert bus.send_message("C", "x")
+    assert not asyncio.run(bus.send_message_async("C", "y"))
+    assert not channel._async_writers
+    assert channel.dropped['timeout'] == 1
+    assert bus.get_messages("C", subscriber="a") == ["x"]
+
+
+def test_non_critical_subscriber_does_not_fill_channel():
+    bus = MessageBus()
+    channel = _channel(bus, "C", capacity=2, policy=POLICY_BLOCK)
+    channel.block_timeout = 0.01
+    bus.subscribe("C", "fast")
+    bus.subscribe("C", "periodic", critical=False)
+    for message in "abc":
+        assert bus.send_message("C", message)
+        assert bus.get_messages("C", subscriber="fast") == [message]
+    assert bus.get_messages("C", subscriber="periodic") == ["b", "c"]
+    stats = channel.stats()['subscribers']
+    assert stats['periodic']['lagged'] == 1 and not stats['periodic']['critical']
+    assert channel.dropped['timeout'] == 0
@@ -0,0 +1,68 @@
+# tests/test_pattern_pipeline.py
+import asyncio
+import time
+
+from agents.patterns.pattern_pipeline import OUTPUT_CHANNELS, PatternPipeline
+from agents.patterns.PatternPipelineAgent import PatternPipelineAgent
+from core.message_bus import MessageBus
+from core.transaction import Transaction
+from core.wallet_store import WalletStore
+
+NOW = time.time()
+
+
+def _burst(count=6, wallet="w1"):
+    return [Transaction.from_dict({'timestamp': NOW + 10 * i, 'value': 100.0 * (i + 1) ** 2,
+                                   'token_address': "sol:t", 'wallet_address': wallet,
+                                   'transaction_hash': f"{wallet}-{i}", 'transaction_type': "buy"})
+            for i in range(count)]
+
+
+def _bus():
+    bus = MessageBus()
+    for channel in ("RangeValidationChannel", *OUTPUT_CHANNELS):
+        bus.register_agent(channel)
+    for channel in OUTPUT_CHANNELS:
+        bus.subscribe(channel, "test")
+    return bus
+
+
+def test_batch_is_judged_against_history_up_to_each_swap():
+    bus = _bus()
+    agent = PatternPipelineAgent("PatternPipelineAgent", bus)
+    swaps = _burst()
+    # The whole burst arrives as one batch
+    asyncio.run(agent.handle_batch(swaps))
+    live = {channel: [(msg.transaction_hash, msg.patterns) for msg in bus.get_messages(channel, subscriber="test")]
+            for channel in OUTPUT_CHANNELS}
+
+    # One swap at a time, as replay.py and the sharded workers see them
+    pipeline = PatternPipeline(".reference")
+
+    async def one_by_one():
+        return [await pipeline.process(tx) for tx in swaps]
+
+    reference = {channel: [] for channel in OUTPUT_CHANNELS}
+    for tx, emitted in zip(swaps, asyncio.run(one_by_one())):
+        for channel, patterns in emitted.items():
+            reference[channel].append((tx.transaction_hash, patterns))
+    assert live == reference
+    # Too little history for volume patterns on the first swaps
+    flagged = {tx_hash for tx_hash, _ in live["VolumePatternChannel"]}
+    assert flagged and not flagged & {"w1-0", "w1-1"}
+
+
+def test_sync_until_an_ingested_swap_reads_nothing_more():
+    bus = _bus()
+    store = WalletStore("test.wallets")
+    store.register_window(3600)
+    store.attach(bus, "RangeValidationChannel")
+    swaps = _burst(4)
+    for tx in swaps:
+        bus.send_message("RangeValidationChannel", tx)
+    assert store.sync(until=swaps[1]) == 2
+    # Another reader is behind the store: its swap is already in, the rest stays queued
+    assert store.sync(until=swaps[0]) == 0
+    assert store.sync(until=swaps[0].with_patterns()) == 0
+    assert store.ingested == 2
+    assert store.sync(until=swaps[3]) == 2
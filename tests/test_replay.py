@@ -0,0 +1,36 @@
+# tests/test_replay.py
+import asyncio
+import io
+import json
+
+import pytest
+
+from core.codec import get_codec
+from replay import Replay, parse_swap
+
+SWAP = {'tx_type': 'swap', 'transaction_hash': 'h1', 'wallet_address': 'w1', 'token_address': 't1'}
+
+
+@pytest.fixture
+def codec():
+    return get_codec("json")
+
+
+def test_parse_swap_unwraps_tx_frames(codec):
+    assert parse_swap(json.dumps({'type': 'tx', 'data': SWAP}), codec) == SWAP
+    assert parse_swap(json.dumps(SWAP), codec) == SWAP
+    assert parse_swap(json.dumps({'type': 'tx', 'data': {'tx_type': 'transfer'}}), codec) is None
+
+
+@pytest.mark.parametrize("frame", ["[1, 2]", "42", '"swap"', "null", '{"type": "tx", "data": [1]}'])
+def test_parse_swap_rejects_non_objects(codec, frame):
+    with pytest.raises(ValueError):
+        parse_swap(frame, codec)
+
+
+def test_replay_counts_non_objects_as_unparseable(codec):
+    replay = Replay(io.StringIO(), codec=codec)
+    frames = [(None, "[1, 2]"), (None, "{not json"), (None, json.dumps({'type': 'tx', 'data': SWAP}))]
+    asyncio.run(replay.run(frames))
+    assert replay.counts['unparseable'] == 2
+    assert replay.counts['swaps'] == 1
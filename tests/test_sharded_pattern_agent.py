@@ -0,0 +1,51 @@
+# tests/test_sharded_pattern_agent.py
+import asyncio
+import time
+
+from agents.patterns.pattern_pipeline import OUTPUT_CHANNELS
+from agents.patterns.ShardedPatternAgent import ShardedPatternAgent
+from core.message_bus import MessageBus
+from core.metrics import MetricsRegistry
+from core.transaction import Transaction
+
+NOW = time.time()
+
+
+def _swap(i, wallet):
+    return Transaction.from_dict({'timestamp': NOW + i, 'value': 1000.0, 'token_address': "sol:t",
+                                  'wallet_address': wallet, 'transaction_hash': f"h{i}",
+                                  'transaction_type': "buy"})
+
+
+def test_oversize_record_does_not_stall_ordered_output():
+    bus = MessageBus()
+    for channel in ("RangeValidationChannel", *OUTPUT_CHANNELS):
+        bus.register_agent(channel)
+    bus.subscribe("PatternChannel", "test")
+    agent = ShardedPatternAgent("ShardedPatternAgent", bus, shards=2)
+    # Accumulation needs 3 buys from one wallet; the oversize swap comes first
+    swaps = [_swap(0, "w" * 1000)] + [_swap(i, "w1") for i in range(1, 6)]
+
+    async def run():
+        task = asyncio.create_task(agent.run())
+        for tx in swaps:
+            await bus.send_message_async("RangeValidationChannel", tx)
+        deadline = time.monotonic() + 20
+        published = []
+        while time.monotonic() < deadline and len(published) < 3:
+            published += bus.get_messages("PatternChannel", subscriber="test")
+            await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return published
+
+    published = asyncio.run(run())
+    assert agent.oversize == 1
+    assert [msg.transaction_hash for msg in published] == ["h3", "h4", "h5"]
+    stats = agent.stats()['wallet_stores']
+    assert sum(shard['ingested'] for shard in stats.values()) == 5
+    registry = MetricsRegistry()
+    registry.register_agent(agent)
+    rendered = registry.render()
+    assert 'pipeline_wallet_store_ingested_total{store="WalletStore-' in rendered
+    assert f'pipeline_pattern_shard_oversize_total{{agent="{agent.name}"}} 1' in rendered
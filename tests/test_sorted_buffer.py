@@ -0,0 +1,45 @@
+# tests/test_sorted_buffer.py
+from core.sorted_buffer import SortedBuffer, SortedView
+from core.transaction import NS_PER_SECOND, Transaction
+
+
+def _txs(*seconds):
+    return [Transaction(timestamp_ns=s * NS_PER_SECOND) for s in seconds]
+
+
+def _seconds(items):
+    return [tx.timestamp_ns // NS_PER_SECOND for tx in items]
+
+
+def test_view_follows_out_of_order_inserts():
+    buffer, view = SortedBuffer(10), SortedView()
+    buffer.insert_many(_txs(1, 3, 5))
+    view.apply(buffer.snapshot())
+    buffer.insert_many(_txs(2, 6))
+    removed, added = view.apply(buffer.delta())
+    assert _seconds(view.items) == [1, 2, 3, 5, 6]
+    assert _seconds(removed) == [3, 5]
+    assert _seconds(added) == [2, 3, 5, 6]
+
+
+def test_view_trimmed_past_its_end():
+    buffer, view = SortedBuffer(3), SortedView()
+    buffer.insert_many(_txs(1, 2))
+    view.apply(buffer.snapshot())
+    buffer.insert_many(_txs(3, 4, 5, 6, 7))
+    removed, _ = view.apply(buffer.delta())
+    assert _seconds(view.items) == [5, 6, 7]
+    assert _seconds(removed) == [1, 2]
+    buffer.insert_many(_txs(8))
+    view.apply(buffer.delta())
+    assert _seconds(view.items) == [6, 7, 8]
+    assert _seconds(view.items) == _seconds(buffer)
+
+
+def test_view_needs_snapshot_after_missed_delta():
+    buffer, view = SortedBuffer(10), SortedView()
+    assert view.apply(buffer.snapshot()) == ([], ())
+    buffer.insert_many(_txs(1))
+    buffer.delta()
+    buffer.insert_many(_txs(2))
+    assert view.apply(buffer.delta()) is None
@@ -0,0 +1,65 @@
+# tests/test_timer_wheel.py
+from core.timer_wheel import TimerWheel
+
+
+def _entries(wheel):
+    return sum(len(bucket) for bucket in wheel._buckets)
+
+
+def test_expires_keys_at_their_deadline():
+    wheel = TimerWheel(tick=1.0, slots=8)
+    wheel.advance(0)
+    wheel.schedule("a", 3)
+    wheel.schedule("b", 20)             # More than a revolution away
+    assert wheel.advance(2) == []
+    assert wheel.advance(3) == ["a"]
+    assert wheel.advance(19) == []
+    assert wheel.advance(20) == ["b"]
+    assert len(wheel) == 0 and _entries(wheel) == 0
+
+
+def test_pushed_back_deadline_is_refiled_once():
+    wheel = TimerWheel(tick=1.0, slots=8)
+    wheel.advance(0)
+    wheel.schedule("a", 3)
+    for deadline in range(4, 10):
+        wheel.schedule("a", deadline)
+    assert _entries(wheel) == 1
+    assert wheel.advance(8) == []
+    assert wheel.advance(9) == ["a"]
+
+
+def test_rescheduling_after_cancel_does_not_duplicate():
+    wheel = TimerWheel(tick=1.0, slots=8)
+    wheel.advance(0)
+    wheel.schedule("a", 3)
+    wheel.cancel("a")
+    wheel.schedule("a", 5)
+    # The stale entry in bucket 3 is skipped rather than re-filed next to the live one
+    assert wheel.advance(3) == []
+    assert _entries(wheel) == 1
+    assert wheel.advance(5) == ["a"]
+    assert wheel.advance(30) == []
+    assert _entries(wheel) == 0
+
+
+def test_earlier_deadline_expires_key_once():
+    wheel = TimerWheel(tick=1.0, slots=8)
+    wheel.advance(0)
+    wheel.schedule("a", 6)
+    wheel.schedule("a", 2)
+    assert wheel.advance(2) == ["a"]
+    wheel.schedule("a", 7)
+    # The entry left in bucket 6 belongs to the earlier filing
+    assert wheel.advance(6) == []
+    assert wheel.advance(7) == ["a"]
+    assert _entries(wheel) == 0
+
+
+def test_cancelled_key_never_expires():
+    wheel = TimerWheel(tick=1.0, slots=8)
+    wheel.advance(0)
+    wheel.schedule("a", 2)
+    wheel.cancel("a")
+    assert "a" not in wheel
+    assert wheel.advance(10) == []
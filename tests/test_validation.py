@@ -0,0 +1,135 @@
+# tests/test_validation.py
+import asyncio
+import math
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from agents.validation import ValueRangeAgent as value_range_module
+from agents.validation.FusedValidationAgent import FusedValidationAgent, build_validator
+from agents.validation.TypeValidationAgent import TypeValidationAgent
+from agents.validation.data_integrity_agent import DataIntegrityAgent
+from core.config import settings
+from core.message_bus import MessageBus
+from core.transaction import NS_PER_SECOND, Transaction
+
+NOW = time.time()
+SOL = "sol:So11111111111111111111111111111111111111112"
+HEX = "0x" + "ab" * 20
+
+# (description, payload changes); every case starts from a valid swap
+CASES = [
+    ("valid sol", {}),
+    ("valid hex", {'token_address': HEX}),
+    ("valid iso timestamp", {'timestamp': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(NOW))}),
+    ("missing timestamp", {'timestamp': None}),
+    ("unparseable timestamp", {'timestamp': "yesterday"}),
+    ("slightly future", {'timestamp': NOW + 100}),
+    ("too far future", {'timestamp': NOW + 1000}),
+    ("past int64 (year 2286)", {'timestamp': 1e10}),
+    ("past int64, int", {'timestamp': 10 ** 11}),
+    ("iso past int64", {'timestamp': "2300-01-01T00:00:00Z"}),
+    ("before int64", {'timestamp': -1e10}),
+    ("too far past", {'timestamp': NOW - 2 * 86400}),
+    ("missing token", {'token_address': None}),
+    ("short hex token", {'token_address': "0xabc"}),
+    ("unknown prefix", {'token_address': "abc"}),
+    ("missing value", {'value': None}),
+    ("string value", {'value': "12.5"}),
+    ("negative value", {'value': -1}),
+    ("zero value", {'value': 0}),
+    ("tiny value", {'value': 1e-9}),
+    ("too large value", {'value': 2e9}),
+    ("infinite value", {'value': math.inf}),
+    ("nan value", {'value': math.nan}),
+    ("bool value", {'value': True}),
+    ("missing hash", {'transaction_hash': None}),
+]
+
+
+def swap(**changes):
+    payload = {'timestamp': NOW, 'token_address': SOL, 'value': 1000.0, 'transaction_hash': "h",
+               'wallet_address': "w", 'tx_type': "swap"}
+    payload.update(changes)
+    return Transaction.from_dict(payload)
+
+
+def _reason(rejection):
+    return None if rejection is None else (rejection.stage, rejection.field, rejection.reason)
+
+
+@pytest.fixture(scope="module")
+def transactions():
+    return [swap(**changes) for _, changes in CASES]
+
+
+def test_batch_matches_per_message_validator(transactions):
+    batch_validation = pytest.importorskip("agents.validation.batch_validation")
+    pytest.importorskip("numpy")
+    clock = lambda: int(NOW * NS_PER_SECOND)
+    validate = build_validator(clock=clock)
+    validate_batch = batch_validation.build_batch_validator(clock=clock)
+    mask, codes = validate_batch(batch_validation.to_columns(transactions))
+    for (case, _), tx, valid, code in zip(CASES, transactions, mask.tolist(), codes.tolist()):
+        expected = _reason(validate(tx))
+        assert _reason(batch_validation.REJECTIONS[code]) == expected, case
+        assert valid == (expected is None), case
+
+
+def _run_fused(messages):
+    bus = MessageBus()
+    bus.register_agent("RangeValidationChannel")
+    bus.subscribe("RangeValidationChannel", "test")
+    agent = FusedValidationAgent("FusedValidationAgent", bus)
+    asyncio.run(agent.handle_batch(messages))
+    return agent, bus.get_messages("RangeValidationChannel", subscriber="test")
+
+
+def test_fused_agent_survives_out_of_range_timestamps():
+    pytest.importorskip("numpy")
+    messages = [swap(transaction_hash=f"h{i}") for i in range(settings.VALIDATION_BATCH_MIN)]
+    messages.append(swap(timestamp=1e10))
+    agent, passed = _run_fused(messages)
+    assert len(passed) == settings.VALIDATION_BATCH_MIN
+    assert agent.rejections == {("range", "timestamp", "too_far_future"): 1}
+
+
+def test_fused_agent_falls_back_when_batch_validation_fails(monkeypatch):
+    pytest.importorskip("numpy")
+    from agents.validation import batch_validation
+
+    def broken(transactions):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(batch_validation, "to_columns", broken)
+    messages = [swap(transaction_hash=f"h{i}") for i in range(settings.VALIDATION_BATCH_MIN)]
+    messages.append(swap(value=-1))
+    agent, passed = _run_fused(messages)
+    assert len(passed) == settings.VALIDATION_BATCH_MIN
+    assert agent.rejections == {("type", "value", "negative"): 1}
+    assert agent.handled == len(messages)
+
+
+def _chain_stage(tx, integrity, types, ranges):
+    # The stage of the three-agent chain that drops the swap, or None if it passes
+    if not integrity._check_data_integrity(tx):
+        return "integrity"
+    if not types._validate_types(tx):
+        return "type"
+    if not ranges._validate_ranges(tx):
+        return "range"
+    return None
+
+
+def test_fused_validator_matches_agent_chain(transactions, monkeypatch):
+    now_ns = int(NOW * NS_PER_SECOND)
+    # ValueRangeAgent reads the clock itself; pin it to the validator's
+    monkeypatch.setattr(value_range_module, "time", SimpleNamespace(time_ns=lambda: now_ns))
+    bus = MessageBus()
+    chain = (DataIntegrityAgent("DataIntegrityAgent", bus), TypeValidationAgent("TypeValidationAgent", bus),
+             value_range_module.ValueRangeAgent("ValueRangeAgent", bus))
+    validate = build_validator(clock=lambda: now_ns)
+    for (case, _), tx in zip(CASES, transactions):
+        rejection = validate(tx)
+        assert (rejection and rejection.stage) == _chain_stage(tx, *chain), case
@@ -0,0 +1,52 @@
+# tests/test_wallet_store.py
+from core.clock import EventTimeClock
+from core.transaction import Transaction
+from core.wallet_store import WalletStore
+
+WINDOW = 3600
+
+
+def _swap(timestamp, value=100.0, wallet="w1"):
+    return Transaction.from_dict({'timestamp': timestamp, 'value': value, 'token_address': "sol:t",
+                                  'wallet_address': wallet, 'transaction_hash': f"{wallet}-{timestamp}",
+                                  'transaction_type': "buy"})
+
+
+def _store(max_lateness=60):
+    store = WalletStore(clock=EventTimeClock(max_lateness=max_lateness), max_bytes=0)
+    store.register_window(WINDOW)
+    return store
+
+
+def _summary(window):
+    return (len(window), window.total, window.min_value, window.max_value,
+            window.min_interval, window.max_interval, window.mean_interval,
+            window.increasing_pairs, window.decreasing_pairs, window.mean_relative_change)
+
+
+def test_out_of_order_swap_is_inserted_at_its_own_time():
+    times = [1000, 1010, 1040, 1025, 1050]
+    shuffled, ordered = _store(), _store()
+    for timestamp in times:
+        shuffled.ingest(_swap(timestamp, value=timestamp / 10))
+    for timestamp in sorted(times):
+        ordered.ingest(_swap(timestamp, value=timestamp / 10))
+
+    window = shuffled.window("w1", WINDOW)
+    assert _summary(window) == _summary(ordered.window("w1", WINDOW))
+    # Re-stamping 1025 as 1040 would have made a zero gap
+    assert window.min_interval == 10
+    assert shuffled.stats()['reordered'] == 1
+    assert shuffled.stats()['late'] == 0
+
+
+def test_swap_behind_the_watermark_is_dropped_and_counted():
+    store = _store(max_lateness=60)
+    store.ingest(_swap(1000))
+    store.ingest(_swap(2000))
+    store.ingest(_swap(1500, value=1e9))
+
+    window = store.window("w1", WINDOW)
+    assert len(window) == 2 and window.max_value == 100.0
+    stats = store.stats()
+    assert stats['late'] == 1 and stats['ingested'] == 2 and stats['events'] == 2
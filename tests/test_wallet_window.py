@@ -0,0 +1,118 @@
+# tests/test_wallet_window.py
+import random
+
+import pytest
+
+from agents.patterns.SmartPositionAgent import SmartPositionAgent
+from core.message_bus import MessageBus
+from core.wallet_store import WalletStore
+from core.wallet_window import EventLog, WalletWindow
+
+WINDOW = 60
+
+
+def _events(count, seed):
+    rng = random.Random(seed)
+    timestamp, events = 1000.0, []
+    for _ in range(count):
+        # Bursts with repeated timestamps and values, then quiet stretches that empty the window
+        timestamp += rng.choice((0, 0, 1, 5, 20, 90))
+        value = rng.choice((0.0, 10.0, 10.0, rng.uniform(1, 1e4)))
+        events.append((timestamp, value, rng.choice(('buy', 'sell', 'unknown'))))
+    return events
+
+
+def _brute_force(events, now, window):
+    # Recompute every statistic from scratch over the events still in the window
+    live = [event for event in events if event[0] > now - window]
+    values = [value for _, value, _ in live]
+    pairs = list(zip(values, values[1:]))
+    gaps = [later[0] - earlier[0] for earlier, later in zip(live, live[1:])]
+    return {
+        'len': len(live),
+        'total': sum(values),
+        'buys': sum(tx_type == 'buy' for _, _, tx_type in live),
+        'sells': sum(tx_type == 'sell' for _, _, tx_type in live),
+        'min_value': min(values, default=None),
+        'max_value': max(values, default=None),
+        'min_interval': min(gaps, default=None),
+        'max_interval': max(gaps, default=None),
+        'mean_interval': sum(gaps) / len(gaps) if gaps else None,
+        'increasing_pairs': sum(previous <= current * 1.1 for previous, current in pairs),
+        'decreasing_pairs': sum(previous >= current * 0.9 for previous, current in pairs),
+        'mean_relative_change': (sum(abs(current - previous) / previous if previous else 0.0
+                                     for previous, current in pairs) / len(pairs)) if pairs else 0,
+        'recent_total': sum(values[-3:]),
+        'live': live,
+    }
+
+
+def _incremental(window):
+    return {
+        'len': len(window),
+        'total': window.total,
+        'buys': window.buys,
+        'sells': window.sells,
+        'min_value': window.min_value,
+        'max_value': window.max_value,
+        'min_interval': window.min_interval,
+        'max_interval': window.max_interval,
+        'mean_interval': window.mean_interval,
+        'increasing_pairs': window.increasing_pairs,
+        'decreasing_pairs': window.decreasing_pairs,
+        'mean_relative_change': window.mean_relative_change,
+        'recent_total': window.recent_total(3),
+    }
+
+
+def _assert_matches(window, expected):
+    for name, actual in _incremental(window).items():
+        wanted = expected[name]
+        if isinstance(wanted, float):
+            assert actual == pytest.approx(wanted, rel=1e-9, abs=1e-6), name
+        else:
+            assert actual == wanted, name
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_window_matches_brute_force(seed):
+    events = _events(400, seed)
+    window = WalletWindow(WINDOW)
+    for index, event in enumerate(events):
+        window.add(*event)
+        _assert_matches(window, _brute_force(events[:index + 1], event[0], WINDOW))
+
+
+def test_windows_sharing_a_log_match_brute_force():
+    events = _events(400, seed=7)
+    log = EventLog()
+    windows = {seconds: WalletWindow(seconds, log) for seconds in (WINDOW, 4 * WINDOW)}
+    for index, event in enumerate(events):
+        log.append(event)
+        for seconds, window in windows.items():
+            window.advance(event[0])
+            _assert_matches(window, _brute_force(events[:index + 1], event[0], seconds))
+        # What WalletStore does once every window has moved past an event
+        log.discard_before(min(window.start for window in windows.values()))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_smart_position_reduction_matches_brute_force(seed):
+    agent = SmartPositionAgent("SmartPositionAgent", MessageBus(), wallet_store=WalletStore())
+    events = _events(300, seed)
+    window = WalletWindow(agent.analysis_window)
+    for index, event in enumerate(events):
+        window.add(*event)
+        expected = _brute_force(events[:index + 1], event[0], agent.analysis_window)
+        live = expected['live']
+        if len(live) < 5:
+            continue
+        consistency = 1 - expected['mean_relative_change']
+        confidence = min(0.6 + consistency * 0.2 + min(expected['total'] / 1000000, 1) * 0.2, 0.95)
+        amount = live[0][1] - live[-1][1]
+        span = live[-1][0] - live[0][0]
+        assert agent._calculate_reduction_confidence(window) == pytest.approx(confidence, rel=1e-9)
+        assert agent._calculate_reduction_amount(window) == pytest.approx(amount, rel=1e-9)
+        assert agent._calculate_reduction_rate(window) == pytest.approx(amount / span if span > 0 else 0,
+                                                                        rel=1e-9, abs=1e-9)
+        assert agent._is_reducing_position(window) == (expected['decreasing_pairs'] >= len(live) * 0.7)